@@ -0,0 +1,95 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import sys
+import random
+import time
+import argparse
+from jc2li.completion import CompletionIndex, RankedMatcher
+from harness import Results, add_arguments, finish, time_each
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+CANDIDATES = 100000
+QUERIES = 200
+WORDS = ('leaf', 'spine', 'border', 'tenant', 'vrf', 'bridge', 'port', 'channel')
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def generate_candidates(count, rnd):
+    """Returns synthetic candidates like "leaf-tenant-01234".
+    """
+    return ['{0}-{1}-{2:05d}'.format(rnd.choice(WORDS), rnd.choice(WORDS), i) for i in range(count)]
+
+
+def generate_queries(candidates, count, rnd):
+    """Returns queries for every kind of match: prefix, substring,
+    subsequence and typo.
+    """
+    queries = []
+    for _ in range(count):
+        candidate = rnd.choice(candidates)
+        kind = rnd.randrange(4)
+        if kind == 0:
+            queries.append(candidate[:rnd.randint(1, len(candidate))])
+        elif kind == 1:
+            queries.append(candidate[-rnd.randint(3, 8):])
+        elif kind == 2:
+            queries.append(''.join(x for x in candidate if x != '-')[::2])
+        else:
+            i = rnd.randrange(len(candidate) - 1)
+            queries.append(candidate[:i] + candidate[i + 1] + candidate[i] + candidate[i + 2:])
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Completion benchmark.")
+    add_arguments(parser)
+    parser.add_argument('-c', '--candidates', type=int, default=CANDIDATES, help='Number of candidates')
+    parser.add_argument('-q', '--queries', type=int, default=QUERIES, help='Number of queries')
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    candidates = generate_candidates(args.candidates, rnd)
+    queries = generate_queries(candidates, args.queries, rnd)
+    usage = dict((x, rnd.random()) for x in rnd.sample(candidates, 1000))
+
+    start = time.perf_counter()
+    matcher = RankedMatcher(candidates, usage=usage)
+    print('RankedMatcher built in {0:.3f}s'.format(time.perf_counter() - start))
+    index = CompletionIndex(candidates, ngrams=True, limit=20)
+
+    results = Results('completion', metric='p50')
+    results.add('list startswith', time_each(lambda x: [c for c in candidates if c.startswith(x)][:20], queries))
+    results.add('index prefix', time_each(lambda x: index.complete(x), queries))
+    results.add('index fuzzy', time_each(lambda x: index.complete(x, mode='fuzzy'), queries))
+    results.add('ranked', time_each(lambda x: matcher.complete(x), queries))
+    return finish(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import sys
+import argparse
+import random
+import tracemalloc
+from jc2li.journal import Journal
+from jc2li.common import ARGOS_ATTR, TREE_ATTR
+from jc2li.argtypes import Int, get_numpy
+from jc2li.decorators import argo, syntax, setsyntax
+from harness import Results, add_arguments, finish, time_call, REPEAT
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+SIZES = (1000, 10000, 100000)
+QUICK_SIZES = (1000, 10000)
+CONTAINERS = (None, 'array', 'numpy')
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class MatchedPath(object):
+    """Parsing tree stand-in returning a path found beforehand, so only
+    conversion and storage are timed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def find_path(self, path_patterns):
+        return self.path
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def build_command(container):
+    """Returns a command with an integer argument entered in a loop, with
+    values stored in the given container.
+    """
+
+    @setsyntax
+    @syntax('ids [values]+')
+    @argo('values', Int, 0, container=container)
+    def _command(self, values):
+        return values
+
+    return _command
+
+
+def consume(container):
+    """Returns a function adding all values, as a computation fed with the
+    argument would do.
+    """
+    if container == 'numpy':
+        return lambda values: int(values.sum())
+    return sum
+
+
+def retained(func):
+    """Returns the value returned by the function, and the memory allocated
+    by the function and still allocated when it returns, in bytes.
+    """
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        value = func()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, after - before
+
+
+def bench_size(results, size, containers, repeat, rnd):
+    """Times converting and storing size values entered for an integer
+    argument, and adding them, for every container.
+    """
+    journal = Journal()
+    values = [str(rnd.randrange(1 << 40)) for _ in range(size)]
+    tokens = []
+    for value in values:
+        tokens.extend(('-values', value))
+    for container in containers:
+        name = container or 'list'
+        f = build_command(container)
+        root = getattr(f, TREE_ATTR)
+        argos = getattr(f, ARGOS_ATTR)
+        tree = MatchedPath(root.find_path(tokens))
+
+        def _map():
+            argos.index()
+            return journal.map_passed_args_to_command_argos(tree, argos, tokens)[0]
+
+        params = {'size': size, 'container': name}
+        results.add('convert/{0}/{1}'.format(name, size), time_call(_map, repeat=repeat), **params)
+        mapped, memory = retained(_map)
+        add = consume(container)
+        entry = results.add('sum/{0}/{1}'.format(name, size), time_call(lambda: add(mapped), repeat=repeat), **params)
+        entry['retained'] = memory
+        print('{0:<56} {1:10d}B  {2:6.1f}B/value'.format('memory/{0}/{1}'.format(name, size), memory, memory / size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Typed containers for repeated numeric arguments benchmark.")
+    add_arguments(parser)
+    parser.add_argument('-q', '--quick', action='store_true', help='Run a reduced set of sizes')
+    parser.add_argument('-r', '--repeat', type=int, default=REPEAT, help='Samples for every case')
+    args = parser.parse_args()
+
+    containers = list(CONTAINERS)
+    try:
+        get_numpy()
+    except ImportError:
+        print('numpy not installed, numpy cases skipped')
+        containers.remove('numpy')
+    rnd = random.Random(args.seed)
+    results = Results('containers')
+    for size in QUICK_SIZES if args.quick else SIZES:
+        bench_size(results, size, containers, args.repeat, rnd)
+    return finish(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+from prompt_toolkit.history import FileHistory
+from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+from prompt_toolkit.shortcuts import create_prompt_application
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.document import Document
+from jc2li.cli import Cli
+from jc2li.base import CliBase
+from jc2li.history import HistoryIndex, AutoSuggestFromIndex
+from harness import Results, add_arguments, finish, time_each
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+LINES = 1000000
+PROMPTS = 20
+SUGGESTIONS = 200
+COMMANDS = ('show tenants', 'show vrf {0}', 'set leaf {0} up', 'ping 10.0.{0}.1', 'help')
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def generate_history(filename, count, rnd):
+    """Writes a history file with the given number of entries.
+    """
+    with open(filename, 'w') as f:
+        for _ in range(count):
+            f.write('\n# 2020-01-01 00:00:00.000000\n+{0}\n'.format(rnd.choice(COMMANDS).format(rnd.randrange(100000))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt setup benchmark.")
+    add_arguments(parser)
+    parser.add_argument('-l', '--lines', type=int, default=LINES, help='Number of history entries')
+    parser.add_argument('-p', '--prompts', type=int, default=PROMPTS, help='Number of prompts')
+    args = parser.parse_args()
+
+    filename = os.path.join(tempfile.mkdtemp(), 'history.txt')
+    generate_history(filename, args.lines, random.Random(args.seed))
+    cli = Cli()
+    cli.HISTORY_FILE = filename
+
+    def _per_prompt():
+        # Objects built by every prompt call before the prompt session.
+        app = create_prompt_application(history=FileHistory(filename),
+                                        auto_suggest=AutoSuggestFromHistory(),
+                                        completer=CliBase.CliCompleter(cli),
+                                        get_prompt_tokens=cli.get_prompt_tokens,
+                                        style=cli.CLI_STYLE)
+        app.buffer.reset()
+
+    def _session():
+        cli.session.completer.reset()
+        cli.session.application.buffer.reset()
+
+    results = Results('history', metric='p50')
+    results.add('prompt() per call', time_each(lambda x: _per_prompt(), range(args.prompts)))
+    results.add('session', time_each(lambda x: _session(), range(args.prompts)))
+
+    # Texts with a match far back in the history, or without any match,
+    # are the worst case for a linear scan.
+    rnd = random.Random(args.seed + 1)
+    texts = ['show vrf {}'.format(rnd.randrange(300)) for _ in range(SUGGESTIONS // 2)]
+    texts += ['missing {}'.format(i) for i in range(SUGGESTIONS // 2)]
+    history = FileHistory(filename)
+    buff = Buffer(history=history)
+    linear = AutoSuggestFromHistory()
+    results.add('linear suggestion', time_each(lambda x: linear.get_suggestion(None, buff, Document(x)), texts))
+
+    start = time.perf_counter()
+    index = HistoryIndex(filename)
+    len(index)
+    print('index built and saved in {0:.3f}s'.format(time.perf_counter() - start))
+    start = time.perf_counter()
+    index = HistoryIndex(filename)
+    len(index)
+    print('index loaded in {0:.3f}s'.format(time.perf_counter() - start))
+    indexed = AutoSuggestFromIndex(index)
+    results.add('indexed suggestion', time_each(lambda x: indexed.get_suggestion(None, buff, Document(x)), texts))
+    results.add('indexed search top-20', time_each(lambda x: index.search(x, 20), texts))
+    os.remove(index.index_filename)
+    os.remove(filename)
+    return finish(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
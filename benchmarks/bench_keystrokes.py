@@ -0,0 +1,256 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from functools import partial
+from prompt_toolkit.document import Document
+from prompt_toolkit.completion import CompleteEvent
+from jc2li.base import CliBase
+from jc2li.cli import Cli
+from jc2li.argtypes import Str
+from jc2li.completion import CompletionIndex
+from jc2li.decorators import argo, syntax, setsyntax
+from jc2li.replay import load_records
+from jc2li.run import load_module, create_cli
+from generators import SyntheticCommand
+from harness import Results, add_arguments, finish, statistics
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+COMMANDS = 2000
+DEEP_COMMANDS = 8
+HOSTS = 100000
+LINES = 20
+WORDS = ('show', 'set', 'clear', 'leaf', 'spine', 'tenant', 'vrf', 'bridge', 'port')
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class Hosts(Str):
+    """Argument type completing host names from a plain list.
+    """
+
+    VALUES = []
+
+    def get_complete_list(self, document, text):
+        return Hosts.VALUES
+
+
+# -----------------------------------------------------------------------------
+#
+class IndexedHosts(Str):
+    """Argument type completing host names from a CompletionIndex.
+    """
+
+    INDEX = None
+
+    def get_complete_list(self, document, text):
+        return IndexedHosts.INDEX
+
+
+# -----------------------------------------------------------------------------
+#
+class CliKeystrokes(Cli):
+
+    @Cli.command('connect')
+    @setsyntax
+    @syntax('connect host')
+    @argo('host', Hosts, None)
+    def do_connect(self, host):
+        pass
+
+    @Cli.command('iconnect')
+    @setsyntax
+    @syntax('iconnect host')
+    @argo('host', IndexedHosts, None)
+    def do_iconnect(self, host):
+        pass
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def add_synthetic(cli, commands):
+    """Registers synthetic commands in the CLI and returns their command
+    lines.
+    """
+    for command in commands:
+        cli.add_command(command.label, partial(command.build(), cli), None)
+    return ['{0} {1}'.format(x.label, x.line) for x in commands]
+
+
+def many_commands_scenario(rnd, count, lines):
+    """CLI with many commands; typing command labels is the hot path.
+    """
+    cli = Cli()
+    commands = [SyntheticCommand('{0}-{1}-{2:04d}'.format(rnd.choice(WORDS), rnd.choice(WORDS), i), 2)
+                for i in range(count)]
+    return cli, rnd.sample(add_synthetic(cli, commands), lines)
+
+
+def deep_tree_scenario(rnd, count, lines):
+    """CLI with commands with 64 arguments in nested blocks and loops.
+    """
+    cli = Cli()
+    commands = [SyntheticCommand('deep{}'.format(i), 64, width=4, depth=3, loop=bool(i % 2))
+                for i in range(count)]
+    typed = add_synthetic(cli, commands)
+    return cli, [rnd.choice(typed) for _ in range(lines)]
+
+
+def dynamic_scenario(rnd, count, lines, label):
+    """CLI with an argument completing a large dynamic list.
+    """
+    Hosts.VALUES = ['host-{0}-{1:06d}'.format(rnd.choice(WORDS), i) for i in range(count)]
+    IndexedHosts.INDEX = CompletionIndex(Hosts.VALUES, limit=50)
+    return CliKeystrokes(), ['{0} {1}'.format(label, rnd.choice(Hosts.VALUES)) for _ in range(lines)]
+
+
+def recorded_scenario(module, filename, raw=False):
+    """CLI from the given module with command lines from a recording, or a
+    text file with a command in every line.
+    """
+    cli = create_cli(load_module(module))
+    if raw:
+        with open(filename, 'r') as f:
+            return cli, [line.rstrip('\n') for line in f if line.strip()]
+    return cli, [x['command'] for x in load_records(filename)]
+
+
+def keystrokes(lines):
+    """Returns every document the completer receives while the lines are
+    typed, character by character.
+
+    None marks the start of a new line.
+    """
+    for line in lines:
+        yield None
+        for i in range(1, len(line) + 1):
+            yield Document(line[:i], cursor_position=i)
+
+
+def replay(completer):
+    """Returns a function that handles a keystroke, retrieving all
+    completions for the document.
+    """
+    event = CompleteEvent(completion_requested=False, text_inserted=True)
+
+    def _keystroke(document):
+        if document is None:
+            completer.reset()
+            return 0
+        return len(list(completer.get_completions(document, event)))
+
+    return _keystroke
+
+
+def allocations(keystroke, documents):
+    """Returns statistics for the peak memory, in bytes, allocated by every
+    keystroke, and the memory still allocated after the whole session.
+    """
+    samples = []
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        for document in documents:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            keystroke(document)
+            if document is not None:
+                samples.append(tracemalloc.get_traced_memory()[1] - before)
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return statistics(samples), retained
+
+
+def bench_scenario(results, name, cli, lines, memory=True):
+    """Replays typing the lines and adds per-keystroke latency and
+    allocations.
+    """
+    completer = CliBase.CliCompleter(cli)
+    documents = list(keystrokes(lines))
+    keystroke = replay(completer)
+    # Warm up caches built on first use, like toolbars and matchers.
+    for document in documents:
+        keystroke(document)
+    samples = []
+    for document in documents:
+        start = time.perf_counter()
+        keystroke(document)
+        if document is not None:
+            samples.append(time.perf_counter() - start)
+    stats = statistics(samples)
+    entry = results.add('keystroke/{}'.format(name), stats, lines=len(lines), keystrokes=len(samples))
+    if memory:
+        alloc, retained = allocations(keystroke, documents)
+        entry['allocated'] = alloc
+        entry['retained'] = retained
+        print('{0:<56} p50={1:10.0f}B  p99={2:10.0f}B  retained={3}B'.format(
+            'allocated/{}'.format(name), alloc['p50'], alloc['p99'], retained))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keystroke completion latency benchmark.")
+    add_arguments(parser)
+    parser.add_argument('-l', '--lines', type=int, default=LINES, help='Command lines typed per scenario')
+    parser.add_argument('-c', '--commands', type=int, default=COMMANDS, help='Commands in the many commands scenario')
+    parser.add_argument('--hosts', type=int, default=HOSTS, help='Values in dynamic completion lists')
+    parser.add_argument('--no-memory', action='store_true', help='Skip allocation tracking')
+    parser.add_argument('--mod', '-M', help='Module with CLI commands for a recorded session', metavar='MODULE')
+    parser.add_argument('--session', help='Recorded session to replay with the --mod CLI', metavar='FILE')
+    parser.add_argument('--raw', '-r', action='store_true', help='Session file in raw format')
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    memory = not args.no_memory
+    results = Results('keystrokes', metric='p50')
+    if args.session:
+        cli, lines = recorded_scenario(args.mod, args.session, args.raw)
+        bench_scenario(results, 'recorded', cli, lines, memory)
+        return finish(args, results)
+    scenarios = (('many-commands', lambda: many_commands_scenario(rnd, args.commands, args.lines)),
+                 ('deep-tree', lambda: deep_tree_scenario(rnd, DEEP_COMMANDS, args.lines)),
+                 ('dynamic-list', lambda: dynamic_scenario(rnd, args.hosts, args.lines, 'connect')),
+                 ('dynamic-index', lambda: dynamic_scenario(rnd, args.hosts, args.lines, 'iconnect')))
+    for name, scenario in scenarios:
+        cli, lines = scenario()
+        bench_scenario(results, name, cli, lines, memory)
+    return finish(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
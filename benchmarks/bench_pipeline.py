@@ -0,0 +1,117 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import sys
+import argparse
+import itertools
+from jc2li.cliparser import process_syntax
+from jc2li.journal import Journal
+from jc2li.common import ARGOS_ATTR, TREE_ATTR
+from jc2li.decorators import argo, syntax
+from generators import SyntheticCommand, make_cli
+from harness import Results, add_arguments, finish, time_call, REPEAT
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+NARGS = (1, 2, 4, 8, 16, 32, 64)
+WIDTHS = (1, 4)
+DEPTHS = (1, 3)
+LOOPS = (False, True)
+QUICK_NARGS = (1, 8, 64)
+STAGES = ('process_syntax', 'build_tree', 'find_path', 'map_args', 'exec')
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def generate_cases(nargs, widths, depths, loops):
+    """Returns a synthetic command for every combination of arguments,
+    width, depth and loop nesting.
+
+    Width and depth only matter with optional arguments, so commands with
+    a single argument are generated once.
+    """
+    cases = []
+    for n, width, depth, loop in itertools.product(nargs, widths, depths, loops):
+        if n == 1 and (width, depth, loop) != (widths[0], depths[0], loops[0]):
+            continue
+        label = 'n{0}-w{1}-d{2}-{3}'.format(n, width, depth, 'loop' if loop else 'opt')
+        cases.append(SyntheticCommand(label, n, width, depth, loop))
+    return cases
+
+
+def bench_command(results, command, cli, stages, repeat):
+    """Times every pipeline stage for a synthetic command.
+    """
+    journal = Journal()
+    params = {'nargs': command.nargs, 'width': command.width, 'depth': command.depth, 'loop': command.loop}
+    f = command.build()
+    root = getattr(f, TREE_ATTR)
+    argos = getattr(f, ARGOS_ATTR)
+    patterns = command.patterns
+
+    # Function with arguments and rules, but without any parsing tree, as
+    # @setsyntax receives it.
+    def _command(self, *args):
+        return args
+
+    undecorated = _command
+    for name, argtype, default in reversed(command.arguments):
+        undecorated = argo(name, argtype, default)(undecorated)
+    undecorated = syntax(command.syntax)(undecorated)
+
+    # Arguments are indexed before every mapping, as the journal does.
+    def _map_args():
+        argos.index()
+        return journal.map_passed_args_to_command_argos(root, argos, patterns)
+
+    timed = {'process_syntax': lambda: process_syntax(command.syntax),
+             'build_tree': lambda: journal.build_command_parsing_tree(undecorated),
+             'find_path': lambda: root.find_path(patterns),
+             'map_args': _map_args,
+             'exec': lambda: cli.exec_user_input('{0} {1}'.format(command.label, command.line))}
+    for stage in stages:
+        results.add('{0}/{1}'.format(stage, command.label), time_call(timed[stage], repeat=repeat), **params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parsing and dispatch pipeline benchmark.")
+    add_arguments(parser)
+    parser.add_argument('-q', '--quick', action='store_true', help='Run a reduced set of cases')
+    parser.add_argument('-r', '--repeat', type=int, default=REPEAT, help='Samples for every case')
+    parser.add_argument('--stage', action='append', choices=STAGES, help='Stage to run, all by default')
+    args = parser.parse_args()
+
+    nargs = QUICK_NARGS if args.quick else NARGS
+    cases = generate_cases(nargs, WIDTHS, DEPTHS, LOOPS)
+    cli = make_cli(cases)
+    results = Results('pipeline')
+    for command in cases:
+        bench_command(results, command, cli, args.stage or STAGES, args.repeat)
+    return finish(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+from functools import partial
+from jc2li.cli import Cli
+from jc2li.argtypes import Int
+from jc2li.decorators import argo, syntax, setsyntax
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+LOOP_FLAGS = ('*', '+')
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class SyntheticCommand(object):
+    """SyntheticCommand class generates a command syntax, its arguments and
+    a command line using all of them.
+
+    The command has one mandatory positional argument and nargs - 1
+    optional arguments. Optional arguments are split in blocks; every block
+    has depth nested levels, and every level has width alternatives:
+
+        [a1 | a2 [a3 | a4]? ]?
+
+    The flag for every block is '?', or a loop flag, '*' or '+', when loop
+    is True, so loops are nested depth levels deep.
+    """
+
+    def __init__(self, label, nargs, width=1, depth=1, loop=False):
+        self.label = label
+        self.nargs = nargs
+        self.width = width
+        self.depth = depth
+        self.loop = loop
+        self.names = ['a{0:02d}'.format(i) for i in range(nargs)]
+        self.blocks = []
+        optional = self.names[1:]
+        block_size = width * depth
+        for i in range(0, len(optional), block_size):
+            block = optional[i:i + block_size]
+            self.blocks.append([block[j:j + width] for j in range(0, len(block), width)])
+
+    def _flag(self, index):
+        return LOOP_FLAGS[index % len(LOOP_FLAGS)] if self.loop else '?'
+
+    def _block_syntax(self, levels, flag):
+        inner = ' {}'.format(self._block_syntax(levels[1:], flag)) if len(levels) > 1 else ''
+        return '[{0}{1}]{2}'.format(' | '.join(levels[0]), inner, flag)
+
+    @property
+    def syntax(self):
+        """Returns the command syntax.
+        """
+        blocks = [self._block_syntax(levels, self._flag(i)) for i, levels in enumerate(self.blocks)]
+        return ' '.join([self.label, self.names[0]] + blocks)
+
+    @property
+    def arguments(self):
+        """Returns name, type and default value for every argument.
+        """
+        return [(name, Int, None if i == 0 else i) for i, name in enumerate(self.names)]
+
+    @property
+    def patterns(self):
+        """Returns the command line arguments using every argument once,
+        going down every nested level in every block.
+        """
+        patterns = ['1']
+        for levels in self.blocks:
+            for level in levels:
+                patterns.extend(['-{}'.format(level[-1]), '2'])
+        return patterns
+
+    @property
+    def line(self):
+        """Returns the command line arguments as a string.
+        """
+        return ' '.join(self.patterns)
+
+    def expected(self):
+        """Returns values the command callback receives for the command
+        line.
+        """
+        values = [None if i == 0 else i for i in range(self.nargs)]
+        values[0] = 1
+        for levels in self.blocks:
+            for level in levels:
+                values[self.names.index(level[-1])] = 2
+        return tuple(values)
+
+    def build(self):
+        """Returns the command function decorated with @argo, @syntax and
+        @setsyntax, as if it were defined in a class.
+        """
+
+        def _command(self, *args):
+            return args
+
+        _command.__name__ = 'do_{}'.format(self.label)
+        f = _command
+        for name, argtype, default in reversed(self.arguments):
+            f = argo(name, argtype, default)(f)
+        f = syntax(self.syntax)(f)
+        return setsyntax(f)
+
+
+# -----------------------------------------------------------------------------
+#
+def make_cli(commands):
+    """Returns a Cli instance with the given synthetic commands.
+    """
+    cli = Cli()
+    for command in commands:
+        cli.add_command(command.label, partial(command.build(), cli), None)
+    return cli
@@ -0,0 +1,200 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import sys
+import json
+import time
+import platform
+from collections import OrderedDict
+from jc2li.replay import percentile
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+RESULTS_VERSION = 1
+REPEAT = 7
+SAMPLE_TIME = 0.02
+THRESHOLD = 0.2
+METRIC = 'min'
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def statistics(samples):
+    """Returns statistics for the given samples, in seconds.
+    """
+    samples = sorted(samples)
+    return OrderedDict((('min', samples[0]),
+                        ('p50', percentile(samples, 50)),
+                        ('p99', percentile(samples, 99)),
+                        ('max', samples[-1]),
+                        ('mean', sum(samples) / len(samples)),
+                        ('runs', len(samples))))
+
+
+def time_call(func, repeat=REPEAT, sample_time=SAMPLE_TIME):
+    """Times a function without arguments and returns statistics for the
+    time per call.
+
+    The number of calls in every sample is calibrated so every sample takes
+    at least sample_time seconds, which keeps timer resolution out of fast
+    operations.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= sample_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(sample_time / elapsed) + 1)
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics(samples)
+
+
+def time_each(func, args):
+    """Calls the function once for every argument and returns statistics
+    for the latency of every call.
+    """
+    samples = []
+    for arg in args:
+        start = time.perf_counter()
+        func(arg)
+        samples.append(time.perf_counter() - start)
+    return statistics(samples)
+
+
+def add_arguments(parser):
+    """Adds command line options shared by all benchmarks.
+    """
+    parser.add_argument('-o', '--output', help='JSON file where results are saved', metavar='FILE')
+    parser.add_argument('-b', '--baseline', help='JSON file with baseline results to compare', metavar='FILE')
+    parser.add_argument('-t', '--threshold', type=float, default=THRESHOLD,
+                        help='Relative slowdown flagged as a regression')
+    parser.add_argument('-m', '--metric', choices=('min', 'p50', 'p99', 'mean'),
+                        help='Statistic compared against the baseline, the suite default if not given')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Random seed')
+    return parser
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class Results(object):
+    """Results class keeps statistics for every benchmark case, saves them
+    as JSON and compares them against a saved baseline.
+
+    Suites timing repeated calls compare the fastest sample, which is the
+    least affected by noise; suites timing a distribution of inputs compare
+    the median latency.
+    """
+
+    def __init__(self, suite, metric=METRIC):
+        self.suite = suite
+        self.metric = metric
+        self.cases = OrderedDict()
+
+    def add(self, name, stats, **params):
+        """Adds statistics for a case and displays them.
+        """
+        entry = OrderedDict(stats)
+        if params:
+            entry['params'] = params
+        self.cases[name] = entry
+        print('{0:<56} p50={1:10.3f}us p99={2:10.3f}us min={3:10.3f}us'.format(
+            name, stats['p50'] * 1e6, stats['p99'] * 1e6, stats['min'] * 1e6))
+        return entry
+
+    def to_dict(self):
+        return OrderedDict((('version', RESULTS_VERSION),
+                            ('suite', self.suite),
+                            ('metric', self.metric),
+                            ('python', sys.version.split()[0]),
+                            ('platform', platform.platform()),
+                            ('timestamp', time.time()),
+                            ('cases', self.cases)))
+
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def compare(self, baseline, threshold=THRESHOLD, metric=None):
+        """Compares results against baseline results.
+
+        Returns a list with name, baseline value, current value and ratio
+        for every case slower than the baseline by more than the threshold.
+        Cases not present in both results are skipped.
+        """
+        metric = metric or self.metric
+        regressions = []
+        for name, entry in self.cases.items():
+            base = baseline.get('cases', {}).get(name, None)
+            if base is None or not base.get(metric, None):
+                continue
+            ratio = entry[metric] / base[metric]
+            if ratio > 1 + threshold:
+                regressions.append((name, base[metric], entry[metric], ratio))
+        return regressions
+
+
+# -----------------------------------------------------------------------------
+#
+def load_results(filename):
+    """Loads results saved as JSON.
+    """
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def finish(args, results):
+    """Saves results and compares them against the baseline, if those
+    options were given.
+
+    Returns the exit status: 1 if any regression was found, 0 else.
+    """
+    if args.output:
+        results.save(args.output)
+        print('results saved in {}'.format(args.output))
+    if not args.baseline:
+        return 0
+    regressions = results.compare(load_results(args.baseline), args.threshold, args.metric)
+    for name, base, current, ratio in regressions:
+        print('REGRESSION {0:<45} {1:10.3f}us -> {2:10.3f}us ({3:+.1f}%)'.format(
+            name, base * 1e6, current * 1e6, (ratio - 1) * 100))
+    if not regressions:
+        print('no regressions against {0} (threshold {1:.0f}%)'.format(args.baseline, args.threshold * 100))
+    return 1 if regressions else 0
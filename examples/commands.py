@@ -115,7 +115,12 @@ class CliCommands(Cli):
 
     def __init__(self):
         super(CliCommands, self).__init__()
-        self.journal.set_to_cache('tenants', ["COMMON", "COMMONALITY", "COMMONWARE", "COMMUT"])
+        self.journal.set_cache_loader('tenants', self.load_tenants, ttl=30)
+
+    def load_tenants(self):
+        """Loads tenants used for completion.
+        """
+        return ["COMMON", "COMMONALITY", "COMMONWARE", "COMMUT"]
 
     @Cli.command('the-cli')
     def do_cli(self, line):
@@ -9,6 +9,12 @@ __docformat__ = 'restructuredtext en'
 #             |_|
 # -----------------------------------------------------------------------------
 #
+import asyncio
+import threading
+import importlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, CancelledError
+from jc2li.completion import CompletionIndex
 import jc2li.loggerator as loggerator
 
 
@@ -24,6 +30,76 @@ import jc2li.loggerator as loggerator
 MODULE = 'CLI.argtypes'
 logger = loggerator.getLoggerator(MODULE)
 
+COMPLETE_DEADLINE = 0.05
+COMPLETE_WORKERS = 4
+
+# Containers for values entered many times for a numeric argument.
+ARRAY_CONTAINER = 'array'
+NUMPY_CONTAINER = 'numpy'
+CONTAINERS = (ARRAY_CONTAINER, NUMPY_CONTAINER)
+
+_complete_executor = None
+_numpy = None
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def get_complete_executor():
+    """Returns the executor used to fetch completion lists off-thread.
+
+    Returns:
+        ThreadPoolExecutor : executor shared by all completion sources.
+    """
+    global _complete_executor
+    if _complete_executor is None:
+        _complete_executor = ThreadPoolExecutor(max_workers=COMPLETE_WORKERS)
+    return _complete_executor
+
+
+def typed_buffer(container, typecode, values):
+    """Returns a typed buffer for the container with the given values, which
+    is allocated once for all of them.
+
+    Args:
+        container (str) : "array" or "numpy" container.
+
+        typecode (str) : array module typecode for values in the buffer.
+
+        values (list) : List with values to store in the buffer.
+
+    Returns:
+        object : array or numpy array with the values.
+    """
+    if container == ARRAY_CONTAINER:
+        if isinstance(values, array) and values.typecode == typecode:
+            return values
+        return array(typecode, values)
+    numpy = get_numpy()
+    return numpy.asarray(values, dtype=typecode)
+
+
+def get_numpy():
+    """Returns the numpy module, which is imported the first time it is
+    required, so it does not add to the CLI startup time.
+
+    Returns:
+        module : numpy module.
+
+    Raises:
+        ImportError : numpy is not installed.
+    """
+    global _numpy
+    if _numpy is None:
+        _numpy = importlib.import_module('numpy')
+    return _numpy
+
 
 # -----------------------------------------------------------------------------
 #       _                     _       __ _       _ _   _
@@ -36,8 +112,19 @@ logger = loggerator.getLoggerator(MODULE)
 #
 class CliType(object):
     """CliType class is the base class for any command argument.
+
+    Attributes:
+        CACHE_HELP (bool) : True if the help does not depend on the text\
+                entered, so the completer can cache it. Derived classes\
+                with a help that depends on the text should set it to False.
+
+        TYPECODE (str) : array module typecode for typed values, None if\
+                values can not be stored in an array container.
     """
 
+    CACHE_HELP = True
+    TYPECODE = None
+
     def __init__(self, **kwargs):
         """CliType class initialization method.
 
@@ -49,6 +136,15 @@ class CliType(object):
         """
         self.argo = kwargs.get('argo', None)
         self.label = kwargs.get('label', None)
+        container = getattr(self.argo, 'container', None)
+        if container is not None:
+            if container not in CONTAINERS:
+                raise ValueError('{0}: unknown container {1}'.format(self.argo.name, container))
+            if self.argo.type.TYPECODE is None:
+                raise ValueError('{0}: {1} values can not be stored in a container'.format(
+                    self.argo.name, self.argo.type.__name__))
+            if container == NUMPY_CONTAINER:
+                get_numpy()
 
     @property
     def journal(self):
@@ -71,7 +167,9 @@ class CliType(object):
         Returns:
             None
         """
-        if matched:
+        if self.argo.container is not None:
+            self._store_in_container([value], matched)
+        elif matched:
             if type(self.argo.value) == list:
                 self.argo.value.append(value)
             else:
@@ -79,6 +177,74 @@ class CliType(object):
         else:
             self.argo.value = value
 
+    def _store_in_container(self, values, matched):
+        """Stores a list of values in the argument container.
+
+        Typed buffers returned by the _many method for the container are
+        stored without being converted again.
+
+        Args:
+            values (list) : List or typed buffer with values to store in the\
+                    argument.
+
+            matched (bool) : True is argument was already matched and found\
+                    in the command line entry.
+
+        Returns:
+            None
+        """
+        container = self.argo.container
+        typecode = self.argo.type.TYPECODE
+        if container == ARRAY_CONTAINER and matched:
+            # Extending with an array of the same typecode is a memory copy.
+            self.argo.value.extend(values)
+            return
+        new_values = typed_buffer(container, typecode, values)
+        if matched:
+            numpy = get_numpy()
+            self.argo.value = numpy.concatenate((self.argo.value, new_values))
+        else:
+            self.argo.value = new_values
+
+    def store_many(self, values, matched=False):
+        """Stores a list of values in the argument for the type, as if every
+        value were stored in order with the store method.
+
+        Derived classes overriding the store method have every value stored
+        with it, so they do not need to override this method.
+
+        A list of values is stored without a copy, so callers hand it over to
+        the argument, like the list returned by the _many method.
+
+        Args:
+            values (list) : List with values to store in the argument, or a\
+                    typed buffer for arguments with a container.
+
+            matched (bool) : True is argument was already matched and found\
+                    in the command line entry.
+
+        Returns:
+            None
+        """
+        if self.argo.container is not None:
+            self._store_in_container(values, matched)
+        elif type(self).store is not CliType.store:
+            for value in values:
+                self.store(value, matched)
+                matched = True
+        elif not values:
+            return
+        elif matched:
+            if type(self.argo.value) == list:
+                self.argo.value.extend(values)
+            else:
+                self.argo.value = [self.argo.value]
+                self.argo.value.extend(values)
+        elif len(values) == 1:
+            self.argo.value = values[0]
+        else:
+            self.argo.value = values if isinstance(values, list) else list(values)
+
     @staticmethod
     def _(val):
         """Method that types any value as Tenant.
@@ -91,6 +257,28 @@ class CliType(object):
         """
         return str(val)
 
+    @classmethod
+    def _many(cls, vals, container=None):
+        """Method that types a list of values, with the _ method.
+
+        Derived classes can override it with a faster conversion for many
+        values, used for arguments entered many times in a loop.
+
+        Args:
+            vals (list): list with values to be typed.
+
+            container (str) : "array" or "numpy" to return the typed values\
+                    in a typed buffer for the argument container.
+
+        Returns:
+            list : List with the typed values, or the typed buffer when a\
+                    container is given.
+        """
+        values = list(map(cls._, vals))
+        if container is None:
+            return values
+        return typed_buffer(container, cls.TYPECODE, values)
+
     def _help_str(self):
         """Method that should return default string to be displayed as help.
 
@@ -120,7 +308,8 @@ class CliType(object):
             text (str): last token in the line being entered.
 
         Returns:
-            list : list with possible complete options
+            list : list with possible complete options. It can be a\
+                    CompletionIndex instance for large lists.
         """
         return None
 
@@ -137,6 +326,8 @@ class CliType(object):
             str : string with completion to send to the display.
         """
         options = self.get_complete_list(document, text)
+        if isinstance(options, CompletionIndex):
+            return options.complete(text)
         if options:
             if text in [' ', '']:
                 return [x for x in options]
@@ -154,6 +345,136 @@ class CliType(object):
         return str
 
 
+# -----------------------------------------------------------------------------
+#
+class AsyncCliType(CliType):
+    """AsyncCliType class is the base class for any argument which completion
+    list comes from a slow source, like a database or a remote inventory.
+
+    Derived classes implement :meth:`fetch_complete_list`, which can block or
+    be a coroutine function. It is called in a worker thread, and the
+    completer waits for it only until the deadline expires. When the deadline
+    expires, the last list fetched is used only if it was fetched for the
+    same text, else there is no completion. A fetch that finishes after the
+    deadline keeps its list for the next completion of the same text, the
+    prompt is not refreshed. Every new keystroke cancels any fetch not
+    started yet, and running fetches can check :meth:`is_stale` to finish
+    early.
+
+    prompt_toolkit already calls the completer in its own thread, so the
+    prompt is never blocked for longer than the deadline.
+    """
+
+    def __init__(self, **kwargs):
+        """AsyncCliType class initialization method.
+
+        Keyword Args:
+            deadline (float) : Seconds to wait for a fetch to finish.
+        """
+        super(AsyncCliType, self).__init__(**kwargs)
+        self.deadline = kwargs.get('deadline', COMPLETE_DEADLINE)
+        self._options = (None, None)
+        self._generation = 0
+        self._future = None
+        self._lock = threading.Lock()
+
+    def fetch_complete_list(self, document, text):
+        """Fetches a list with all possible options to be included in
+        complete.
+
+        Args:
+            document (object) : document object with all command line
+            input data.
+
+            text (str): last token in the line being entered.
+
+        Returns:
+            list : list with possible complete options
+        """
+        return None
+
+    def is_stale(self, generation):
+        """Returns if a fetch is stale, because a newer one was requested.
+
+        Args:
+            generation (int) : generation number for the fetch.
+
+        Returns:
+            bool : True if the fetch is stale, False else.
+        """
+        return generation != self._generation
+
+    def _fetch(self, generation, document, text):
+        """Internal method that runs the fetch in a worker thread.
+
+        Args:
+            generation (int) : generation number for the fetch.
+
+            document (object) : document object with all command line
+            input data.
+
+            text (str): last token in the line being entered.
+
+        Returns:
+            list : list with possible complete options
+        """
+        if self.is_stale(generation):
+            return None
+        options = self.fetch_complete_list(document, text)
+        if asyncio.iscoroutine(options):
+            loop = asyncio.new_event_loop()
+            try:
+                options = loop.run_until_complete(options)
+            finally:
+                loop.close()
+        if options is not None and not self.is_stale(generation):
+            self._options = (text, options)
+        return options
+
+    def _last_options(self, text):
+        """Internal method that returns the last list fetched, only if it was
+        fetched for the given text.
+
+        Args:
+            text (str): last token in the line being entered.
+
+        Returns:
+            list : list with possible complete options, None if the last\
+                    list was fetched for a different text.
+        """
+        fetched, options = self._options
+        return options if fetched == text else None
+
+    def get_complete_list(self, document, text):
+        """Gets a list with all possible options to be included in complete.
+
+        Args:
+            document (object) : document object with all command line
+            input data.
+
+            text (str): last token in the line being entered.
+
+        Returns:
+            list : list with possible complete options, or last list fetched\
+                    for the same text if the fetch does not finish before\
+                    the deadline, None if there is not such list.
+        """
+        with self._lock:
+            self._generation += 1
+            if self._future is not None:
+                self._future.cancel()
+            self._future = get_complete_executor().submit(self._fetch, self._generation, document, text)
+            future = self._future
+        try:
+            options = future.result(timeout=self.deadline)
+        except (TimeoutError, CancelledError):
+            return self._last_options(text)
+        except Exception as ex:
+            logger.error('Fetching complete list failed: {}'.format(ex))
+            return self._last_options(text)
+        return options if options is not None else self._last_options(text)
+
+
 # -----------------------------------------------------------------------------
 #
 class Prefix(CliType):
@@ -243,8 +564,12 @@ class Prefix(CliType):
 #
 class Int(CliType):
     """Int class is the class for any integer argument.
+
+    Values can be stored in 64 bit signed integer containers.
     """
 
+    TYPECODE = 'q'
+
     @staticmethod
     def _(val):
         """Method that types any value as integer.
@@ -257,6 +582,36 @@ class Int(CliType):
         """
         return int(val)
 
+    @classmethod
+    def _many(cls, vals, container=None):
+        """Method that types a list of values as integers.
+
+        Values for a container are converted in bulk into a typed buffer
+        allocated once for all of them: numpy reads them straight from the
+        iterator into a buffer with the final size, and array is created
+        from a list with the final length, so neither grows while filled.
+
+        Args:
+            vals (list): list with values to be typed as integers.
+
+            container (str) : "array" or "numpy" to return the typed values\
+                    in a typed buffer for the argument container.
+
+        Returns:
+            list : List with the typed values, or the typed buffer when a\
+                    container is given.
+        """
+        # Derived classes with their own _ method type every value with it.
+        if cls._ is not Int._:
+            return super(Int, cls)._many(vals, container)
+        if container == NUMPY_CONTAINER:
+            numpy = get_numpy()
+            return numpy.fromiter(map(int, vals), dtype=cls.TYPECODE, count=len(vals))
+        values = list(map(int, vals))
+        if container == ARRAY_CONTAINER:
+            return array(cls.TYPECODE, values)
+        return values
+
     def _help_str(self):
         """Method that should return default string to be displayed as help.
 
@@ -1,3 +1,4 @@
+import threading
 from collections import OrderedDict
 
 
@@ -24,6 +25,9 @@ class Argument(object):
             completer (object) : Argument completer instance.
             completer_kwargs (:class:`dict`) : Dictionary with\
                     completer arguments
+            container (str) : Container for values entered in the command\
+                    line for a numeric argument: "array" for array.array\
+                    or "numpy" for a NumPy array, None for plain values.
 
         Returns:
             None
@@ -32,6 +36,7 @@ class Argument(object):
         self.type = argtype
         self.default = kwargs.get('default', None)
         self.value = kwargs.get('default', None)
+        self.container = kwargs.get('container', None)
         completer_class = kwargs.get('completer', None)
         completer_kwargs = kwargs.get('completer_kwargs', {})
         if completer_class:
@@ -50,6 +55,10 @@ class Arguments(object):
     It basically contains two lists, _arguments with an ordered list for the
     every argument being entered, and indexed a list indexed by the attribute
     name for fast searching.
+
+    Argument values are shared by every execution of the command, so lock
+    has to be held while values are being mapped, when the command can run
+    in several threads.
     """
 
     def __init__(self):
@@ -60,6 +69,7 @@ class Arguments(object):
         """
         self.arguments = []
         self.indexed = None
+        self.lock = threading.RLock()
 
     def traverse(self):
         """Returns the list with all arguments.
@@ -14,17 +14,26 @@ from functools import wraps, partial
 import sys
 import inspect
 import json
+import time
+import asyncio
+import threading
 # import shlex
 import jc2li.loggerator as loggerator
-from prompt_toolkit import prompt
-from prompt_toolkit.history import FileHistory
-from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+import jc2li.tokenizer as tokenizer
 from prompt_toolkit.completion import Completer, Completion
 # from prompt_toolkit.validation import Validator, ValidationError
 from prompt_toolkit.token import Token
 from prompt_toolkit.styles import style_from_dict
-from jc2li.common import TREE_ATTR, SYNTAX_ATTR, ARGOS_ATTR
-from jc2li.journal import Journal
+from jc2li.common import SYNTAX_ATTR, ARGOS_ATTR
+from jc2li.journal import Journal, get_command_tree
+from jc2li.jobs import Jobs
+from jc2li.recording import Recording
+from jc2li.completion import RankedMatcher, usage_from_history
+from jc2li.history import LazyFileHistory, AutoSuggestFromIndex
+from jc2li.session import CliSession
+from jc2li.metrics import Metrics
+from jc2li.tracing import Tracer, CALLBACK_FINISHED, OUTPUT_FLUSHED
+from jc2li.profiler import SamplingProfiler
 
 
 # -----------------------------------------------------------------------------
@@ -59,9 +68,35 @@ class CliBase(object):
 
         CLI_STYLE (:any:`dict`) : Dictionary with default styles to be used in the\
                 command line.
+
+        RECORDING_FILE (str) : Filename for the log with recorded commands,\
+                None to record in a temporary log for every CLI instance.
+
+        RECORDING_RESUME (bool) : True if records already in the log file\
+                are loaded when the CLI starts, False if the log is\
+                truncated.
+
+        HISTORY_FILE (str) : Filename for the command line history.
+
+        RANKED_COMPLETION (bool) : True if command labels are completed with\
+                a ranked matcher, which accepts partial and misspelled labels\
+                and prefers recently used ones.
+
+        REFRESH_INTERVAL (float) : Seconds between every prompt refresh, 0\
+                to redraw the prompt only when the input or the toolbar\
+                changes.
+
+        METRICS (bool) : True if execution metrics are collected for every\
+                command, available in the metrics attribute.
     """
 
     _WALL = {}
+    RECORDING_FILE = None
+    RECORDING_RESUME = False
+    HISTORY_FILE = 'history.txt'
+    RANKED_COMPLETION = False
+    REFRESH_INTERVAL = 0
+    METRICS = True
     CLI_STYLE = style_from_dict({Token.Toolbar: '#ffffff italic bg:#007777',
                                  Token.RPrompt: 'bg:#ff0066 #ffffff', })
     __MODES = []
@@ -80,6 +115,53 @@ class CliBase(object):
             """
             self._nodepath = None
             self._cli = cli
+            self._toolbars = {}
+
+        @staticmethod
+        def _token_class(text):
+            """Returns the class for the last token entered.
+
+            Args:
+                text (str) : Last token in the line being entered.
+
+            Returns:
+                str : Token class: blank, option or word.
+            """
+            if not text.strip():
+                return 'blank'
+            return 'option' if text.startswith('-') else 'word'
+
+        def _get_toolbar(self, node, children_nodes, text):
+            """Returns the toolbar with the help for all children nodes.
+
+            The toolbar is cached for every node and token class, unless any
+            child type has a help depending on the text entered.
+
+            Args:
+                node (Node) : Node which children are being completed.
+
+                children_nodes (list) : List with children nodes.
+
+                text (str) : Last token in the line being entered.
+
+            Returns:
+                str : String with the toolbar.
+            """
+            key = (id(node), self._token_class(text))
+            toolbar = self._toolbars.get(key, None)
+            if toolbar is None:
+                toolbar = " | ".join(c.completer.help(text) for c in children_nodes)
+                if all(c.completer.CACHE_HELP for c in children_nodes):
+                    self._toolbars[key] = toolbar
+            return toolbar
+
+        def reset(self):
+            """Resets the node path found for the previous input.
+
+            Returns:
+                None
+            """
+            self._nodepath = None
 
         def get_completions(self, document, complete_event):
             """Method that provides completion for any input in the command line.
@@ -94,23 +176,25 @@ class CliBase(object):
             # self._nodepath = None
             word_before_cursor = document.get_word_before_cursor(WORD=True)
             if ' ' not in document.text:
-                matches = [m for m in self._cli.commands if m.startswith(word_before_cursor)]
+                if self._cli.RANKED_COMPLETION:
+                    matches = self._cli.get_command_matcher().complete(word_before_cursor)
+                else:
+                    matches = [m for m in self._cli.commands if m.startswith(word_before_cursor)]
                 for m in matches:
                     yield Completion(m, start_position=-len(word_before_cursor))
             else:
-                line_as_list = document.text.split()
-                if len(line_as_list) == 0:
+                cmdlabel, line, _ = tokenizer.split_command(document.text)
+                if cmdlabel is None:
                     return
-                last_token = line_as_list[-1] if document.text[-1] != ' ' else ' '
-                cmdlabel = line_as_list[0]
+                last_token = document.text.rsplit(None, 1)[-1] if document.text[-1] != ' ' else ' '
                 command = self._cli.get_command_cb(cmdlabel)
                 if command is not None:
                     # Required for partial methods
                     if hasattr(command, 'func'):
                         command = command.func
-                    root = getattr(command, TREE_ATTR, None)
+                    root = get_command_tree(command)
                     journal = self._cli.journal
-                    _, cli_argos = journal.get_cmd_and_cli_args(command, None, " ".join(line_as_list[1:]))
+                    _, cli_argos = journal.get_cmd_and_cli_args(command, None, line)
                     nodepath = None
                     children_nodes = None
                     try:
@@ -129,15 +213,16 @@ class CliBase(object):
 
                     if self._nodepath:
                         # Get children from the path found or the the last path
-                        children_nodes = self._nodepath[-1].get_children_nodes() if self._nodepath[-1] else None
+                        node = self._nodepath[-1]
+                        children_nodes = node.get_children_nodes() if node else None
                     else:
                         # if there was not path or any last path, get children
                         # from the root.
+                        node = root
                         children_nodes = root.get_children_nodes()
 
                     if children_nodes:
-                        helps = [c.completer.help(last_token) for c in children_nodes]
-                        self._cli.toolbar_str = " | ".join(helps)
+                        self._cli.set_toolbar(self._get_toolbar(node, children_nodes, last_token))
                         for child in children_nodes:
                             LOGGER.debug('child is: {0}'.format(child.label))
                             matches = child.completer.complete(document, last_token)
@@ -150,7 +235,7 @@ class CliBase(object):
                     # TODO: Trace and debug information to be removed or optimized.
                     LOGGER.debug('completer command: {0}'.format(command))
                     LOGGER.debug('document text is "{}"'.format(document.text))
-                    LOGGER.debug('last document text is [{}]'.format(line_as_list[-1]))
+                    LOGGER.debug('last document text is [{}]'.format(last_token))
                     LOGGER.debug('children nodes are {}'.format(children_nodes))
                     if children_nodes:
                         LOGGER.debug('children nodes are {}'.format([x.name for x in children_nodes]))
@@ -170,10 +255,50 @@ class CliBase(object):
         self.rprompt_str = ''
         self.prompt_str = "> "
         self.__commands = {}
+        self.__matcher = None
+        self.__history = None
+        self.__session = None
         self.journal = Journal()
+        self.catalog = None
+        self.jobs = Jobs()
+        self.metrics = Metrics(enabled=self.METRICS)
+        self.tracer = Tracer()
+        self.profiler = SamplingProfiler()
         self.setup_commands()
         self.__recording = False
-        self.__record_data = []
+        self.__record_log = Recording(self.RECORDING_FILE, resume=self.RECORDING_RESUME)
+        self.__loops = threading.local()
+
+    @property
+    def loop(self):
+        """Get property that returns the event loop owned by the CLI.
+
+        The loop is created the first time it is required, and it is used to
+        run any command defined as a coroutine function. Every thread
+        executing commands gets its own loop.
+
+        Returns:
+            :class:`asyncio.AbstractEventLoop` : CLI event loop.
+        """
+        loop = getattr(self.__loops, 'loop', None)
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            self.__loops.loop = loop
+        return loop
+
+    def run_coroutine(self, coro):
+        """Runs the given coroutine in the CLI event loop until it finishes.
+
+        This method can not be called when the CLI event loop is already
+        running, use await in that case.
+
+        Args:
+            coro (coroutine) : Coroutine to run.
+
+        Returns:
+            object : value returned by the coroutine.
+        """
+        return self.loop.run_until_complete(coro)
 
     @property
     def commands(self):
@@ -184,6 +309,71 @@ class CliBase(object):
         """
         return self.__commands.keys()
 
+    def get_command_matcher(self):
+        """Returns the ranked matcher for command labels.
+
+        The matcher is built the first time it is required, with recent usage
+        loaded from the history file, and it is built again if any command is
+        added.
+
+        Returns:
+            RankedMatcher : Matcher for all command labels.
+        """
+        if self.__matcher is None:
+            usage = usage_from_history(self.history, first_only=True)
+            self.__matcher = RankedMatcher(self.commands, usage=usage)
+        return self.__matcher
+
+    @property
+    def history(self):
+        """Get property that returns the command line history.
+
+        The history file is not read until entries are required.
+
+        Returns:
+            LazyFileHistory : History instance.
+        """
+        if self.__history is None:
+            self.__history = LazyFileHistory(self.HISTORY_FILE)
+        return self.__history
+
+    @property
+    def session(self):
+        """Get property that returns the prompt session.
+
+        The session, with the history, auto-suggest and completer, is built
+        the first time it is required and reused for every prompt.
+
+        Returns:
+            CliSession : Prompt session instance.
+        """
+        if self.__session is None:
+            self.__session = CliSession(history=self.history,
+                                        auto_suggest=AutoSuggestFromIndex(self.history.index),
+                                        completer=CliBase.CliCompleter(self),
+                                        # lexer=SqlLexer,
+                                        get_bottom_toolbar_tokens=self.get_bottom_toolbar_tokens,
+                                        get_rprompt_tokens=self.get_rprompt_tokens,
+                                        get_prompt_tokens=self.get_prompt_tokens,
+                                        style=self.CLI_STYLE,
+                                        # validator=CliValidator(),
+                                        refresh_interval=self.REFRESH_INTERVAL)
+        return self.__session
+
+    def set_toolbar(self, toolbar):
+        """Sets the toolbar value, and redraws the prompt if it changed.
+
+        Args:
+            toolbar (str) : String with the toolbar value.
+
+        Returns:
+            None
+        """
+        if toolbar != self.toolbar_str:
+            self.toolbar_str = toolbar
+            if self.__session is not None:
+                self.__session.invalidate()
+
     @property
     def mode_stack(self):
         return CliBase.__MODES
@@ -237,6 +427,7 @@ class CliBase(object):
         if self.is_command(command):
             LOGGER.warning('[{}] Command [{}] already present.'.format(MODULE, command))
         self.__commands[command] = (command_cb, desc)
+        self.__matcher = None
 
         # At this point, inject the context in every argument attributes using
         # command_cb.func._arguments._arguments[#].completer. That should work
@@ -252,7 +443,8 @@ class CliBase(object):
 
         Args:
             command (str) : Command label for the command to execute.
-            user_input (str) : String with the command line input.
+            user_input (str) : String with the command line input, a\
+                    TokenLine keeps its tokens for the command parsing.
 
         Returns:
             object : value returned by the command callback.
@@ -261,6 +453,23 @@ class CliBase(object):
         if command_cb:
             return command_cb(user_input)
 
+    def exec_command_in_background(self, command, user_input):
+        """Executes the command callback for the given command label in a
+        background job.
+
+        Args:
+            command (str) : Command label for the command to execute.
+            user_input (str) : String with the command line input, a\
+                    TokenLine keeps its tokens for the command parsing.
+
+        Returns:
+            Job : job running the command.
+        """
+        line = '{0} {1}'.format(command, user_input).strip()
+        job = self.jobs.start(line, partial(self.exec_command, command, user_input))
+        LOGGER.display('[{0}] {1}'.format(job.jid, line))
+        return job
+
     def empty_line(self):
         """Method that don't provide any action when <CR> is entered in an
         empty line.
@@ -374,8 +583,8 @@ class CliBase(object):
             LOGGER.debug('{0}::setup_commands add command {1}::{2}'.format(classname, name, func_cb))
             self.add_command(name, partial(func_cb, self), desc)
 
-    def run_prompt(self, **kwargs):
-        """Execute the command line.
+    def _set_prompt_values(self, **kwargs):
+        """Sets prompt, toolbar and right prompt values for the next prompt.
 
         Args:
             prompt (:any:`str` or :any:`function`) : string or callback with prompt value
@@ -385,7 +594,7 @@ class CliBase(object):
             rprompt (:any:`str` or :any:`function`) : string or callback with right prompt value.
 
         Returns:
-            str : String with the input entered by the user.
+            None
         """
         toolbar = kwargs.get('toolbar', 'Enter a valid command')
         self.toolbar_str = toolbar if isinstance(toolbar, str) else toolbar()
@@ -396,19 +605,53 @@ class CliBase(object):
         rprompt = kwargs.get('rprompt', None)
         if rprompt is not None:
             self.rprompt_str = rprompt if isinstance(rprompt, str) else rprompt()
+        self.session.completer.reset()
+
+    def run_prompt(self, **kwargs):
+        """Execute the command line.
+
+        Args:
+            prompt (:any:`str` or :any:`function`) : string or callback with prompt value
+
+            toolbar (:any:`str` or :any:`function`) : string or callback with toolbar value.
 
-        user_input = prompt(history=FileHistory('history.txt'),
-                            auto_suggest=AutoSuggestFromHistory(),
-                            completer=CliBase.CliCompleter(self),
-                            # lexer=SqlLexer,
-                            get_bottom_toolbar_tokens=self.get_bottom_toolbar_tokens,
-                            get_rprompt_tokens=self.get_rprompt_tokens,
-                            get_prompt_tokens=self.get_prompt_tokens,
-                            style=self.CLI_STYLE,
-                            # validator=CliValidator(),
-                            refresh_interval=1)
+            rprompt (:any:`str` or :any:`function`) : string or callback with right prompt value.
+
+        Returns:
+            str : String with the input entered by the user.
+        """
+        self._set_prompt_values(**kwargs)
+        user_input = self.session.prompt()
+        return user_input
+
+    async def run_prompt_async(self, **kwargs):
+        """Execute the command line without blocking the CLI event loop.
+
+        Any task running in the CLI event loop keeps running while the user
+        is entering the input, and its output is displayed above the prompt.
+
+        Args:
+            prompt (:any:`str` or :any:`function`) : string or callback with prompt value
+
+            toolbar (:any:`str` or :any:`function`) : string or callback with toolbar value.
+
+            rprompt (:any:`str` or :any:`function`) : string or callback with right prompt value.
+
+        Returns:
+            str : String with the input entered by the user.
+        """
+        self._set_prompt_values(**kwargs)
+        user_input = await self.session.prompt_async()
         return user_input
 
+    def is_recording(self):
+        """Returns if commands are being recorded.
+
+        Returns:
+            bool : True if commands are being recorded, False else.
+        """
+        return self.__recording
+
     def start_recording(self):
         """Starts recording commands input in the command line.
 
@@ -424,8 +667,7 @@ class CliBase(object):
             None
         """
         self.__recording = False
-        if self.__record_data:
-            del self.__record_data[-1]
+        self.__record_log.sync()
 
     def clear_recording(self, from_record=None, to_record=None):
         """Clears the range of records recorded from the given range.
@@ -435,24 +677,14 @@ class CliBase(object):
 
             to_record (int): Last record to clear. Set to last if None
         """
-        if from_record is None and to_record is None:
-            self.__record_data.clear()
-        elif from_record is None and to_record is not None:
-            if to_record < len(self.__record_data):
-                del self.__record_data[:to_record + 1]
-        elif from_record is not None and to_record is None:
-            if 0 <= from_record <= len(self.__record_data):
-                del self.__record_data[from_record:]
-        elif (0 <= from_record <= len(self.__record_data)) and\
-                to_record < len(self.__record_data) and\
-                from_record <= to_record:
-                del self.__record_data[from_record:to_record + 1]
-        else:
-            pass
+        self.__record_log.clear(from_record, to_record)
 
     def select_recording(self, from_record=None, to_record=None):
         """Selects the range of records recorded from the given range.
 
+        Records are read from the recording log, so only the selected range
+        is loaded in memory.
+
         Args:
             from_record (int) : First record to select. Set to 0 if None.
 
@@ -461,20 +693,22 @@ class CliBase(object):
         Returns:
             list : List of selected records.
         """
-        if from_record is None and to_record is None:
-            return self.__record_data
-        elif from_record is None and to_record is not None:
-            if to_record < len(self.__record_data):
-                return self.__record_data[:to_record + 1]
-        elif from_record is not None and to_record is None:
-            if 0 <= from_record <= len(self.__record_data):
-                return self.__record_data[from_record:]
-        elif (0 <= from_record <= len(self.__record_data)) and\
-                to_record < len(self.__record_data) and\
-                from_record < to_record:
-                return self.__record_data[from_record:to_record + 1]
-        else:
-            return []
+        return [record['command'] for record in self.__record_log.traverse(from_record, to_record)]
+
+    def select_recording_entries(self, from_record=None, to_record=None):
+        """Selects the range of records, with all timing metadata, recorded
+        from the given range.
+
+        Args:
+            from_record (int) : First record to select. Set to 0 if None.
+
+            to_record (int): Last record to select. Set to last if None
+
+        Returns:
+            list : List of dictionaries with command, timestamp, duration\
+                    and status for every selected record.
+        """
+        return self.__record_log.select(from_record, to_record)
 
     def display_recording(self, from_record=None, to_record=None):
         """Displays the range of records recorded from the given range.
@@ -487,38 +721,89 @@ class CliBase(object):
         Returns:
             None
         """
-        records = self.select_recording(from_record, to_record)
+        records = self.__record_log.traverse(from_record, to_record)
         for i, record in enumerate(records):
-            LOGGER.display('{0}: {1}'.format(i, record))
+            LOGGER.display('{0}: {1}'.format(i, record['command']))
 
     def save_recording(self, filename, from_record=None, to_record=None):
-        """
-        """
-        records = self.select_recording(from_record, to_record)
-        to_save = []
-        for record in records:
-            to_save.append({'command': record})
-        if to_save:
-            with open(filename, 'w') as f:
-                json.dump(to_save, f)
-
-    def record_command(self, user_input):
         """Saves in a JSON file the range of records recorded from the given
         range.
 
+        Records are streamed from the recording log to the file, including
+        timing metadata, so the file can be used by the replay engine.
+
         Args:
+            filename (str) : String with the file to save records.
+
             from_record (int) : First record to save. Set to 0 if None.
 
             to_record (int): Last record to save. Set to last if None
 
+        Returns:
+            None
+        """
+        records = self.__record_log.traverse(from_record, to_record)
+        first = next(records, None)
+        if first is None:
+            return
+        with open(filename, 'w') as f:
+            f.write('[{}'.format(json.dumps(first)))
+            for record in records:
+                f.write(', {}'.format(json.dumps(record)))
+            f.write(']')
+
+    def record_command(self, user_input, **kwargs):
+        """Records the command entered when recording is running.
+
+        Args:
+            user_input (str) : String with the input entered by the user.
+
+        Keyword Args:
+            timestamp (float) : Time when the command started.
+
+            duration (float) : Seconds the command took to execute.
+
+            status (str) : Command result: "ok", "error" or "background".
+
+            error (str) : Error message when the command failed.
+
         Returns:
             None
         """
         if self.__recording:
-            self.__record_data.append(user_input)
+            record = {'command': user_input,
+                      'timestamp': kwargs.get('timestamp', time.time()),
+                      'duration': kwargs.get('duration', 0.0),
+                      'status': kwargs.get('status', 'ok')}
+            if 'error' in kwargs:
+                record['error'] = kwargs['error']
+            self.__record_log.append(record)
 
-    def exec_user_input(self, user_input, **kwargs):
-        """Executes the string with the user input.
+    def _end_trace(self, tracer, error=None):
+        """Reports the command callback finished and its output flushed.
+
+        Args:
+            tracer (Tracer) : CLI tracer.
+
+            error (Exception) : Exception raised by the command, if any.
+
+        Returns:
+            None
+        """
+        if error is None:
+            tracer.emit(CALLBACK_FINISHED, status='ok')
+        else:
+            tracer.emit(CALLBACK_FINISHED, status='error', error=str(error))
+        sys.stdout.flush()
+        tracer.emit(OUTPUT_FLUSHED)
+        tracer.end()
+
+    def _exec_user_input_steps(self, user_input, **kwargs):
+        """Generator with all steps required to execute the user input.
+
+        The value returned by the command callback is yielded, so the caller
+        can resolve it (awaiting it when the command is a coroutine function)
+        and send the final value back to the generator.
 
         Args:
             user_input (str) : String with the input entered by the user.
@@ -535,18 +820,54 @@ class CliBase(object):
         cb_return = True
         post_return = True
         if user_input:
-            line_as_list = user_input.split()
-            if len(line_as_list) == 0:
+            # The line is split once, arguments keep their tokens while the
+            # command is parsed. A last "&" token runs the command in
+            # a background job.
+            command, line, background = tokenizer.split_command(user_input)
+            if command is None:
                 return True
-            command = line_as_list[0]
             if self.is_command(command):
+                if self.__matcher is not None:
+                    self.__matcher.touch(command)
                 if kwargs.get('precmd', False):
                     pre_return = self.precmd(command, user_input)
                 # precmd callback return value can be used to skip command
                 # of it returns False.
-                if pre_return:
-                    self.record_command(user_input)
-                    cb_return = self.exec_command(command, ' '.join(line_as_list[1:]))
+                # Commands are recorded once they finish, only if recording
+                # was running before and after the command.
+                recording = self.is_recording()
+                if pre_return and background:
+                    if recording:
+                        self.record_command(user_input, status='background')
+                    self.exec_command_in_background(command, line)
+                elif pre_return:
+                    metrics = self.metrics if self.metrics.enabled else None
+                    if metrics is not None:
+                        metrics.begin()
+                    tracer = self.tracer if self.tracer.active else None
+                    if tracer is not None:
+                        tracer.begin(command, user_input)
+                    timestamp = time.time()
+                    start = time.perf_counter()
+                    try:
+                        cb_return = yield self.exec_command(command, line)
+                    except Exception as ex:
+                        duration = time.perf_counter() - start
+                        if metrics is not None:
+                            metrics.record(command, duration, ex)
+                        if tracer is not None:
+                            self._end_trace(tracer, ex)
+                        if recording:
+                            self.record_command(user_input, timestamp=timestamp,
+                                                duration=duration, status='error', error=str(ex))
+                        raise
+                    duration = time.perf_counter() - start
+                    if metrics is not None:
+                        metrics.record(command, duration)
+                    if tracer is not None:
+                        self._end_trace(tracer)
+                    if recording:
+                        self.record_command(user_input, timestamp=timestamp, duration=duration)
                 # postcmd callback return value can be used to exit the
                 # command loop if it returns False..
                 if kwargs.get('postcmd', False):
@@ -556,6 +877,64 @@ class CliBase(object):
             post_return = self.onecmd(user_input)
         return post_return if cb_return is not False else cb_return
 
+    def exec_user_input(self, user_input, **kwargs):
+        """Executes the string with the user input.
+
+        Commands defined as coroutine functions are run in the CLI event
+        loop until they finish.
+
+        Args:
+            user_input (str) : String with the input entered by the user.
+
+        Keyword Args:
+            precmd (bool) : True if precmd shoud be called.
+
+            postcmd (bool) : True if postcmd should be called.
+
+        Returns:
+            bool : True if application shoudl continue, False else.
+        """
+        steps = self._exec_user_input_steps(user_input, **kwargs)
+        try:
+            cb_return = next(steps)
+            if asyncio.iscoroutine(cb_return):
+                try:
+                    cb_return = self.run_coroutine(cb_return)
+                except Exception as ex:
+                    steps.throw(ex)
+            steps.send(cb_return)
+        except StopIteration as ex:
+            return ex.value
+
+    async def exec_user_input_async(self, user_input, **kwargs):
+        """Executes the string with the user input inside the CLI event loop.
+
+        Commands defined as coroutine functions are awaited, so any other
+        task in the loop keeps running while the command waits.
+
+        Args:
+            user_input (str) : String with the input entered by the user.
+
+        Keyword Args:
+            precmd (bool) : True if precmd shoud be called.
+
+            postcmd (bool) : True if postcmd should be called.
+
+        Returns:
+            bool : True if application shoudl continue, False else.
+        """
+        steps = self._exec_user_input_steps(user_input, **kwargs)
+        try:
+            cb_return = next(steps)
+            if asyncio.iscoroutine(cb_return):
+                try:
+                    cb_return = await cb_return
+                except Exception as ex:
+                    steps.throw(ex)
+            steps.send(cb_return)
+        except StopIteration as ex:
+            return ex.value
+
     def cmdloop(self, **kwargs):
         """Method that is called to wait for any user input.
 
@@ -582,6 +961,33 @@ class CliBase(object):
             if not self.exec_user_input(user_input, **kwargs):
                 return
 
+    async def cmdloop_async(self, **kwargs):
+        """Coroutine that waits for any user input without blocking the CLI
+        event loop.
+
+        Keyword Args:
+            prompt (:any:`str` or :any:`function`) : string or callback with prompt value
+
+            toolbar (:class:`str` or :any:`function`) : string or callback with toolbar value.
+
+            rprompt (:any:`str` or :any:`function`) : string or callback with right prompt value.
+
+            echo (bool) : True is command should be echoed.
+
+            precmd (bool) : True if precmd shoud be called.
+
+            postcmd (bool) : True if postcmd should be called.
+
+        Returns:
+            None
+        """
+        while True:
+            user_input = await self.run_prompt_async(**kwargs)
+            if kwargs.get('echo', False):
+                LOGGER.display(user_input)
+            if not await self.exec_user_input_async(user_input, **kwargs):
+                return
+
     def run(self, **kwargs):
         """Runs the command line interface for the given cli class.
 
@@ -607,6 +1013,33 @@ class CliBase(object):
             LOGGER.display("")
             pass
 
+    def run_async(self, **kwargs):
+        """Runs the command line interface in the CLI event loop.
+
+        Keyword Args:
+            prompt (:any:`str` or :any:`function`) : string or callback with prompt value
+
+            toolbar (:class:`str` or :any:`function`) : string or callback with toolbar value.
+
+            rprompt (:any:`str` or :any:`function`) : string or callback with right prompt value.
+
+            echo (bool) : True is command should be echoed.
+
+            precmd (bool) : True if precmd shoud be called.
+
+            postcmd (bool) : True if postcmd should be called.
+
+        Returns:
+            None
+        """
+        # prompt_toolkit uses the current event loop for the prompt.
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.run_coroutine(self.cmdloop_async(**kwargs))
+        except KeyboardInterrupt:
+            LOGGER.display("")
+            pass
+
     def run_mode(self, **kwargs):
         """Enters in a new mode.
 
@@ -682,9 +1115,17 @@ class CliBase(object):
 
         def f_command(f):
 
-            @wraps(f)
-            def _wrapper(self, *args, **kwargs):
-                return f(self, *args, **kwargs)
+            if inspect.iscoroutinefunction(inspect.unwrap(f)):
+
+                @wraps(f)
+                async def _wrapper(self, *args, **kwargs):
+                    return await f(self, *args, **kwargs)
+
+            else:
+
+                @wraps(f)
+                def _wrapper(self, *args, **kwargs):
+                    return f(self, *args, **kwargs)
 
             LOGGER.debug(f, "YELLOW")
             module_name = sys._getframe(1).f_code.co_name
@@ -0,0 +1,243 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import time
+import threading
+from collections import OrderedDict
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.cache'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+CACHE_SIZE = 1024
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class Cache(object):
+    """Cache class provides a bounded LRU cache with expiration time.
+
+    When the cache is full, the least recently used entry is evicted. Every
+    entry can have its own time to live, after which the entry is stale.
+
+    A loader function can be registered for a key. A missing key is loaded
+    calling the loader, and a stale key returns the stale value while the
+    loader refreshes it in a background thread (stale-while-revalidate).
+    Keys without a loader are removed when they expire.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=None):
+        """Cache class initialization method.
+
+        Args:
+            maxsize (int) : Maximum number of entries, None for unbounded.
+
+            ttl (float) : Default time to live in seconds, None if entries\
+                    never expire.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.__entries = OrderedDict()
+        self.__loaders = {}
+        self.__refreshing = set()
+        self.__lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    def _expires(self, key, ttl):
+        """Internal method that returns when an entry expires.
+
+        Args:
+            key (object) : Entry key.
+
+            ttl (float) : Time to live, None to use the loader or the cache\
+                    default value.
+
+        Returns:
+            float : Expiration time, None if it never expires.
+        """
+        if ttl is None:
+            ttl = self.__loaders[key][1] if key in self.__loaders else self.ttl
+        return None if ttl is None else time.monotonic() + ttl
+
+    def get(self, key, default=None):
+        """Retrieves the value for the given key.
+
+        Args:
+            key (object) : Entry key.
+
+            default (object) : Value returned when the key is not found.
+
+        Returns:
+            object : Value for the key, default if it is not found.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key, None)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self.hits += 1
+                    self.__entries.move_to_end(key)
+                    return value
+                if key in self.__loaders:
+                    self.hits += 1
+                    self.__entries.move_to_end(key)
+                    self._refresh_in_background(key)
+                    return value
+                del self.__entries[key]
+            self.misses += 1
+            loader = self.__loaders.get(key, None)
+        if loader is None:
+            return default
+        value = loader[0]()
+        self.set(key, value)
+        return value
+
+    def set(self, key, value, ttl=None):
+        """Adds or overwrites the value for the given key.
+
+        Args:
+            key (object) : Entry key.
+
+            value (object) : Value to be cached.
+
+            ttl (float) : Time to live in seconds for this entry.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.__entries[key] = (value, self._expires(key, ttl))
+            self.__entries.move_to_end(key)
+            while self.maxsize is not None and len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Removes the entry for the given key.
+
+        Args:
+            key (object) : Entry key.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self):
+        """Removes all entries in the cache.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def set_loader(self, key, loader, ttl=None):
+        """Registers a loader function for the given key.
+
+        Args:
+            key (object) : Entry key.
+
+            loader (:any:`function`) : Function without arguments that\
+                    returns the value for the key.
+
+            ttl (float) : Time to live for values returned by the loader.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.__loaders[key] = (loader, ttl)
+
+    def refresh(self, key):
+        """Loads the value for the given key calling its loader.
+
+        Args:
+            key (object) : Entry key.
+
+        Returns:
+            object : New value for the key.
+        """
+        loader, _ = self.__loaders[key]
+        try:
+            value = loader()
+            self.set(key, value)
+            with self.__lock:
+                self.refreshes += 1
+            return value
+        finally:
+            with self.__lock:
+                self.__refreshing.discard(key)
+
+    def _refresh_in_background(self, key):
+        """Internal method that refreshes a stale key in a background thread.
+
+        Only one refresh is running for a key at any time.
+
+        Args:
+            key (object) : Entry key.
+
+        Returns:
+            None
+        """
+        if key in self.__refreshing:
+            return
+        self.__refreshing.add(key)
+
+        def _refresh():
+            try:
+                self.refresh(key)
+            except Exception as ex:
+                LOGGER.error('Cache refresh for <{0}> failed: {1}'.format(key, ex))
+
+        thread = threading.Thread(target=_refresh, name='cache-refresh')
+        thread.daemon = True
+        thread.start()
+
+    def stats(self):
+        """Returns cache counters.
+
+        Returns:
+            :any:`dict` : Dictionary with size, hits, misses, evictions and\
+                    refreshes counters.
+        """
+        return {'size': len(self.__entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'refreshes': self.refreshes}
@@ -0,0 +1,632 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import os
+import json
+import mmap
+import struct
+from collections import OrderedDict
+from jc2li.common import SYNTAX_ATTR, ARGOS_ATTR
+from jc2li.journal import get_command_tree
+from jc2li.clierror import CliException, PATH_KIND
+from jc2li.node import CteNode, PrefixNode, FreeformNode, Loop, Start, End, Hook
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.catalog'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+MAGIC = b'JC2C'
+VERSION = 1
+NO_NODE = 0xffffffff
+
+NODE_KIND = 0
+CTE_KIND = 1
+PREFIX_KIND = 2
+FREEFORM_KIND = 3
+HOOK_KIND = 4
+LOOP_KIND = 5
+START_KIND = 6
+END_KIND = 7
+HOOK_KINDS = (HOOK_KIND, LOOP_KIND, START_KIND, END_KIND)
+
+DEFAULT_NONE_FLAG = 0x01
+
+# magic, version, commands, nodes, children, arguments and the offset for
+# every section: commands, nodes, children, arguments and strings.
+HEADER = struct.Struct('<4s10I')
+# name offset and length, syntax offset and length, root node, first
+# argument and number of arguments.
+COMMAND = struct.Struct('<7I')
+# kind, flags, name offset and length, first child and number of children.
+NODE = struct.Struct('<BBxx4I')
+# child node and loop flag.
+CHILD = struct.Struct('<IBxxx')
+# name, type and JSON default offset and length.
+ARGUMENT = struct.Struct('<6I')
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def node_kind(node):
+    """Returns the catalog kind for the given node.
+
+    Args:
+        node (Node) : Node instance.
+
+    Returns:
+        int : Node kind.
+    """
+    for cls, kind in ((Loop, LOOP_KIND), (Start, START_KIND), (End, END_KIND), (Hook, HOOK_KIND),
+                      (CteNode, CTE_KIND), (PrefixNode, PREFIX_KIND), (FreeformNode, FREEFORM_KIND)):
+        if isinstance(node, cls):
+            return kind
+    return NODE_KIND
+
+
+def command_function(command_cb):
+    """Returns the decorated function for a command callback.
+
+    Args:
+        command_cb (:any:`function`) : Command callback, it can be a partial.
+
+    Returns:
+        :any:`function` : Command function.
+    """
+    return command_cb.func if hasattr(command_cb, 'func') else command_cb
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class CatalogWriter(object):
+    """CatalogWriter class compiles all commands in a CLI into a flat binary
+    catalog file.
+
+    The catalog contains a table with all commands sorted by name, a table
+    with all nodes in every parsing tree, a table with children for every
+    node, a table with arguments for every command and a table with all
+    strings. Every entry in a table has a fixed size and references other
+    tables by position, so the catalog can be used without deserializing it.
+    """
+
+    def __init__(self):
+        """CatalogWriter class initialization method.
+        """
+        self.commands = []
+        self.nodes = []
+        self.children = []
+        self.arguments = []
+        self.node_ids = {}
+        self.__strings = OrderedDict()
+        self.__strings_size = 0
+
+    def _string(self, value):
+        """Internal method that adds a string to the string table.
+
+        Args:
+            value (str) : String to add, None is an empty string.
+
+        Returns:
+            tuple : Pair with string offset and length.
+        """
+        data = (value or '').encode('utf-8')
+        if data not in self.__strings:
+            self.__strings[data] = self.__strings_size
+            self.__strings_size += len(data)
+        return self.__strings[data], len(data)
+
+    def _add_tree(self, root):
+        """Internal method that adds all nodes in a parsing tree.
+
+        Nodes shared by several paths, like hooks ending a rule, and loops
+        are added only once.
+
+        Args:
+            root (Node) : Tree root node.
+
+        Returns:
+            int : Position for the root node.
+        """
+        pending = [root]
+        first = len(self.nodes)
+        while pending:
+            node = pending.pop()
+            if id(node) in self.node_ids:
+                continue
+            self.node_ids[id(node)] = len(self.nodes)
+            self.nodes.append(node)
+            pending.extend(reversed(node.children))
+        # Children are added once all node positions are known.
+        for i in range(first, len(self.nodes)):
+            node = self.nodes[i]
+            kind = node_kind(node)
+            name = node.label if kind == PREFIX_KIND else node.name
+            flags = DEFAULT_NONE_FLAG if node.default is None else 0
+            self.nodes[i] = (node, kind, flags, self._string(name), len(self.children), len(node.children))
+            for child in node.children:
+                self.children.append((self.node_ids[id(child)], 1 if node.isloop_child(child) else 0))
+        return self.node_ids[id(root)]
+
+    def add_command(self, name, command_cb):
+        """Adds a command to the catalog.
+
+        Args:
+            name (str) : Command label.
+
+            command_cb (:any:`function`) : Command callback.
+
+        Returns:
+            None
+        """
+        func = command_function(command_cb)
+        root = get_command_tree(func)
+        root_id = NO_NODE if root is None else self._add_tree(root)
+        argos = getattr(func, ARGOS_ATTR, None)
+        first = len(self.arguments)
+        for argo in (argos.arguments if argos else []):
+            self.arguments.append((self._string(argo.name),
+                                   self._string(argo.type.__name__),
+                                   self._string(json.dumps(argo.default, default=str))))
+        self.commands.append((name, self._string(name), self._string(getattr(func, SYNTAX_ATTR, None)),
+                              root_id, first, len(self.arguments) - first))
+
+    def add_cli(self, cli):
+        """Adds all commands in a CLI to the catalog.
+
+        Args:
+            cli (CliBase) : CLI instance.
+
+        Returns:
+            None
+        """
+        for name in cli.commands:
+            self.add_command(name, cli.get_command_cb(name))
+
+    def write(self, filename):
+        """Writes the catalog file.
+
+        Args:
+            filename (str) : String with the catalog filename.
+
+        Returns:
+            None
+        """
+        commands = sorted(self.commands, key=lambda x: x[0].encode('utf-8'))
+        offset = HEADER.size
+        offsets = []
+        tables = ((commands, COMMAND), (self.nodes, NODE), (self.children, CHILD), (self.arguments, ARGUMENT))
+        for table, entry in tables:
+            offsets.append(offset)
+            offset += len(table) * entry.size
+        offsets.append(offset)
+        temporary = '{}.tmp'.format(filename)
+        with open(temporary, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(commands), len(self.nodes), len(self.children),
+                                len(self.arguments), *offsets))
+            for _, name, syntax, root, first, count in commands:
+                f.write(COMMAND.pack(name[0], name[1], syntax[0], syntax[1], root, first, count))
+            for _, kind, flags, name, first, count in self.nodes:
+                f.write(NODE.pack(kind, flags, name[0], name[1], first, count))
+            for child, isloop in self.children:
+                f.write(CHILD.pack(child, isloop))
+            for name, argtype, default in self.arguments:
+                f.write(ARGUMENT.pack(name[0], name[1], argtype[0], argtype[1], default[0], default[1]))
+            f.write(b''.join(self.__strings))
+        os.replace(temporary, filename)
+
+
+# -----------------------------------------------------------------------------
+#
+class Catalog(object):
+    """Catalog class maps a catalog file read-only and matches command lines
+    against it.
+
+    The file is mapped with mmap, so every process using the same catalog
+    shares the same memory pages, and nothing is deserialized: every lookup
+    reads fixed size entries at known offsets. A catalog attached to a CLI
+    is used to match every command line, so parsing trees are not required
+    to execute commands.
+    """
+
+    def __init__(self, filename):
+        """Catalog class initialization method.
+
+        Args:
+            filename (str) : String with the catalog filename.
+        """
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            try:
+                self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise CliException(MODULE, 'Catalog <{}> is empty'.format(filename))
+        if not self._is_valid():
+            self.close()
+            raise CliException(MODULE, 'Catalog <{}> is not valid'.format(filename))
+        (self.__ncommands, self.__nnodes, self.__nchildren, self.__nargs,
+         self.__commands, self.__nodes, self.__children, self.__args,
+         self.__strings) = HEADER.unpack_from(self.__map, 0)[2:]
+
+    def _is_valid(self):
+        """Internal method that checks the header and that every table is
+        inside the mapped file, where the catalog writer places it.
+
+        Returns:
+            bool : True if the catalog is valid, False else.
+        """
+        if len(self.__map) < HEADER.size:
+            return False
+        header = HEADER.unpack_from(self.__map, 0)
+        if header[0] != MAGIC or header[1] != VERSION:
+            return False
+        counts, offsets = header[2:6], header[6:]
+        offset = HEADER.size
+        for count, start, entry in zip(counts, offsets, (COMMAND, NODE, CHILD, ARGUMENT)):
+            if start != offset:
+                return False
+            offset += count * entry.size
+        return offsets[-1] == offset and offset <= len(self.__map)
+
+    def __len__(self):
+        return self.__ncommands
+
+    def __contains__(self, name):
+        return self.find_command(name) is not None
+
+    def close(self):
+        """Unmaps the catalog file.
+
+        Returns:
+            None
+        """
+        self.__map.close()
+
+    def _bytes(self, offset, length):
+        """Internal method that returns bytes from the string table.
+
+        Args:
+            offset (int) : Offset in the string table.
+
+            length (int) : Number of bytes.
+
+        Returns:
+            bytes : String bytes.
+        """
+        start = self.__strings + offset
+        return self.__map[start:start + length]
+
+    def _string(self, offset, length):
+        """Internal method that returns a string from the string table.
+
+        Args:
+            offset (int) : Offset in the string table.
+
+            length (int) : Number of bytes.
+
+        Returns:
+            str : String value.
+        """
+        return self._bytes(offset, length).decode('utf-8')
+
+    def _command(self, i):
+        """Internal method that returns the command entry at the given
+        position.
+
+        Args:
+            i (int) : Command position.
+
+        Returns:
+            tuple : Command entry.
+        """
+        return COMMAND.unpack_from(self.__map, self.__commands + i * COMMAND.size)
+
+    def _node(self, i):
+        """Internal method that returns the node entry at the given position.
+
+        Args:
+            i (int) : Node position.
+
+        Returns:
+            tuple : Node entry.
+        """
+        return NODE.unpack_from(self.__map, self.__nodes + i * NODE.size)
+
+    def _children(self, first, count):
+        """Internal method that traverses children entries.
+
+        Args:
+            first (int) : First child position.
+
+            count (int) : Number of children.
+
+        Returns:
+            generator : it returns a generator with child node and loop flag.
+        """
+        for i in range(first, first + count):
+            yield CHILD.unpack_from(self.__map, self.__children + i * CHILD.size)
+
+    def find_command(self, name):
+        """Returns the position for the given command label.
+
+        Args:
+            name (str) : Command label.
+
+        Returns:
+            int : Command position, None if it is not found.
+        """
+        key = name.encode('utf-8')
+        lo, hi = 0, self.__ncommands
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = self._command(mid)
+            value = self._bytes(entry[0], entry[1])
+            if value < key:
+                lo = mid + 1
+            elif value > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def commands(self):
+        """Returns all command labels.
+
+        Returns:
+            list : List with command labels, sorted.
+        """
+        return [self._string(*self._command(i)[:2]) for i in range(self.__ncommands)]
+
+    def syntax(self, name):
+        """Returns the syntax for the given command label.
+
+        Args:
+            name (str) : Command label.
+
+        Returns:
+            str : Command syntax, None if the command is not found or it\
+                    has not a syntax.
+        """
+        i = self.find_command(name)
+        if i is None:
+            return None
+        entry = self._command(i)
+        return self._string(entry[2], entry[3]) or None
+
+    def arguments(self, name):
+        """Returns argument metadata for the given command label.
+
+        Args:
+            name (str) : Command label.
+
+        Returns:
+            list : List with a tuple with name, type name and default value\
+                    for every argument.
+        """
+        i = self.find_command(name)
+        if i is None:
+            return []
+        _, _, _, _, _, first, count = self._command(i)
+        result = []
+        for j in range(first, first + count):
+            entry = ARGUMENT.unpack_from(self.__map, self.__args + j * ARGUMENT.size)
+            result.append((self._string(entry[0], entry[1]),
+                           self._string(entry[2], entry[3]),
+                           json.loads(self._string(entry[4], entry[5]))))
+        return result
+
+    def node_name(self, i):
+        """Returns the name for the node at the given position.
+
+        Args:
+            i (int) : Node position.
+
+        Returns:
+            str : Node name, label for prefix nodes.
+        """
+        _, _, offset, length, _, _ = self._node(i)
+        return self._string(offset, length) or None
+
+    def node_kind(self, i):
+        """Returns the kind for the node at the given position.
+
+        Args:
+            i (int) : Node position.
+
+        Returns:
+            int : Node kind.
+        """
+        return self._node(i)[0]
+
+    def _find_by_name(self, i, name, check_default, matched):
+        """Internal method that checks if a node matches the given name, with
+        the same rules used by Node.find_by_name.
+
+        Args:
+            i (int) : Node position.
+
+            name (bytes) : Name to match.
+
+            check_default (bool) : True if mandatory nodes match any name.
+
+            matched (bool) : True if the enclosing loop was already matched.
+
+        Returns:
+            int : Matching node position, None if it does not match.
+        """
+        kind, flags, offset, length, _, _ = self._node(i)
+        if kind in HOOK_KINDS:
+            return self._find_child_by_name(i, name, check_default, matched)
+        elif kind == FREEFORM_KIND:
+            return i
+        elif kind == CTE_KIND:
+            return i if length and self._bytes(offset, length) == name else None
+        elif kind == PREFIX_KIND:
+            return i if name.startswith(b'-') and name[1:] == self._bytes(offset, length) else None
+        elif check_default and flags & DEFAULT_NONE_FLAG:
+            return i
+        return i if length and self._bytes(offset, length) == name else None
+
+    def _find_child_by_name(self, i, name, check_default, matched):
+        """Internal method that returns the child node matching the given
+        name, with the same rules used by Node.find_child_by_name and
+        Loop.find_child_by_name.
+
+        Args:
+            i (int) : Node position.
+
+            name (bytes) : Name to match.
+
+            check_default (bool) : True if mandatory nodes match any name.
+
+            matched (bool) : True if the enclosing loop was already matched.
+
+        Returns:
+            int : Matching node position, None if it is not found.
+        """
+        kind, _, _, _, first, count = self._node(i)
+        noloop = False
+        if kind == LOOP_KIND:
+            noloop = matched
+            matched = not matched
+        for child, isloop in self._children(first, count):
+            if noloop and isloop:
+                continue
+            found = self._find_by_name(child, name, check_default, matched)
+            if found is not None:
+                return found
+        return None
+
+    def find_path(self, command, path_patterns):
+        """Finds the path in the command parsing tree for the given command
+        line arguments, like Node.find_path.
+
+        Args:
+            command (str) : Command label.
+
+            path_patterns (list): list with the command line input.
+
+        Returns:
+            list: list with the node position for every argument.
+        """
+        i = self.find_command(command)
+        if i is None:
+            raise CliException(MODULE, 'Command <{}> not found'.format(command))
+        trav = self._command(i)[4]
+        if trav == NO_NODE:
+            raise CliException(MODULE, 'Command <{}> has not syntax'.format(command))
+        node_path = []
+        for index, pattern in enumerate(path_patterns):
+            if '=' in pattern:
+                name, _, _ = pattern.partition('=')
+                check_default = False
+            else:
+                check_default = True
+                name = pattern
+            trav = self._find_child_by_name(trav, name.encode('utf-8'), check_default, False)
+            if trav is None:
+                raise CliException(MODULE, '<{}> not found'.format(pattern), kind=PATH_KIND, token=index)
+            node_path.append(trav)
+        return node_path
+
+    def store_values(self, node_path, path_patterns, argos):
+        """Converts the command line arguments and stores them in the command
+        arguments, like Journal.map_passed_args_to_command_argos does with
+        parsing tree nodes.
+
+        Args:
+            node_path (list): list with the node position for every argument,\
+                    as find_path returns it.
+
+            path_patterns (list): list with the command line input.
+
+            argos (Arguments): command arguments, already indexed.
+
+        Returns:
+            None
+        """
+        node_values = OrderedDict()
+        for i, value in zip(node_path, path_patterns):
+            node_values.setdefault(i, []).append(value)
+        for i, values in node_values.items():
+            kind, _, offset, length, _, _ = self._node(i)
+            if kind == PREFIX_KIND:
+                continue
+            argo = argos.get_argo_from_name(self._string(offset, length))
+            # Only free-form nodes take the whole value, like any other node
+            # does in the parsing tree.
+            if kind != FREEFORM_KIND:
+                values = [x.partition('=')[2] if '=' in x else x for x in values]
+            if len(values) == 1:
+                argo.completer.store(argo.type._(values[0]), False)
+            else:
+                argo.completer.store_many(argo.type._many(values, argo.container), False)
+
+    def stale_commands(self, cli):
+        """Returns commands in the CLI that are not in the catalog, or which
+        syntax or arguments changed since the catalog was written.
+
+        Args:
+            cli (CliBase) : CLI instance.
+
+        Returns:
+            list : List with command labels, sorted.
+        """
+        stale = []
+        for name in sorted(cli.commands):
+            func = command_function(cli.get_command_cb(name))
+            argos = getattr(func, ARGOS_ATTR, None)
+            names = [argo.name for argo in (argos.arguments if argos else [])]
+            if (name not in self or self.syntax(name) != getattr(func, SYNTAX_ATTR, None) or
+                    [x[0] for x in self.arguments(name)] != names):
+                stale.append(name)
+        return stale
+
+
+# -----------------------------------------------------------------------------
+#
+def write_catalog(cli, filename):
+    """Writes the catalog file for all commands in the given CLI.
+
+    Args:
+        cli (CliBase) : CLI instance.
+
+        filename (str) : String with the catalog filename.
+
+    Returns:
+        CatalogWriter : Writer used, with the position for every node.
+    """
+    writer = CatalogWriter()
+    writer.add_cli(cli)
+    writer.write(filename)
+    return writer
@@ -15,6 +15,8 @@ from jc2li.base import CliBase
 from jc2li.argtypes import Str, Int
 from jc2li.decorators import setsyntax, syntax, argo
 from jc2li.common import SYNTAX_ATTR
+from jc2li.replay import Replay, load_records
+from jc2li.tokenizer import split_command
 import jc2li.loggerator as loggerator
 
 
@@ -116,6 +118,75 @@ class Cli(CliBase):
                 else:
                     LOGGER.display('> {0}'.format(command))
 
+    @CliBase.command()
+    @setsyntax
+    @syntax('history [prefix]? [limit]?')
+    @argo('prefix', Str, '')
+    @argo('limit', Int, 20)
+    def do_history(self, prefix, limit):
+        """Command that displays history entries starting with the given
+        prefix, most recent first.
+
+        Args:
+            prefix (str) : String with the prefix to search.
+
+            limit (int) : Maximum number of entries displayed.
+        """
+        for entry in reversed(self.history.index.search(prefix, limit)):
+            LOGGER.display(entry)
+
+    @CliBase.command()
+    @setsyntax
+    @syntax('stats [name]? [dump]?')
+    @argo('name', Str, '')
+    @argo('dump', Str, '')
+    def do_stats(self, name, dump):
+        """Command that displays execution metrics for every command.
+
+        Args:
+            name (str) : String with the command label to display, all\
+                    commands if it is empty.
+
+            dump (str) : String with the file where metrics are written in\
+                    JSON format.
+        """
+        if dump:
+            self.metrics.dump(dump)
+            LOGGER.display('stats written to {}'.format(dump))
+        else:
+            self.metrics.display(name or None)
+
+    @CliBase.command()
+    @setsyntax
+    @syntax('profile action [filename]?')
+    @argo('action', Str, None)
+    @argo('filename', Str, 'profile.folded')
+    def do_profile(self, action, filename):
+        """Command that controls the sampling profiler.
+
+        Args:
+            action (str) : String with the action: "on" starts sampling,\
+                    "off" stops sampling and displays samples for every\
+                    command, and "dump" writes samples in collapsed-stack\
+                    format.
+
+            filename (str) : String with the file where samples are written.
+        """
+        if action == 'on':
+            self.profiler.reset()
+            if not self.profiler.start(self.tracer):
+                LOGGER.display('profiler already running')
+        elif action == 'off':
+            if self.profiler.stop():
+                self.profiler.display()
+            else:
+                LOGGER.display('profiler not running')
+        elif action == 'dump':
+            count = self.profiler.dump(filename)
+            LOGGER.display('{0} stacks written to {1}'.format(count, filename))
+        else:
+            LOGGER.error('profile: unknown action {}, use on, off or dump'.format(action), out=True)
+
     @CliBase.command('shell')
     def do_shell(self, line):
         """Comand that runs a shell command when "shell" is entered.
@@ -139,6 +210,71 @@ class Cli(CliBase):
         """
         self.load_commands_from_file(filename)
 
+    @CliBase.command('bg')
+    def do_bg(self, line):
+        """Runs a command in a background job.
+
+        Args:
+            line (str): String with the command to run in background.
+        """
+        command, args, _ = split_command(line)
+        if command is None or not self.is_command(command):
+            LOGGER.display('bg: command not found: {}'.format(line))
+            return
+        self.exec_command_in_background(command, args)
+
+    @CliBase.command('jobs')
+    def do_jobs(self, line):
+        """Displays all background jobs.
+        """
+        for job in self.jobs.traverse():
+            LOGGER.display('[{0}] {1:<10} {2}'.format(job.jid, job.status, job.line))
+
+    @CliBase.command()
+    @setsyntax
+    @syntax('fg [jid]?')
+    @argo('jid', Int, -1)
+    def do_fg(self, jid):
+        """Attaches to a background job, displaying its output until it
+        finishes. Ctrl-C detaches from the job.
+
+        Args:
+            jid (int) : Integer with the job to attach. Last job is used by default.
+        """
+        job = self.jobs.last() if jid == -1 else self.jobs.get(jid)
+        if job is None:
+            LOGGER.display('fg: job not found')
+            return
+        try:
+            while not job.join(0.1):
+                output = job.read_output()
+                if output:
+                    LOGGER.display(output.rstrip('\n'))
+        except KeyboardInterrupt:
+            LOGGER.display('')
+            return
+        output = job.read_output()
+        if output:
+            LOGGER.display(output.rstrip('\n'))
+        LOGGER.display('[{0}] {1:<10} {2}'.format(job.jid, job.status, job.line))
+        self.jobs.remove(job.jid)
+
+    @CliBase.command()
+    @setsyntax
+    @syntax('kill jid')
+    @argo('jid', Int, None)
+    def do_kill(self, jid):
+        """Cancels a background job.
+
+        Args:
+            jid (int) : Integer with the job to cancel.
+        """
+        job = self.jobs.get(jid)
+        if job is None:
+            LOGGER.display('kill: job not found')
+            return
+        job.cancel()
+
     @CliBase.command("start-recording")
     def do_start_recording(self, line):
         """Starts recording commands.
@@ -206,3 +342,31 @@ class Cli(CliBase):
         end = None if end == -1 else end
         LOGGER.display("save-recording to {0} from {1} to {2}".format(filename, start, end))
         self.save_recording(filename, start, end)
+
+    @CliBase.command()
+    @setsyntax
+    @syntax('replay filename [mode]? [rate]? [workers]?')
+    @argo('filename', Str, None)
+    @argo('mode', Str, 'max')
+    @argo('rate', Int, 0)
+    @argo('workers', Int, 1)
+    def do_replay(self, filename, mode, rate, workers):
+        """Replays recorded commands and displays latency for every command.
+
+        Args:
+            filename (str) : String with the file with recorded commands.
+
+            mode (str) : Replay mode: timing, rate or max.
+
+            rate (int) : Commands per second for rate mode.
+
+            workers (int) : Number of workers executing commands.
+        """
+        try:
+            records = load_records(filename)
+            replay = Replay(self, records, mode=mode, rate=rate, workers=workers)
+        except (OSError, ValueError) as ex:
+            LOGGER.error('replay: {}'.format(ex), out=True)
+            return
+        LOGGER.display("replay {0} in {1} mode".format(filename, mode))
+        replay.run().display()
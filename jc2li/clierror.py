@@ -2,6 +2,11 @@ import jc2li.loggerator as loggerator
 
 logger = loggerator.getLoggerator('error')
 
+ERROR_KIND = 'error'
+PATH_KIND = 'path'
+ARITY_KIND = 'arity'
+ARGUMENT_KIND = 'argument'
+
 
 class CliException(Exception):
     """CliException class is the base class for any exception to be raised by the application.
@@ -14,7 +19,15 @@ class CliException(Exception):
             module (str) : Module raising the exception.
             message (str) : Message with the exception information.
             exc_message (str) : System exception that caused this app exception.
+
+        Keyword Args:
+            kind (str) : Error kind, used to count errors by kind.
+            token (int) : Index for the command line token with the error.
+            column (int) : Position in the command line for the error.
         """
+        self.kind = kwargs.pop('kind', ERROR_KIND)
+        self.token = kwargs.pop('token', None)
+        self.column = kwargs.pop('column', None)
         logger.error("[{}] {} {}".format(module,
                                          '<{}>'.format(exc_message) if exc_message else '',
                                          message))
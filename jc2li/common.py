@@ -3,3 +3,5 @@ RULES_ATTR = '__rules'
 SYNTAX_ATTR = '_syntax'
 CMD_ATTR = '_command'
 TREE_ATTR = '_tree'
+ARITY_ATTR = '_arity'
+BUILD_TREE_ATTR = '_build_tree'
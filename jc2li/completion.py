@@ -0,0 +1,507 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import re
+import heapq
+import threading
+from bisect import bisect_left
+from array import array
+from itertools import islice
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.completion'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+PREFIX_MODE = 'prefix'
+SUBSTRING_MODE = 'substring'
+FUZZY_MODE = 'fuzzy'
+
+NGRAM_SIZE = 3
+
+RANKED_LIMIT = 20
+USAGE_WEIGHT = 1.0
+PREFIX_TIER = 3
+SUBSTRING_TIER = 2
+SUBSEQUENCE_TIER = 1
+TYPO_TIER = 0
+STOP_GRAM_RATIO = 0.1
+STOP_GRAM_MIN = 1000
+SUBSEQUENCE_SCAN = 2000
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def ngrams(text, size=NGRAM_SIZE):
+    """Returns the set of n-grams for the given text.
+
+    Args:
+        text (str) : String to split in n-grams.
+
+        size (int) : n-gram length.
+
+    Returns:
+        set : Set with all n-grams.
+    """
+    return set(text[i:i + size] for i in range(len(text) - size + 1))
+
+
+def prefix_upper_bound(text):
+    """Returns the smallest string greater than any string starting with
+    the given prefix.
+
+    Args:
+        text (str) : Prefix string.
+
+    Returns:
+        str : Upper bound string, None if there is not any.
+    """
+    while text and ord(text[-1]) == 0x10ffff:
+        text = text[:-1]
+    if not text:
+        return None
+    return text[:-1] + chr(ord(text[-1]) + 1)
+
+
+def usage_from_history(history, first_only=False):
+    """Returns how recently every token was used in the given history.
+
+    Args:
+        history (list) : List or History instance with all lines entered,\
+                oldest first.
+
+        first_only (bool) : True if only the first token (the command label)\
+                is used for every line.
+
+    Returns:
+        :any:`dict` : Dictionary with a value from 0 to 1 for every token,\
+                where 1 is the most recent one.
+    """
+    lines = list(history)
+    usage = {}
+    total = float(len(lines))
+    for i, line in enumerate(lines, 1):
+        tokens = line.split()
+        for token in (tokens[:1] if first_only else tokens):
+            usage[token] = i / total
+    return usage
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class CompletionIndex(object):
+    """CompletionIndex class provides fast completion over large lists of
+    candidates.
+
+    Candidates are kept in a sorted list, so prefix matches are a contiguous
+    range found with bisect. An n-gram index can be built for substring and
+    fuzzy (typo tolerant) matching. Results are limited to the top-k entries.
+
+    When the text being completed extends the previous one (the user typed
+    one more character), the previous result is refined instead of searching
+    all candidates again. The previous result is kept for every thread, so
+    completions running in other threads, like the prompt_toolkit completion
+    thread, do not refine each other's results.
+
+    A CliType derived class can return a CompletionIndex instance from
+    get_complete_list, and it is used by CliType.complete.
+    """
+
+    def __init__(self, candidates, **kwargs):
+        """CompletionIndex class initialization method.
+
+        Args:
+            candidates (list) : List with all candidates.
+
+        Keyword Args:
+            mode (str) : Default match mode: prefix, substring or fuzzy.
+
+            limit (int) : Maximum number of results, None for all.
+
+            ngrams (bool) : True if the n-gram index should be built. It is\
+                    built by default for substring and fuzzy modes.
+        """
+        self.mode = kwargs.get('mode', PREFIX_MODE)
+        self.limit = kwargs.get('limit', None)
+        self.candidates = sorted(set(candidates))
+        self.__grams = None
+        self.__local = threading.local()
+        if kwargs.get('ngrams', self.mode != PREFIX_MODE):
+            self._build_ngrams()
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def _refine(self, mode, text):
+        """Internal method that returns the previous result in the current
+        thread, if it can be refined for the given text.
+
+        Args:
+            mode (str) : Match mode.
+
+            text (str) : String to match.
+
+        Returns:
+            object : Previous result, None if it can not be refined.
+        """
+        last = getattr(self.__local, 'last', None)
+        if last is not None and last[0] == mode and text.startswith(last[1]):
+            return last[2]
+        return None
+
+    def _remember(self, mode, text, result):
+        """Internal method that keeps the result in the current thread, so it
+        can be refined by the next completion.
+
+        Args:
+            mode (str) : Match mode, None if the result can not be refined.
+
+            text (str) : String matched.
+
+            result (object) : Result to keep.
+
+        Returns:
+            None
+        """
+        self.__local.last = None if mode is None else (mode, text, result)
+
+    def _build_ngrams(self):
+        """Internal method that builds the n-gram index.
+
+        Every n-gram maps to the sorted array of candidate positions that
+        contain it.
+
+        Returns:
+            None
+        """
+        grams = {}
+        for i, candidate in enumerate(self.candidates):
+            for gram in ngrams(candidate):
+                grams.setdefault(gram, array('I')).append(i)
+        self.__grams = grams
+
+    def prefix_range(self, text):
+        """Returns the range of candidates starting with the given prefix.
+
+        Args:
+            text (str) : Prefix to match.
+
+        Returns:
+            tuple : Pair with first and last (not included) positions.
+        """
+        lo, hi = self._refine(PREFIX_MODE, text) or (0, len(self.candidates))
+        if text:
+            lo = bisect_left(self.candidates, text, lo, hi)
+            upper = prefix_upper_bound(text)
+            if upper is not None:
+                hi = bisect_left(self.candidates, upper, lo, hi)
+        self._remember(PREFIX_MODE, text, (lo, hi))
+        return lo, hi
+
+    def _substring_ids(self, text):
+        """Internal method that returns positions for all candidates that
+        contain the given text.
+
+        Args:
+            text (str) : String to match.
+
+        Returns:
+            list : List with candidate positions, sorted.
+        """
+        ids = self._refine(SUBSTRING_MODE, text)
+        if ids is None and self.__grams is not None and len(text) >= NGRAM_SIZE:
+            postings = sorted((self.__grams.get(x, ()) for x in ngrams(text)), key=len)
+            ids = set(postings[0])
+            for posting in postings[1:]:
+                ids.intersection_update(posting)
+            ids = sorted(ids)
+        elif ids is None:
+            ids = range(len(self.candidates))
+        ids = [i for i in ids if text in self.candidates[i]]
+        self._remember(SUBSTRING_MODE, text, ids)
+        return ids
+
+    def _shared_ngrams(self, text, maxlen=None):
+        """Internal method that counts n-grams shared by every candidate with
+        the given text.
+
+        Args:
+            text (str) : String to match.
+
+            maxlen (int) : n-grams found in more candidates than this value\
+                    are skipped, None to use all n-grams.
+
+        Returns:
+            :any:`dict` : Dictionary with shared n-grams for every candidate\
+                    position.
+        """
+        if self.__grams is None:
+            self._build_ngrams()
+        shared = {}
+        for gram in ngrams(text):
+            posting = self.__grams.get(gram, ())
+            if maxlen is not None and len(posting) > maxlen:
+                continue
+            for i in posting:
+                shared[i] = shared.get(i, 0) + 1
+        return shared
+
+    def _fuzzy_ids(self, text, limit):
+        """Internal method that returns positions for candidates sharing the
+        most n-grams with the given text, the best ones first.
+
+        Args:
+            text (str) : String to match.
+
+            limit (int) : Maximum number of results.
+
+        Returns:
+            list : List with candidate positions.
+        """
+        scores = self._shared_ngrams(text)
+        self._remember(None, text, None)
+        if limit is None:
+            return sorted(scores, key=lambda i: (-scores[i], i))
+        return heapq.nsmallest(limit, scores, key=lambda i: (-scores[i], i))
+
+    def complete(self, text, mode=None, limit=None):
+        """Returns candidates matching the given text.
+
+        Args:
+            text (str) : String to match, blank matches every candidate.
+
+            mode (str) : Match mode, default mode is used if None.
+
+            limit (int) : Maximum number of results, default limit is used if\
+                    None.
+
+        Returns:
+            list : List with matching candidates.
+        """
+        mode = self.mode if mode is None else mode
+        limit = self.limit if limit is None else limit
+        text = text.strip()
+        if mode == PREFIX_MODE or not text:
+            lo, hi = self.prefix_range(text)
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            return self.candidates[lo:hi]
+        elif mode == SUBSTRING_MODE:
+            ids = self._substring_ids(text)
+        elif mode == FUZZY_MODE and len(text) < NGRAM_SIZE:
+            ids = self._substring_ids(text)
+        elif mode == FUZZY_MODE:
+            ids = self._fuzzy_ids(text, limit)
+        else:
+            raise ValueError('Unknown completion mode <{}>'.format(mode))
+        return [self.candidates[i] for i in islice(ids, limit)]
+
+
+# -----------------------------------------------------------------------------
+#
+class RankedMatcher(CompletionIndex):
+    """RankedMatcher class provides ranked completion, where candidates don't
+    need to start with the text entered.
+
+    Every candidate is scored by match quality and by recent usage:
+
+    - prefix match: text is at the start of the candidate.
+
+    - substring match: text is anywhere in the candidate.
+
+    - subsequence match: all text characters are in the candidate, in the\
+            same order, like "lf1" for "leaf-1".
+
+    - typo match: candidate shares n-grams with the text.
+
+    A better match tier always wins, unless usage difference is big. Weaker
+    tiers are only searched if stronger ones don't provide enough results.
+    Besides the sorted list and the n-gram index, a posting list for every
+    character is used to select candidates for subsequence matching.
+
+    Weaker tiers are bounded to keep latency low with large lists: only the
+    SUBSEQUENCE_SCAN subsequence candidates most recently used, or else the
+    shortest ones, are checked, and n-grams
+    found in more than STOP_GRAM_RATIO of all candidates (and at least
+    STOP_GRAM_MIN) are not used for typo matching.
+    """
+
+    def __init__(self, candidates, **kwargs):
+        """RankedMatcher class initialization method.
+
+        Args:
+            candidates (list) : List with all candidates.
+
+        Keyword Args:
+            limit (int) : Maximum number of results.
+
+            usage (dict) : Dictionary with recent usage for candidates, with\
+                    values from 0 to 1.
+        """
+        kwargs.setdefault('limit', RANKED_LIMIT)
+        kwargs.setdefault('ngrams', True)
+        super(RankedMatcher, self).__init__(candidates, **kwargs)
+        self.usage = kwargs.get('usage', None) or {}
+        # Usage is updated by the CLI thread while completions run in the
+        # prompt_toolkit thread.
+        self.__lock = threading.Lock()
+        self.__top = max(self.usage.values()) if self.usage else 1.0
+        self.__chars = {}
+        for i, candidate in enumerate(self.candidates):
+            for char in set(candidate):
+                self.__chars.setdefault(char, array('I')).append(i)
+
+    def _position(self, candidate):
+        """Internal method that returns the position for a candidate.
+
+        Args:
+            candidate (str) : Candidate string.
+
+        Returns:
+            int : Candidate position, None if it is not a candidate.
+        """
+        i = bisect_left(self.candidates, candidate)
+        if i < len(self.candidates) and self.candidates[i] == candidate:
+            return i
+        return None
+
+    def touch(self, candidate):
+        """Marks the given candidate as the most recently used.
+
+        Usage values are relative to the most recent one, so any other
+        candidate becomes a bit older.
+
+        Args:
+            candidate (str) : Candidate string.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.__top += 1.0 / max(len(self.usage), 1)
+            self.usage[candidate] = self.__top
+
+    def _score(self, i, tier, quality):
+        """Internal method that returns the score for a candidate.
+
+        Args:
+            i (int) : Candidate position.
+
+            tier (int) : Match tier.
+
+            quality (float) : Match quality inside the tier, from 0 to 1.
+
+        Returns:
+            float : Candidate score.
+        """
+        usage = self.usage.get(self.candidates[i], 0.0) / self.__top
+        return tier + quality + USAGE_WEIGHT * usage
+
+    def _subsequence_ids(self, text):
+        """Internal method that returns candidates that contain all text
+        characters, using character posting lists.
+
+        Args:
+            text (str) : String to match.
+
+        Returns:
+            set : Set with candidate positions.
+        """
+        postings = sorted((self.__chars.get(x, ()) for x in set(text)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        # Only the two rarest characters are used as filter, the rest of them
+        # are checked matching the candidate.
+        ids = set(postings[0])
+        if len(postings) > 1:
+            ids.intersection_update(postings[1])
+        return ids
+
+    def complete(self, text, mode=None, limit=None):
+        """Returns the best candidates for the given text.
+
+        Args:
+            text (str) : String to match, blank returns most recently used\
+                    candidates first.
+
+            mode (str) : Not used, it is kept for CompletionIndex\
+                    compatibility.
+
+            limit (int) : Maximum number of results, default limit is used if\
+                    None.
+
+        Returns:
+            list : List with matching candidates, best match first.
+        """
+        limit = self.limit if limit is None else limit
+        text = text.strip()
+        scores = {}
+
+        # Prefix matches are a range. Only the first entries in the range
+        # and the ones recently used can be in the top results.
+        lo, hi = self.prefix_range(text)
+        with self.__lock:
+            used = [x for x in self.usage if x.startswith(text)]
+        used = [self._position(x) for x in used]
+        for i in [x for x in used if x is not None] + list(range(lo, min(hi, lo + limit))):
+            scores[i] = self._score(i, PREFIX_TIER, float(len(text)) / len(self.candidates[i]))
+
+        if text and len(scores) < limit:
+            for i in self._substring_ids(text):
+                if i not in scores:
+                    scores[i] = self._score(i, SUBSTRING_TIER, float(len(text)) / len(self.candidates[i]))
+
+        if text and len(scores) < limit:
+            pattern = re.compile('(?=({0}))'.format('.*?'.join(re.escape(x) for x in text)))
+            candidates, usage = self.candidates, self.usage
+            ids = heapq.nsmallest(SUBSEQUENCE_SCAN, self._subsequence_ids(text),
+                                  key=lambda i: (-usage.get(candidates[i], 0.0), len(candidates[i]), i))
+            for i in ids:
+                if i in scores:
+                    continue
+                spans = [len(x) for x in pattern.findall(self.candidates[i])]
+                if spans:
+                    scores[i] = self._score(i, SUBSEQUENCE_TIER, float(len(text)) / min(spans))
+
+        if len(text) >= NGRAM_SIZE and len(scores) < limit:
+            # Jaccard similarity between text and candidate n-grams.
+            total = len(ngrams(text))
+            maxlen = max(int(len(self.candidates) * STOP_GRAM_RATIO), STOP_GRAM_MIN)
+            for i, counter in self._shared_ngrams(text, maxlen).items():
+                if i not in scores:
+                    union = total + len(self.candidates[i]) - NGRAM_SIZE + 1 - counter
+                    scores[i] = self._score(i, TYPO_TIER, float(counter) / union)
+
+        best = heapq.nsmallest(limit, scores, key=lambda i: (-scores[i], i))
+        return [self.candidates[i] for i in best]
@@ -9,11 +9,15 @@ __docformat__ = 'restructuredtext en'
 #             |_|
 # -----------------------------------------------------------------------------
 #
+import time
 from functools import wraps
+import inspect
 import jc2li.cliparser as cliparser
 from jc2li.arguments import Argument, Arguments
-from jc2li.common import ARGOS_ATTR, RULES_ATTR, SYNTAX_ATTR, CMD_ATTR, TREE_ATTR
+from jc2li.common import ARGOS_ATTR, RULES_ATTR, SYNTAX_ATTR, CMD_ATTR, TREE_ATTR, ARITY_ATTR, BUILD_TREE_ATTR
 from jc2li.journal import Journal
+from jc2li.rules import RuleHandler as RH
+from jc2li.tracing import TOKENIZED, CALLBACK_STARTED
 
 
 # -----------------------------------------------------------------------------
@@ -27,6 +31,10 @@ from jc2li.journal import Journal
 #
 MODULE = 'CLI.decorator'
 
+# Parsing trees are built when commands are decorated, unless they are
+# deferred with defer_trees.
+_DEFER_TREES = False
+
 
 # -----------------------------------------------------------------------------
 #            _                     _   _
@@ -37,6 +45,24 @@ MODULE = 'CLI.decorator'
 #
 # -----------------------------------------------------------------------------
 #
+def defer_trees(defer=True):
+    """Sets if parsing trees for commands decorated from now on are built
+    the first time they are required, instead of when they are decorated.
+
+    It is used when commands are matched against a compiled command catalog,
+    so only trees for commands being completed are built.
+
+    Args:
+        defer (bool) : True to defer parsing trees, False to build them when\
+                commands are decorated.
+
+    Returns:
+        None
+    """
+    global _DEFER_TREES
+    _DEFER_TREES = defer
+
+
 def argo(name, type, default, **kwargs):
     """Decorator that provides to add an argument to a command.
 
@@ -46,6 +72,9 @@ def argo(name, type, default, **kwargs):
         type (object) : argument type, it should be a class name.
         default (object) : default value for the argument.
         completer (object) : argument completer instance
+        container (str) : "array" or "numpy" to receive values entered for\
+                a numeric argument in a typed array, even if it is entered\
+                once. The default value is passed as it is.
 
     Returns:
         func : Function wrapper.
@@ -158,20 +187,74 @@ def setsyntax(f):
 
     journal = Journal()
 
-    @wraps(f)
-    def _wrapper(self, line):
+    def _parse_arguments(self, line):
         if getattr(f, RULES_ATTR, None) is None:
             use_args, cli_args = journal.build_command_arguments_from_args(f, line)
+            tracer = getattr(self, 'tracer', None)
+            if tracer is not None and tracer.active:
+                tracer.emit(TOKENIZED, tokens=cli_args)
         else:
             cli_args = None
             use_args = journal.build_command_arguments_from_syntax(f, self, line)
-        if use_args is not None:
-            if cli_args:
-                return f(self, *use_args, cli_args)
-            else:
+        if use_args is not None and cli_args:
+            use_args = list(use_args) + [cli_args, ]
+        return use_args
+
+    # Time parsing the command line is reported to the CLI metrics, if they
+    # are enabled, so it can be told apart from the command execution.
+    def _build_arguments(self, line):
+        metrics = getattr(self, 'metrics', None)
+        if metrics is None or not metrics.enabled:
+            return _parse_arguments(self, line)
+        start = time.perf_counter()
+        try:
+            return _parse_arguments(self, line)
+        finally:
+            metrics.parsed(time.perf_counter() - start)
+
+    def _started(self):
+        tracer = getattr(self, 'tracer', None)
+        if tracer is not None and tracer.active:
+            tracer.emit(CALLBACK_STARTED, function=f.__qualname__)
+
+    # Commands defined with "async def" keep being coroutine functions, so
+    # the CLI can await them in its own event loop.
+    if inspect.iscoroutinefunction(inspect.unwrap(f)):
+
+        @wraps(f)
+        async def _wrapper(self, line):
+            use_args = _build_arguments(self, line)
+            if use_args is not None:
+                _started(self)
+                return await f(self, *use_args)
+
+    else:
+
+        @wraps(f)
+        def _wrapper(self, line):
+            use_args = _build_arguments(self, line)
+            if use_args is not None:
+                _started(self)
                 return f(self, *use_args)
 
-    if getattr(_wrapper, RULES_ATTR, None) is not None:
-        root = journal.build_command_parsing_tree(f)
-        setattr(_wrapper, TREE_ATTR, root)
+    def _build_tree():
+        with getattr(f, ARGOS_ATTR).lock:
+            root = getattr(f, TREE_ATTR, None)
+            if root is None:
+                root = journal.build_command_parsing_tree(f)
+            setattr(_wrapper, TREE_ATTR, root)
+            setattr(_wrapper, ARITY_ATTR, getattr(f, ARITY_ATTR, None))
+        return root
+
+    rules = getattr(_wrapper, RULES_ATTR, None)
+    if rules is not None:
+        if _DEFER_TREES and getattr(f, ARGOS_ATTR, None):
+            arity = RH.syntax_arity(rules)
+            for func in (f, _wrapper):
+                setattr(func, ARITY_ATTR, arity)
+                setattr(func, BUILD_TREE_ATTR, _build_tree)
+        else:
+            root = journal.build_command_parsing_tree(f)
+            setattr(_wrapper, TREE_ATTR, root)
+            setattr(_wrapper, ARITY_ATTR, getattr(f, ARITY_ATTR, None))
     return _wrapper
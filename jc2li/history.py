@@ -0,0 +1,592 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import os
+import json
+import heapq
+import datetime
+import threading
+from bisect import bisect_left
+from array import array
+from collections import OrderedDict
+from prompt_toolkit.history import History
+from prompt_toolkit.auto_suggest import AutoSuggest, Suggestion
+from jc2li.completion import prefix_upper_bound
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.history'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+HISTORY_FILE = 'history.txt'
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 1
+INDEX_SIZE = 200000
+DELTA_SIZE = 1024
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def load_history_file(filename, offset=0, size=None):
+    """Loads all entries in a history file with prompt_toolkit FileHistory
+    format.
+
+    Every entry is a comment line with the timestamp followed by one line
+    for every line in the entry, starting with "+".
+
+    Args:
+        filename (str) : String with the history filename.
+
+        offset (int) : Byte offset where entries are read from.
+
+        size (int) : Byte offset where entries are read up to, None to read\
+                up to the end of the file.
+
+    Returns:
+        list : List with all entries, oldest first.
+    """
+    strings = []
+    if not os.path.exists(filename):
+        return strings
+    with open(filename, 'rb') as f:
+        f.seek(offset)
+        data = f.read(-1 if size is None else max(size - offset, 0)).decode('utf-8')
+    lines = []
+    for line in data.split('\n'):
+        if line.startswith('+'):
+            lines.append(line[1:])
+        elif lines:
+            strings.append('\n'.join(lines))
+            lines = []
+    if lines:
+        strings.append('\n'.join(lines))
+    return strings
+
+
+def build_max_tree(values):
+    """Builds a segment tree to find the position of the maximum value in any
+    range.
+
+    Args:
+        values (array) : Array with all values.
+
+    Returns:
+        array : Array with the tree, every node has the position of the\
+                maximum value under it, and leaves are at [len(values), 2 *\
+                len(values)).
+    """
+    n = len(values)
+    tree = array('q', [0] * n)
+    tree.extend(range(n))
+    for i in range(n - 1, 0, -1):
+        left, right = tree[2 * i], tree[2 * i + 1]
+        tree[i] = left if values[left] >= values[right] else right
+    return tree
+
+
+def range_argmax(tree, values, lo, hi):
+    """Returns the position for the maximum value in the given range.
+
+    Args:
+        tree (array) : Segment tree built with build_max_tree.
+
+        values (array) : Array with all values.
+
+        lo (int) : First position in the range.
+
+        hi (int) : Last position (not included) in the range.
+
+    Returns:
+        int : Position for the maximum value, None if the range is empty.
+    """
+    best = None
+    n = len(values)
+    lo, hi = lo + n, hi + n
+    while lo < hi:
+        if lo & 1:
+            if best is None or values[tree[lo]] > values[best]:
+                best = tree[lo]
+            lo += 1
+        if hi & 1:
+            hi -= 1
+            if best is None or values[tree[hi]] > values[best]:
+                best = tree[hi]
+        lo >>= 1
+        hi >>= 1
+    return best
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class HistoryLines(object):
+    """HistoryLines class is a copy-on-write view of the history entries.
+
+    prompt_toolkit copies all history entries every time the input buffer
+    is reset. Copying a view only keeps a reference to the entries and the
+    number of them, and any entry changed or appended is kept in the view.
+    """
+
+    def __init__(self, strings, length=None):
+        """HistoryLines class initialization method.
+
+        Args:
+            strings (list) : List with history entries, it is not modified.
+
+            length (int) : Number of entries in the view, all of them if None.
+        """
+        self.__strings = strings
+        self.__length = len(strings) if length is None else length
+        self.__changed = {}
+        self.__appended = []
+
+    def __len__(self):
+        return self.__length + len(self.__appended)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key == slice(None, None, None) and not self.__changed and not self.__appended:
+                return HistoryLines(self.__strings, self.__length)
+            return [self[i] for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError('history index out of range')
+        if key >= self.__length:
+            return self.__appended[key - self.__length]
+        return self.__changed.get(key, self.__strings[key])
+
+    def __setitem__(self, key, value):
+        if key < 0:
+            key += len(self)
+        if key >= self.__length:
+            self.__appended[key - self.__length] = value
+        else:
+            self.__changed[key] = value
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, value):
+        """Appends a new entry to the view.
+
+        Args:
+            value (str) : Entry to append.
+
+        Returns:
+            None
+        """
+        self.__appended.append(value)
+
+
+# -----------------------------------------------------------------------------
+#
+class LazyFileHistory(History):
+    """LazyFileHistory class stores history entries in a file, with the same
+    format used by prompt_toolkit FileHistory.
+
+    The file is not read until entries are required, and new entries are
+    appended to the file without reading or writing it again. Entries
+    appended before the file is read are kept in a pending tail, and they
+    are added after the entries in the file when it is read. The strings
+    attribute is a :class:`HistoryLines` view, so it can be copied by the
+    input buffer for every prompt without copying all entries.
+    """
+
+    def __init__(self, filename=HISTORY_FILE):
+        """LazyFileHistory class initialization method.
+
+        Args:
+            filename (str) : String with the history filename.
+        """
+        self.filename = filename
+        self.__strings = None
+        self.__pending = []
+        self.__size = None
+        self.__index = None
+        self.__lock = threading.Lock()
+
+    @property
+    def index(self):
+        """Get property that returns the prefix index for the history.
+
+        Returns:
+            HistoryIndex : History index instance.
+        """
+        if self.__index is None:
+            self.__index = HistoryIndex(self.filename)
+        return self.__index
+
+    def is_loaded(self):
+        """Returns if entries have been read from the file.
+
+        Returns:
+            bool : True if the file has been read, False else.
+        """
+        return self.__strings is not None
+
+    def _load(self):
+        """Internal method that reads the history file if it was not read.
+
+        Returns:
+            list : List with all entries.
+        """
+        if self.__strings is None:
+            with self.__lock:
+                if self.__strings is None:
+                    strings = load_history_file(self.filename, size=self.__size)
+                    strings.extend(self.__pending)
+                    self.__strings = strings
+                    self.__pending = []
+        return self.__strings
+
+    @property
+    def strings(self):
+        """Get property that returns a view with all history entries.
+
+        Returns:
+            HistoryLines : View with all entries.
+        """
+        return HistoryLines(self._load())
+
+    def append(self, string):
+        """Appends a new entry to the history and to the history file.
+
+        Args:
+            string (str) : Entry to append.
+
+        Returns:
+            None
+        """
+        lines = ['\n# {}\n'.format(datetime.datetime.now())]
+        lines.extend('+{}\n'.format(line) for line in string.split('\n'))
+        with self.__lock:
+            # Only the file up to the first pending entry is read later.
+            if self.__strings is not None:
+                self.__strings.append(string)
+            else:
+                if not self.__pending:
+                    self.__size = os.path.getsize(self.filename) if os.path.exists(self.filename) else 0
+                self.__pending.append(string)
+            with open(self.filename, 'ab') as f:
+                f.write(''.join(lines).encode('utf-8'))
+        if self.__index is not None:
+            self.__index.add(string)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+
+# -----------------------------------------------------------------------------
+#
+class HistoryIndex(object):
+    """HistoryIndex class provides prefix search over history entries, most
+    recently used entries first.
+
+    Unique entries are kept in a sorted list, so entries with a prefix are a
+    contiguous range, and a segment tree over the recency of every entry
+    returns the most recent entry in any range. Entries added after the
+    index was built are kept in a small LRU delta, which is newer than
+    anything in the sorted list, so it is checked first. When the delta is
+    full, it is merged and the index is built again.
+
+    Only the most recent INDEX_SIZE unique entries are indexed. The index is
+    saved next to the history file, and only entries appended to the history
+    file after it was saved are read when it is loaded.
+    """
+
+    def __init__(self, filename=HISTORY_FILE, **kwargs):
+        """HistoryIndex class initialization method.
+
+        The index is not loaded or built until it is required.
+
+        Args:
+            filename (str) : String with the history filename.
+
+        Keyword Args:
+            maxsize (int) : Maximum number of unique entries indexed.
+
+            delta_size (int) : Maximum number of entries in the delta.
+
+            index_filename (str) : String with the index filename.
+        """
+        self.filename = filename
+        self.maxsize = kwargs.get('maxsize', INDEX_SIZE)
+        self.delta_size = kwargs.get('delta_size', DELTA_SIZE)
+        self.index_filename = kwargs.get('index_filename', filename + INDEX_SUFFIX)
+        self.__entries = None
+        self.__recency = None
+        self.__tree = None
+        self.__delta = OrderedDict()
+        self.__count = 0
+        self.__lock = threading.RLock()
+
+    def __len__(self):
+        self._ensure()
+        return len(self.__entries) + len(self.__delta)
+
+    def _ensure(self):
+        """Internal method that loads or builds the index if it is not ready.
+
+        Returns:
+            None
+        """
+        if self.__entries is not None:
+            return
+        with self.__lock:
+            if self.__entries is None and not self.load():
+                strings = load_history_file(self.filename)
+                self._build(zip(strings, range(len(strings))))
+                self.__count = len(strings)
+                self.save()
+
+    def _build(self, pairs):
+        """Internal method that builds the index for the given entries.
+
+        Args:
+            pairs (iterator) : Iterator with an entry and its recency, newer\
+                    entries have higher recency.
+
+        Returns:
+            None
+        """
+        latest = {}
+        for entry, recency in pairs:
+            if latest.get(entry, -1) < recency:
+                latest[entry] = recency
+        if len(latest) > self.maxsize:
+            latest = dict(heapq.nlargest(self.maxsize, latest.items(), key=lambda x: x[1]))
+        self.__entries = sorted(latest)
+        self.__recency = array('q', (latest[x] for x in self.__entries))
+        self.__tree = build_max_tree(self.__recency)
+        self.__delta = OrderedDict()
+
+    def load(self):
+        """Loads the index saved next to the history file.
+
+        Entries appended to the history file after the index was saved are
+        added to the index.
+
+        Returns:
+            bool : True if the index was loaded, False if it was not found or\
+                    it is not valid for the history file.
+        """
+        try:
+            with open(self.index_filename, 'rb') as f:
+                header = json.loads(f.readline().decode('utf-8'))
+                if header.get('version') != INDEX_VERSION or header['size'] > os.path.getsize(self.filename):
+                    return False
+                entries = json.loads(f.readline().decode('utf-8'))
+                recency = array('q')
+                recency.frombytes(f.read(len(entries) * recency.itemsize))
+                tree = array('q')
+                tree.frombytes(f.read())
+        except (OSError, ValueError, KeyError) as ex:
+            LOGGER.debug('History index <{0}> not loaded: {1}'.format(self.index_filename, ex))
+            return False
+        if len(recency) != len(entries) or len(tree) != 2 * len(entries):
+            return False
+        with self.__lock:
+            self.__entries, self.__recency, self.__tree = entries, recency, tree
+            self.__delta = OrderedDict()
+            self.__count = header['count']
+            for entry in load_history_file(self.filename, header['size']):
+                self.add(entry)
+        return True
+
+    def save(self):
+        """Saves the index next to the history file.
+
+        Entries in the delta are not saved, they are read again from the
+        history file when the index is loaded.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            if self.__delta:
+                self._merge()
+            size = os.path.getsize(self.filename) if os.path.exists(self.filename) else 0
+            header = {'version': INDEX_VERSION, 'size': size, 'count': self.__count}
+            temporary = '{}.tmp'.format(self.index_filename)
+            try:
+                with open(temporary, 'wb') as f:
+                    f.write('{}\n'.format(json.dumps(header)).encode('utf-8'))
+                    f.write('{}\n'.format(json.dumps(self.__entries)).encode('utf-8'))
+                    f.write(self.__recency.tobytes())
+                    f.write(self.__tree.tobytes())
+                os.replace(temporary, self.index_filename)
+            except OSError as ex:
+                LOGGER.error('History index <{0}> not saved: {1}'.format(self.index_filename, ex))
+
+    def _merge(self):
+        """Internal method that merges the delta and builds the index again.
+
+        Returns:
+            None
+        """
+        pairs = list(zip(self.__entries, self.__recency))
+        pairs.extend(self.__delta.items())
+        self._build(pairs)
+
+    def add(self, entry):
+        """Adds a new entry as the most recent one.
+
+        Args:
+            entry (str) : History entry.
+
+        Returns:
+            None
+        """
+        self._ensure()
+        with self.__lock:
+            self.__delta.pop(entry, None)
+            self.__delta[entry] = self.__count
+            self.__count += 1
+            if len(self.__delta) > self.delta_size:
+                self.save()
+
+    def _prefix_range(self, prefix):
+        """Internal method that returns the range of indexed entries starting
+        with the given prefix.
+
+        Args:
+            prefix (str) : Prefix to match.
+
+        Returns:
+            tuple : Pair with first and last (not included) positions.
+        """
+        lo = bisect_left(self.__entries, prefix)
+        upper = prefix_upper_bound(prefix)
+        hi = len(self.__entries) if upper is None else bisect_left(self.__entries, upper, lo)
+        return lo, hi
+
+    def search(self, prefix, limit=None):
+        """Returns entries starting with the given prefix, most recent first.
+
+        Args:
+            prefix (str) : Prefix to match.
+
+            limit (int) : Maximum number of results, None for all.
+
+        Returns:
+            list : List with matching entries.
+        """
+        self._ensure()
+        with self.__lock:
+            entries, recency, tree = self.__entries, self.__recency, self.__tree
+            result = [x for x in reversed(self.__delta) if x.startswith(prefix)]
+            if limit is not None and len(result) >= limit:
+                return result[:limit]
+            # Best-first search: every range in the heap is represented by
+            # its most recent entry, which is returned when it is popped and
+            # the rest of the range is split in two.
+            heap = []
+
+            def _push(lo, hi):
+                i = range_argmax(tree, recency, lo, hi)
+                if i is not None:
+                    heapq.heappush(heap, (-recency[i], i, lo, hi))
+
+            _push(*self._prefix_range(prefix))
+            while heap and (limit is None or len(result) < limit):
+                _, i, lo, hi = heapq.heappop(heap)
+                if entries[i] not in self.__delta:
+                    result.append(entries[i])
+                _push(lo, i)
+                _push(i + 1, hi)
+            return result
+
+    def suggest(self, prefix):
+        """Returns the most recent entry starting with the given prefix and
+        longer than it.
+
+        Args:
+            prefix (str) : Prefix to match.
+
+        Returns:
+            str : Matching entry, None if it is not found.
+        """
+        self._ensure()
+        with self.__lock:
+            for entry in reversed(self.__delta):
+                if entry.startswith(prefix) and entry != prefix:
+                    return entry
+            lo, hi = self._prefix_range(prefix)
+            if lo < hi and self.__entries[lo] == prefix:
+                lo += 1
+            i = range_argmax(self.__tree, self.__recency, lo, hi)
+            return None if i is None else self.__entries[i]
+
+
+# -----------------------------------------------------------------------------
+#
+class AutoSuggestFromIndex(AutoSuggest):
+    """AutoSuggestFromIndex class gives suggestions from the most recent
+    history entry starting with the current input, using the history index.
+    """
+
+    def __init__(self, index):
+        """AutoSuggestFromIndex class initialization method.
+
+        Args:
+            index (HistoryIndex) : History index instance.
+        """
+        self.index = index
+
+    def get_suggestion(self, cli, buffer, document):
+        """Returns the suggestion for the current input.
+
+        Args:
+            cli (:class:`CommandLineInterface`) : Command line interface.
+
+            buffer (:class:`Buffer`) : Input buffer.
+
+            document (:class:`Document`) : Document with the input being entered.
+
+        Returns:
+            :class:`Suggestion` : Suggestion instance, None if there is not any.
+        """
+        text = document.text.rsplit('\n', 1)[-1]
+        if text.strip():
+            entry = self.index.suggest(text)
+            if entry is not None:
+                return Suggestion(entry[len(text):])
+        return None
@@ -0,0 +1,271 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import threading
+import asyncio
+from collections import OrderedDict
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.jobs'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+RUNNING = 'Running'
+DONE = 'Done'
+FAILED = 'Failed'
+CANCELLED = 'Cancelled'
+
+_current = threading.local()
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def current_job():
+    """Returns the job running in the current thread.
+
+    Long running commands can use it to check if the job has been cancelled.
+
+    Returns:
+        Job : Job instance, None if the thread is not running a job.
+    """
+    return getattr(_current, 'job', None)
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class Job(object):
+    """Job class runs a command in a background thread.
+
+    All output generated by the command is redirected to a job buffer, which
+    is displayed when the job is attached. Commands defined as coroutine
+    functions run in an event loop owned by the job thread.
+    """
+
+    def __init__(self, jid, line, target):
+        """Job class initialization method.
+
+        Args:
+            jid (int) : Job identifier.
+
+            line (str) : Command line being executed by the job.
+
+            target (:any:`function`) : Callable that executes the command.
+        """
+        self.jid = jid
+        self.line = line
+        self.buffer = []
+        self.result = None
+        self.error = None
+        self.__target = target
+        self.__read = 0
+        self.__cancelled = threading.Event()
+        self.__loop = None
+        self.__task = None
+        self.__thread = threading.Thread(target=self._run, name='job-{}'.format(jid))
+        self.__thread.daemon = True
+
+    @property
+    def status(self):
+        """Get property that returns the job status.
+
+        Returns:
+            str : Job status.
+        """
+        if self.__thread.is_alive():
+            return RUNNING
+        elif self.__cancelled.is_set():
+            return CANCELLED
+        elif self.error is not None:
+            return FAILED
+        return DONE
+
+    def start(self):
+        """Starts running the job.
+
+        Returns:
+            None
+        """
+        self.__thread.start()
+
+    def _run(self):
+        """Internal method that runs the job command in the job thread.
+
+        Returns:
+            None
+        """
+        _current.job = self
+        loggerator.redirect_thread_out_to(self.buffer)
+        try:
+            if self.__cancelled.is_set():
+                return
+            result = self.__target()
+            if asyncio.iscoroutine(result):
+                self.__loop = asyncio.new_event_loop()
+                self.__task = self.__loop.create_task(result)
+                # cancel() could have been called before the task existed.
+                if self.__cancelled.is_set():
+                    self.__task.cancel()
+                result = self.__loop.run_until_complete(self.__task)
+            self.result = result
+        except asyncio.CancelledError:
+            self.__cancelled.set()
+        except Exception as ex:
+            self.error = ex
+            self.buffer.append('{}\n'.format(ex))
+        finally:
+            loggerator.stop_thread_redirect_out()
+            _current.job = None
+            if self.__loop is not None:
+                self.__loop.close()
+
+    def is_alive(self):
+        """Returns if the job is still running.
+
+        Returns:
+            bool : True if the job is running, False else.
+        """
+        return self.__thread.is_alive()
+
+    def is_cancelled(self):
+        """Returns if the job has been cancelled.
+
+        Returns:
+            bool : True if the job was cancelled, False else.
+        """
+        return self.__cancelled.is_set()
+
+    def join(self, timeout=None):
+        """Waits until the job finishes or the timeout expires.
+
+        Args:
+            timeout (float) : Time to wait in seconds, None waits forever.
+
+        Returns:
+            bool : True if the job has finished, False else.
+        """
+        self.__thread.join(timeout)
+        return not self.__thread.is_alive()
+
+    def cancel(self):
+        """Cancels the job.
+
+        Coroutine commands are cancelled at their next await. Any other
+        command has to check :func:`current_job` to find if it was cancelled.
+
+        Returns:
+            None
+        """
+        self.__cancelled.set()
+        loop, task = self.__loop, self.__task
+        if loop is not None and task is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+
+    def read_output(self):
+        """Returns job output not read yet.
+
+        Returns:
+            str : String with all output not read in previous calls.
+        """
+        end = len(self.buffer)
+        output = ''.join(self.buffer[self.__read:end])
+        self.__read = end
+        return output
+
+
+# -----------------------------------------------------------------------------
+#
+class Jobs(object):
+    """Jobs class keeps the table with all jobs started in the CLI.
+    """
+
+    def __init__(self):
+        """Jobs class initialization method.
+        """
+        self.__jobs = OrderedDict()
+        self.__next_jid = 1
+
+    def start(self, line, target):
+        """Creates and starts a new job.
+
+        Args:
+            line (str) : Command line being executed by the job.
+
+            target (:any:`function`) : Callable that executes the command.
+
+        Returns:
+            Job : New job instance.
+        """
+        job = Job(self.__next_jid, line, target)
+        self.__next_jid += 1
+        self.__jobs[job.jid] = job
+        job.start()
+        return job
+
+    def get(self, jid):
+        """Returns the job for the given job identifier.
+
+        Args:
+            jid (int) : Job identifier.
+
+        Returns:
+            Job : Job instance, None if the job is not found.
+        """
+        return self.__jobs.get(jid, None)
+
+    def last(self):
+        """Returns the last job started.
+
+        Returns:
+            Job : Job instance, None if there are not jobs.
+        """
+        return next(reversed(self.__jobs.values()), None)
+
+    def remove(self, jid):
+        """Removes the job for the given job identifier from the table.
+
+        Args:
+            jid (int) : Job identifier.
+
+        Returns:
+            Job : Job removed, None if the job is not found.
+        """
+        return self.__jobs.pop(jid, None)
+
+    def traverse(self):
+        """Returns all jobs in the table.
+
+        Returns:
+            :any:`list` : List with all jobs.
+        """
+        return list(self.__jobs.values())
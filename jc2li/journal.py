@@ -9,11 +9,15 @@ __docformat__ = 'restructuredtext en'
 #             |_|
 # -----------------------------------------------------------------------------
 #
-import shlex
+from collections import OrderedDict
+import jc2li.tokenizer as tokenizer
+from jc2li.tokenizer import TokenLine, TokenizerError
 from jc2li.rules import RuleHandler as RH
-from jc2li.common import ARGOS_ATTR, RULES_ATTR, TREE_ATTR
+from jc2li.common import ARGOS_ATTR, RULES_ATTR, TREE_ATTR, ARITY_ATTR, BUILD_TREE_ATTR
 from jc2li.node import Start
-from jc2li.clierror import CliException
+from jc2li.clierror import CliException, ARITY_KIND, ARGUMENT_KIND
+from jc2li.cache import Cache, CACHE_SIZE
+from jc2li.tracing import TOKENIZED, TREE_MATCHED, ARGS_CONVERTED
 import jc2li.loggerator as loggerator
 
 
@@ -30,6 +34,36 @@ MODULE = 'CLI.journal'
 logger = loggerator.getLoggerator(MODULE)
 
 
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def get_command_tree(func):
+    """Returns the parsing tree for a command function.
+
+    Trees deferred by setsyntax are built the first time they are required.
+
+    Args:
+        func (function) : command function.
+
+    Returns:
+        Node : root node for the parsing tree, None if the command has not\
+                any syntax.
+    """
+    root = getattr(func, TREE_ATTR, None)
+    if root is None:
+        build_tree = getattr(func, BUILD_TREE_ATTR, None)
+        if build_tree is not None:
+            root = build_tree()
+            setattr(func, TREE_ATTR, root)
+    return root
+
+
 # -----------------------------------------------------------------------------
 #       _                     _       __ _       _ _   _
 #   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
@@ -45,18 +79,25 @@ class Journal(object):
     the command line with command arguments.
     """
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         """Journal class initialization method.
+
+        Keyword Args:
+            cache_size (int) : Maximum number of entries in the cache.
+            cache_ttl (float) : Default time to live for cache entries.
         """
         self.path = list()
         self.argos = dict()
         self.traverse_node = None
         self.root = None
-        self.__cache = {}
+        self.__cache = Cache(kwargs.get('cache_size', CACHE_SIZE), kwargs.get('cache_ttl', None))
 
     def get_from_cache(self, key):
         """Retreives some data to the cache.
 
+        If the data is stale and it has a loader, the stale data is returned
+        while it is refreshed in background.
+
         Args:
             key (object) : key for the cached data to be retrieved.
 
@@ -65,7 +106,7 @@ class Journal(object):
         """
         return self.__cache.get(key, None)
 
-    def set_to_cache(self, key, value):
+    def set_to_cache(self, key, value, ttl=None):
         """Adds cache data for the given key.
 
         If the key already exits, the data is being overwritten.
@@ -73,8 +114,28 @@ class Journal(object):
         Args:
             key (object) : key for the data to be cached.
             value (object) : data being cached.
+            ttl (float) : time to live in seconds for the data.
+        """
+        self.__cache.set(key, value, ttl)
+
+    def set_cache_loader(self, key, loader, ttl=None):
+        """Registers a function that loads cache data for the given key.
+
+        Args:
+            key (object) : key for the data to be cached.
+            loader (:any:`function`) : function without arguments that\
+                    returns data for the key.
+            ttl (float) : time to live in seconds for the data loaded.
         """
-        self.__cache[key] = value
+        self.__cache.set_loader(key, loader, ttl)
+
+    def cache_stats(self):
+        """Returns cache counters.
+
+        Returns:
+            :any:`dict` : Dictionary with cache counters.
+        """
+        return self.__cache.stats()
 
     def add_node(self, node):
         """Method that adds a new node.
@@ -91,6 +152,9 @@ class Journal(object):
         """Build the command parsing tree using the command arguments and the
         command syntax.
 
+        Arity facts for the command are computed from the syntax at the same
+        time, so every command execution can check them.
+
         Args:
             f (function): command function.
 
@@ -107,6 +171,7 @@ class Journal(object):
                 new_trav = trav.build_children_node_from_rule(rule, argos)
                 trav = new_trav
             setattr(f, TREE_ATTR, root)
+            setattr(f, ARITY_ATTR, RH.syntax_arity(rules))
             return root
         raise CliException(MODULE, "Building Command Parsing Tree: arguments not defined")
 
@@ -115,6 +180,10 @@ class Journal(object):
         provided by @argo and @argos decorators; and the arguments passed by
         the user in the command line.
 
+        Without any instance, the line is being entered, so an unterminated
+        quote closes at the end of the line. Tokens kept in a TokenLine are
+        not split again.
+
         Args:
             f (function) : command function.
             instance (object) : instance for the command function.
@@ -127,17 +196,35 @@ class Journal(object):
         if instance and cmd_argos is None:
             return f(instance, line)
         elif cmd_argos is not None:
-            cmd_argos.index()
+            with cmd_argos.lock:
+                cmd_argos.index()
+            if not isinstance(line, TokenLine):
+                line = TokenLine(line)
             try:
-                if line.count('"') % 2 == 1:
-                    line = line.replace('"', '*')
-                cli_args = shlex.split(line)
-                return cmd_argos, cli_args
-            except ValueError:
-                return None, None
+                cli_args = line.split_tokens(partial=instance is None)
+            except TokenizerError as ex:
+                raise self._error_at(CliException(MODULE, 'Incorrect arguments: {}'.format(ex), kind=ARGUMENT_KIND),
+                                     line, line.offset + ex.position)
+            return cmd_argos, cli_args
         return None, None
 
-    def map_passed_args_to_command_argos(self, root, cmd_argos, cli_args):
+    def _error_at(self, ex, line, column):
+        """Sets the column in the command line for an error, and displays
+        the command line with a mark under that column.
+
+        Args:
+            ex (CliException) : Error in the command line.
+            line (TokenLine) : Command line input.
+            column (int) : Position in the command line for the error.
+
+        Returns:
+            CliException : Error with the column.
+        """
+        ex.column = column
+        logger.error('{0}\n{1}^'.format(line.source, ' ' * column))
+        return ex
+
+    def map_passed_args_to_command_argos(self, root, cmd_argos, cli_args, tracer=None):
         """Using the command arguments and argument values passed by the user
         in the CLI, map those using the command parsing tree in order to generate
         all arguments to be passed to the command function.
@@ -146,19 +233,54 @@ class Journal(object):
             root (node): node where mapping should starts.
             cmd_argos (list): list with command arguments.
             cli_args (list): list with CLI arguments.
+            tracer (Tracer): tracer reporting the tree matched, None if the\
+                    command is not traced.
 
         Returns:
             :any:`list` : List with arguments being used.
         """
         node_path = root.find_path(cli_args)
-        matched_nodes = list()
+        if tracer is not None:
+            tracer.emit(TREE_MATCHED, path=[node.name for node in node_path])
+        # Values entered many times for the same node, like loop arguments,
+        # are typed and stored all at once.
+        node_values = OrderedDict()
         for node, value in zip(node_path, cli_args):
-            arg_value = node.map_arg_to_value(value)
-            node.store_value_in_argo(arg_value, node in matched_nodes)
-            matched_nodes.append(node)
+            values = node_values.get(node, None)
+            if values is None:
+                node_values[node] = [value]
+            else:
+                values.append(value)
+        for node, values in node_values.items():
+            if len(values) == 1:
+                node.store_value_in_argo(node.map_arg_to_value(values[0]))
+            else:
+                node.store_values_in_argo(node.map_args_to_values(values))
         use_args = cmd_argos.get_indexed_values()
         return use_args
 
+    def map_passed_args_with_catalog(self, catalog, command, cmd_argos, cli_args, tracer=None):
+        """Method that maps arguments entered in the CLI with command
+        arguments, matching them against the compiled command catalog, so
+        the command parsing tree is not required.
+
+        Args:
+            catalog (Catalog): compiled command catalog.
+            command (str): command label.
+            cmd_argos (list): list with command arguments.
+            cli_args (list): list with CLI arguments.
+            tracer (Tracer): tracer reporting the tree matched, None if the\
+                    command is not traced.
+
+        Returns:
+            :any:`list` : List with arguments being used.
+        """
+        node_path = catalog.find_path(command, cli_args)
+        if tracer is not None:
+            tracer.emit(TREE_MATCHED, path=[catalog.node_name(i) for i in node_path])
+        catalog.store_values(node_path, cli_args, cmd_argos)
+        return cmd_argos.get_indexed_values()
+
     def build_command_arguments_from_syntax(self, f, instance, line):
         """Method that build arguments to be passed to the command function.
 
@@ -170,18 +292,72 @@ class Journal(object):
         Returns:
             list: list with argument to be passed to the command function.
         """
-        cmd_argos, cli_args = self.get_cmd_and_cli_args(f, instance, line)
+        cmd_argos = getattr(f, ARGOS_ATTR, None)
+        if cmd_argos is None:
+            return self._build_command_arguments_from_syntax(f, instance, line)
+        with cmd_argos.lock:
+            return self._build_command_arguments_from_syntax(f, instance, line)
 
-        root = getattr(f, TREE_ATTR, None)
-        rules = getattr(f, RULES_ATTR, None)
-        if len(cli_args) < RH.syntax_min_args(rules):
-            raise CliException(MODULE, "Number of Args: Too few arguments")
+    def _build_command_arguments_from_syntax(self, f, instance, line):
+        """Internal method that build arguments to be passed to the command
+        function, while the command arguments lock is held.
 
-        use_args = self.map_passed_args_to_command_argos(root, cmd_argos, cli_args)
+        Args:
+            f (function) : command function.
+            instance (object) : instance for the command function.
+            line (str) : string with the command line input.
+
+        Returns:
+            list: list with argument to be passed to the command function.
+        """
+        tracer = getattr(instance, 'tracer', None)
+        if tracer is not None and not tracer.active:
+            tracer = None
+        if not isinstance(line, TokenLine):
+            line = TokenLine(line)
+        cmd_argos, cli_args = self.get_cmd_and_cli_args(f, instance, line)
+        if tracer is not None:
+            tracer.emit(TOKENIZED, tokens=cli_args)
+
+        arity = getattr(f, ARITY_ATTR, None)
+        if arity is None:
+            arity = RH.syntax_arity(getattr(f, RULES_ATTR, list()))
+            setattr(f, ARITY_ATTR, arity)
+        if len(cli_args) < arity.min_args:
+            raise self._error_at(CliException(MODULE, "Number of Args: Too few arguments", kind=ARITY_KIND),
+                                 line, len(line.source))
+
+        # Commands in the catalog attached to the CLI are matched against
+        # it, so their parsing trees are never built.
+        catalog = getattr(instance, 'catalog', None)
+        command = getattr(line, 'command', None)
+        if catalog is None or command is None or command not in catalog:
+            catalog = None
+            root = get_command_tree(f)
+        try:
+            # No path in the parsing tree is longer than the maximum, the
+            # tree is walked only to report the first token not found.
+            if arity.max_args is not None and len(cli_args) > arity.max_args:
+                if catalog is None:
+                    root.find_path(cli_args)
+                else:
+                    catalog.find_path(command, cli_args)
+                raise CliException(MODULE, "Number of Args: Too many arguments",
+                                   kind=ARITY_KIND, token=arity.max_args)
+            if catalog is None:
+                use_args = self.map_passed_args_to_command_argos(root, cmd_argos, cli_args, tracer)
+            else:
+                use_args = self.map_passed_args_with_catalog(catalog, command, cmd_argos, cli_args, tracer)
+        except CliException as ex:
+            if ex.token is not None:
+                self._error_at(ex, line, line.column(ex.token))
+            raise
         if use_args is None:
-            raise CliException(MODULE, 'Incorrect arguments"')
+            raise CliException(MODULE, 'Incorrect arguments"', kind=ARGUMENT_KIND)
         if not all(map(lambda x: x is not None, use_args)):
-            raise CliException(MODULE, 'Mandatory argument is not present')
+            raise CliException(MODULE, 'Mandatory argument is not present', kind=ARGUMENT_KIND)
+        if tracer is not None:
+            tracer.emit(ARGS_CONVERTED, args=list(use_args))
 
         return use_args
 
@@ -199,12 +375,13 @@ class Journal(object):
         """
         cmd_argos = getattr(f, ARGOS_ATTR, None)
         if cmd_argos:
-            cmd_argos.index()
-            cli_args = shlex.split(line)
+            cli_args = list(line.tokens) if isinstance(line, TokenLine) else tokenizer.split(line)
             cli_args.reverse()
-            for arg in cmd_argos.traverse():
-                arg.value = arg.type._(cli_args.pop())
-            use_args = cmd_argos.get_indexed_values()
+            with cmd_argos.lock:
+                cmd_argos.index()
+                for arg in cmd_argos.traverse():
+                    arg.value = arg.type._(cli_args.pop())
+                use_args = cmd_argos.get_indexed_values()
             if all(map(lambda x: x is not None, use_args)):
                 cli_args.reverse()
                 return use_args, cli_args
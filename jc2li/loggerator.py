@@ -25,6 +25,7 @@ __docformat__ = 'restructuredtext en'
 #
 import os
 import sys
+import threading
 import logging
 import logging.handlers
 import logging.config
@@ -262,6 +263,15 @@ _loggerDB = {}
     request a logger, it returns the already created instance.
 """
 
+_threadOut = threading.local()
+"""
+    :type: threading.local
+
+    This module variable stores the buffer where output has to be redirected
+    for the running thread. It is used to redirect output for commands running
+    in a background thread, for all loggerator instances.
+"""
+
 TRACE_LEVEL = 25
 DISPLAY_LEVEL = 24
 
@@ -276,6 +286,32 @@ DISPLAY_LEVEL = 24
 # -----------------------------------------------------------------------------
 #
 
+# ===========================================================================
+def redirect_thread_out_to(out_buff):
+    """Redirects output from all loggerator instances in the running thread.
+
+    Output is not sent to the standard output, it is only appended to the
+    given buffer.
+
+    Args:
+        out_buff (list) : Buffer where output for the thread is appended.
+
+    Returns:
+        None
+    """
+    _threadOut.buffer = out_buff
+
+
+# ===========================================================================
+def stop_thread_redirect_out():
+    """Stops output redirection for the running thread.
+
+    Returns:
+        None
+    """
+    _threadOut.buffer = None
+
+
 # ===========================================================================
 def getLoggerator(name, color=(BOLD_ON + FG_BLACK)):
     """Returns the loggerator for a given component.
@@ -400,6 +436,10 @@ class Loggerator(object):
         Returns:
             None
         """
+        thread_buffer = getattr(_threadOut, 'buffer', None)
+        if thread_buffer is not None:
+            thread_buffer.append("{}\n".format(message))
+            return
         self.__out.write(str(message))
         self.__out.write('\n')
         if self.__redirect:
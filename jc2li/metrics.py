@@ -0,0 +1,571 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import json
+import threading
+import contextvars
+from array import array
+from collections import OrderedDict
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.metrics'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+# Values are recorded in nanoseconds. Every power of two is split in
+# SUB_BUCKETS linear buckets, so the relative error is below 1/SUB_BUCKETS.
+SIGNIFICANT_BITS = 5
+SUB_BUCKETS = 1 << (SIGNIFICANT_BITS - 1)
+# Values over MAX_BITS bits (about 68 seconds) go to the last bucket.
+MAX_BITS = 36
+MAX_SHIFT = MAX_BITS - SIGNIFICANT_BITS
+BUCKETS = (MAX_SHIFT + 2) * SUB_BUCKETS
+MAX_VALUE = (1 << 63) - 1
+PERCENTILES = (50, 90, 99, 99.9)
+# Times recorded by a thread are added to histograms in batches, two times
+# (parse and execution) for every execution.
+FLUSH_SIZE = 512
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def bucket_indexes(values):
+    """Returns the bucket for every value.
+
+    Args:
+        values (list) : List with values in nanoseconds, not negative.
+
+    Returns:
+        list : List with bucket indexes.
+    """
+    indexes = []
+    append = indexes.append
+    for value in values:
+        shift = value.bit_length() - SIGNIFICANT_BITS
+        if shift <= 0:
+            append(value)
+        elif shift > MAX_SHIFT:
+            append(BUCKETS - 1)
+        else:
+            append(shift * SUB_BUCKETS + (value >> shift))
+    return indexes
+
+
+def bucket_index(value):
+    """Returns the bucket for the given value.
+
+    Args:
+        value (int) : Value in nanoseconds, not negative.
+
+    Returns:
+        int : Bucket index.
+    """
+    return bucket_indexes((value, ))[0]
+
+
+def bucket_range(index):
+    """Returns the range of values for the given bucket.
+
+    Args:
+        index (int) : Bucket index.
+
+    Returns:
+        tuple : Pair with the lowest and the highest value in the bucket.
+    """
+    if index < 2 * SUB_BUCKETS:
+        return index, index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index - shift * SUB_BUCKETS
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class Histogram(object):
+    """Histogram class keeps a latency distribution in a fixed number of
+    buckets, HDR-style.
+
+    Memory does not grow with the number of values recorded, and every
+    percentile is returned with a relative error below 1/SUB_BUCKETS.
+    Minimum and maximum values are exact.
+    """
+
+    def __init__(self):
+        """Histogram class initialization method.
+        """
+        self.counts = array('Q', bytes(8 * BUCKETS))
+        self.count = 0
+        self.total = 0
+        self._min = MAX_VALUE
+        self._max = 0
+
+    @property
+    def min(self):
+        """Get property that returns the minimum value.
+
+        Returns:
+            int : Minimum value in nanoseconds, None if there are not values.
+        """
+        return self._min if self.count else None
+
+    @property
+    def max(self):
+        """Get property that returns the maximum value.
+
+        Returns:
+            int : Maximum value in nanoseconds, None if there are not values.
+        """
+        return self._max if self.count else None
+
+    def record(self, seconds):
+        """Records a value.
+
+        Args:
+            seconds (float) : Value in seconds.
+
+        Returns:
+            None
+        """
+        self.record_ns(int(seconds * 1e9))
+
+    def record_ns(self, value):
+        """Records a value in nanoseconds.
+
+        Args:
+            value (int) : Value in nanoseconds.
+
+        Returns:
+            None
+        """
+        self.record_many([value])
+
+    def record_many(self, values):
+        """Records a list of values in nanoseconds.
+
+        Args:
+            values (list) : List with values in nanoseconds.
+
+        Returns:
+            None
+        """
+        if not values:
+            return
+        values = [x if x > 0 else 0 for x in values]
+        counts = self.counts
+        for index in bucket_indexes(values):
+            counts[index] += 1
+        self.count += len(values)
+        self.total += sum(values)
+        self._min = min(self._min, min(values))
+        self._max = max(self._max, max(values))
+
+    def percentile(self, pct):
+        """Returns the given percentile.
+
+        Args:
+            pct (float) : Percentile to return, from 0 to 100.
+
+        Returns:
+            float : Value in seconds, None if there are not values.
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(-(-pct * self.count // 100)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                low, high = bucket_range(index)
+                value = min(max((low + high) // 2, self._min), self._max)
+                return value / 1e9
+        return self._max / 1e9
+
+    @property
+    def mean(self):
+        """Get property that returns the mean value.
+
+        Returns:
+            float : Mean value in seconds, None if there are not values.
+        """
+        return self.total / self.count / 1e9 if self.count else None
+
+    def merge(self, other):
+        """Adds all values recorded in another histogram.
+
+        Args:
+            other (Histogram) : Histogram to merge.
+
+        Returns:
+            None
+        """
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+
+    def to_dict(self):
+        """Returns a summary of the histogram.
+
+        Returns:
+            :any:`dict` : Dictionary with count, min, mean, max and\
+                    percentiles, in seconds.
+        """
+        summary = OrderedDict([('count', self.count),
+                               ('min', self._min / 1e9 if self.count else None),
+                               ('mean', self.mean),
+                               ('max', self._max / 1e9 if self.count else None)])
+        for pct in PERCENTILES:
+            summary['p{}'.format(pct)] = self.percentile(pct)
+        return summary
+
+
+# -----------------------------------------------------------------------------
+#
+class CommandMetrics(object):
+    """CommandMetrics class keeps counters and histograms for a command.
+
+    Time parsing the command line, in the @setsyntax decorator, and time
+    running the command callback are kept in separate histograms. It is
+    updated only by the Metrics registry, while it holds its lock.
+    """
+
+    def __init__(self, label):
+        """CommandMetrics class initialization method.
+
+        Args:
+            label (str) : Command label.
+        """
+        self.label = label
+        self.count = 0
+        self.errors = OrderedDict()
+        self.parse = Histogram()
+        self.execute = Histogram()
+
+    @property
+    def error_count(self):
+        """Get property that returns the number of failed executions.
+
+        Returns:
+            int : Number of executions that raised an exception.
+        """
+        return sum(self.errors.values())
+
+    def add(self, parse, execute, error=None):
+        """Records a command execution.
+
+        Args:
+            parse (int) : Nanoseconds parsing the command line.
+
+            execute (int) : Nanoseconds running the command callback.
+
+            error (Exception) : Exception raised by the command, if any.
+
+        Returns:
+            None
+        """
+        self.add_many([parse], [execute], [error] if error is not None else [])
+
+    def add_many(self, parse, execute, errors):
+        """Records many command executions.
+
+        Args:
+            parse (list) : List with nanoseconds parsing the command line.
+
+            execute (list) : List with nanoseconds running the command\
+                    callback.
+
+            errors (list) : List with exceptions raised by the command.
+
+        Returns:
+            None
+        """
+        self.count += len(parse)
+        self.parse.record_many(parse)
+        self.execute.record_many(execute)
+        for error in errors:
+            kind = getattr(error, 'kind', None) or type(error).__name__
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def to_dict(self):
+        """Returns all metrics for the command.
+
+        Returns:
+            :any:`dict` : Dictionary with counters and histograms.
+        """
+        return OrderedDict([('count', self.count),
+                            ('errors', OrderedDict(self.errors)),
+                            ('parse', self.parse.to_dict()),
+                            ('exec', self.execute.to_dict())])
+
+
+# -----------------------------------------------------------------------------
+#
+class Metrics(object):
+    """Metrics class is the registry with execution metrics for every
+    command label.
+
+    The @setsyntax decorator reports the time parsing the command line with
+    :meth:`parsed`, and the CLI reports every execution with :meth:`record`,
+    which splits the execution time in parse and exec time. Failed
+    executions are counted by error kind: the kind for a CliException, or
+    the exception class name for any other exception.
+
+    Recording an execution only appends its times to a buffer owned by the
+    current thread, without any lock. Buffers are added to the histograms,
+    under the registry lock, when they are full or when metrics are read.
+    Errors are rare, and they are counted right away.
+
+    The CLI calls :meth:`begin` before every execution, which sets a new
+    holder for the parse time in a context variable. Coroutine commands are
+    parsed inside a task that copies the context, and it still refers to
+    the same holder, so the parse time is not lost, and commands running
+    concurrently in the same event loop do not mix it.
+    """
+
+    def __init__(self, enabled=True):
+        """Metrics class initialization method.
+
+        Args:
+            enabled (bool) : True if metrics are collected.
+        """
+        self.enabled = enabled
+        self.__commands = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__buffers = []
+        self.__parse = contextvars.ContextVar('parse', default=None)
+
+    def __contains__(self, label):
+        self.flush()
+        return label in self.__commands
+
+    def _buffer(self):
+        """Internal method that creates the buffer for the current thread.
+
+        Returns:
+            :any:`dict` : Dictionary with parse and execution times recorded\
+                    and not added yet, as a flat list for every label.
+        """
+        buffer = self.__local.buffer = {}
+        with self.__lock:
+            self.__buffers.append((threading.current_thread(), buffer))
+        return buffer
+
+    def _entry(self, label):
+        """Internal method that returns metrics for the given label, while the
+        registry lock is held, creating them if they do not exist.
+
+        Args:
+            label (str) : Command label.
+
+        Returns:
+            CommandMetrics : Metrics for the command.
+        """
+        entry = self.__commands.get(label, None)
+        if entry is None:
+            entry = self.__commands[label] = CommandMetrics(label)
+        return entry
+
+    def _add(self, label, times):
+        """Internal method that adds times in a buffer to the histograms,
+        while the registry lock is held.
+
+        Times appended while they are added stay in the buffer.
+
+        Args:
+            label (str) : Command label.
+
+            times (list) : List with parse and execution time pairs.
+
+        Returns:
+            None
+        """
+        values = times[:len(times) & ~1]
+        del times[:len(values)]
+        parse = values[0::2]
+        elapsed = values[1::2]
+        self._entry(label).add_many([int(x * 1e9) for x in parse],
+                                    [int((y - x) * 1e9) for x, y in zip(parse, elapsed)],
+                                    [])
+
+    def flush(self):
+        """Adds executions recorded by every thread to the histograms.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            buffers = []
+            for thread, buffer in self.__buffers:
+                for label, times in list(buffer.items()):
+                    self._add(label, times)
+                if thread.is_alive():
+                    buffers.append((thread, buffer))
+            self.__buffers = buffers
+
+    def get(self, label):
+        """Returns metrics for the given command label, creating them if they
+        do not exist.
+
+        Args:
+            label (str) : Command label.
+
+        Returns:
+            CommandMetrics : Metrics for the command.
+        """
+        self.flush()
+        with self.__lock:
+            return self._entry(label)
+
+    def labels(self):
+        """Returns all command labels with metrics.
+
+        Returns:
+            list : List with command labels.
+        """
+        self.flush()
+        return list(self.__commands)
+
+    def begin(self):
+        """Begins a command execution in the current context.
+
+        Returns:
+            None
+        """
+        self.__parse.set([0.0])
+
+    def parsed(self, elapsed):
+        """Reports the time parsing the command line for the command being
+        executed in the current context.
+
+        Args:
+            elapsed (float) : Seconds parsing the command line.
+
+        Returns:
+            None
+        """
+        timing = self.__parse.get()
+        if timing is not None:
+            timing[0] = elapsed
+
+    def record(self, label, elapsed, error=None):
+        """Records a command execution.
+
+        Args:
+            label (str) : Command label.
+
+            elapsed (float) : Seconds executing the command, including the\
+                    time parsing the command line.
+
+            error (Exception) : Exception raised by the command, if any.
+
+        Returns:
+            None
+        """
+        timing = self.__parse.get()
+        parse = 0.0
+        if timing is not None:
+            parse, timing[0] = timing[0], 0.0
+        try:
+            buffer = self.__local.buffer
+        except AttributeError:
+            buffer = self._buffer()
+        times = buffer.get(label, None)
+        if times is None:
+            times = buffer[label] = []
+        times.append(parse)
+        times.append(elapsed)
+        if error is not None:
+            with self.__lock:
+                self._entry(label).add_many([], [], [error])
+        if len(times) >= FLUSH_SIZE:
+            with self.__lock:
+                self._add(label, times)
+
+    def reset(self):
+        """Removes all metrics.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            for _, buffer in self.__buffers:
+                buffer.clear()
+            self.__commands.clear()
+
+    def to_dict(self):
+        """Returns metrics for all commands.
+
+        Returns:
+            :any:`dict` : Dictionary with metrics for every command label.
+        """
+        self.flush()
+        with self.__lock:
+            return OrderedDict((label, entry.to_dict()) for label, entry in self.__commands.items())
+
+    def dump(self, filename):
+        """Writes metrics for all commands in JSON format.
+
+        Args:
+            filename (str) : Filename for the metrics.
+
+        Returns:
+            None
+        """
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def display(self, label=None):
+        """Displays metrics, with times in milliseconds.
+
+        Args:
+            label (str) : Command label to display, None for all commands.
+
+        Returns:
+            None
+        """
+        LOGGER.display('{0:<24} {1:>7} {2:>6} {3:>10} {4:>10} {5:>10} {6:>10}'.format(
+            'command', 'count', 'errors', 'parse p50', 'parse p99', 'exec p50', 'exec p99'))
+        for name, entry in self.to_dict().items():
+            if label and name != label:
+                continue
+            LOGGER.display('{0:<24} {1:>7} {2:>6} {3:>10.3f} {4:>10.3f} {5:>10.3f} {6:>10.3f}'.format(
+                name, entry['count'], sum(entry['errors'].values()),
+                entry['parse']['p50'] * 1000, entry['parse']['p99'] * 1000,
+                entry['exec']['p50'] * 1000, entry['exec']['p99'] * 1000))
+            for kind, count in entry['errors'].items():
+                LOGGER.display('{0:<24} {1:>7} {2}'.format('', count, kind))
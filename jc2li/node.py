@@ -10,7 +10,7 @@ __docformat__ = 'restructuredtext en'
 # -----------------------------------------------------------------------------
 #
 from jc2li.rules import RuleHandler as RH
-from jc2li.clierror import CliException
+from jc2li.clierror import CliException, PATH_KIND
 from jc2li.argtypes import Prefix
 import jc2li.loggerator as loggerator
 
@@ -352,12 +352,26 @@ class Node(object):
             str : String mapped for the given node.
         """
         if '=' in value:
-            _, arg_value = value.split('=')
+            _, _, arg_value = value.partition('=')
         else:
             arg_value = value
         arg_value = self.argo.type._(arg_value)
         return arg_value
 
+    def map_args_to_values(self, values):
+        """Maps all CLI arguments entered for the node to the values to be
+        passed to the cli command callback, typing all of them at once.
+
+        Args:
+            values (list) : List with values entered by the user.
+
+        Returns:
+            list : List with values mapped for the given node, or a typed\
+                    buffer for arguments with a container.
+        """
+        tokens = [x.partition('=')[2] if '=' in x else x for x in values]
+        return self.argo.type._many(tokens, self.argo.container)
+
     def store_value_in_argo(self, value, matched=False):
         """Stores a value in the argument for the node.
 
@@ -372,6 +386,20 @@ class Node(object):
         """
         self.argo.completer.store(value, matched)
 
+    def store_values_in_argo(self, values, matched=False):
+        """Stores a list of values in the argument for the node.
+
+        Args:
+            values (list) : List with values to store in the argument.
+
+            matched (bool) : True is argument was already matched and found\
+                    in the command line entry.
+
+        Returns:
+            None
+        """
+        self.argo.completer.store_many(values, matched)
+
     def find_path(self, path_patterns):
         """Method that given a list of strings, finds a path in the syntax
         tree.
@@ -391,16 +419,16 @@ class Node(object):
         """
         node_path = []
         trav = self
-        for pattern in path_patterns:
+        for index, pattern in enumerate(path_patterns):
             if '=' in pattern:
-                name, _ = pattern.split("=")
+                name, _, _ = pattern.partition('=')
                 check_default = False
             else:
                 check_default = True
                 name = pattern
             trav = trav.find_child_by_name(name, check_default=check_default)
             if trav is None:
-                raise CliException(MODULE, '<{}> not found'.format(pattern))
+                raise CliException(MODULE, '<{}> not found'.format(pattern), kind=PATH_KIND, token=index)
             else:
                 node_path.append(trav)
         return node_path
@@ -608,6 +636,18 @@ class PrefixNode(Node):
         arg_value = str(arg_value)
         return arg_value
 
+    def map_args_to_values(self, values):
+        """Maps all CLI arguments entered for the node to the values to be
+        passed to the cli command callback.
+
+        Args:
+            values (list) : List with values entered by the user.
+
+        Returns:
+            list : List with values mapped for the given node.
+        """
+        return [self.map_arg_to_value(x) for x in values]
+
     def store_value_in_argo(self, value, matched=False):
         """Stores a value in the argument for the node.
 
@@ -622,6 +662,20 @@ class PrefixNode(Node):
         """
         pass
 
+    def store_values_in_argo(self, values, matched=False):
+        """Stores a list of values in the argument for the node.
+
+        Args:
+            values (list) : List with values to store in the argument.
+
+            matched (bool) : True is argument was already matched and found\
+                    in the command line entry.
+
+        Returns:
+            None
+        """
+        pass
+
 
 # -----------------------------------------------------------------------------
 #
@@ -643,6 +697,19 @@ class FreeformNode(Node):
         value = self.argo.type._(value)
         return value
 
+    def map_args_to_values(self, values):
+        """Maps all CLI arguments entered for the node to the values to be
+        passed to the cli command callback, typing all of them at once.
+
+        Args:
+            values (list) : List with values entered by the user.
+
+        Returns:
+            list : List with values mapped for the given node, or a typed\
+                    buffer for arguments with a container.
+        """
+        return self.argo.type._many(values, self.argo.container)
+
     def find_by_name(self, name, **kwargs):
         """Method that checks if the node has the given name
 
@@ -0,0 +1,228 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import os
+import sys
+import threading
+from collections import Counter
+import jc2li.loggerator as loggerator
+from jc2li.tracing import LINE_RECEIVED, OUTPUT_FLUSHED
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.profiler'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+INTERVAL = 0.005
+MAX_DEPTH = 128
+IDLE = '<idle>'
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class SamplingProfiler(object):
+    """SamplingProfiler class samples the stack of every thread from a
+    background thread, using sys._current_frames.
+
+    Samples are aggregated as collapsed stacks, the input format for flame
+    graph tools, with the command label running in the thread as the root
+    frame. Threads not running any command use the IDLE label. Commands
+    running are tracked with CLI tracer hooks, so the profiler costs nothing
+    to commands while it is stopped.
+    """
+
+    def __init__(self, interval=INTERVAL, max_depth=MAX_DEPTH):
+        """SamplingProfiler class initialization method.
+
+        Args:
+            interval (float) : Seconds between samples.
+
+            max_depth (int) : Maximum number of frames kept for a stack.
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.__running = {}
+        self.__labels = {}
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.__tracer = None
+
+    @property
+    def running(self):
+        """Get property that returns if the profiler is sampling.
+
+        Returns:
+            bool : True if the sampling thread is running.
+        """
+        return self.__thread is not None
+
+    def _on_line(self, event):
+        self.__running[event.thread] = event.command
+
+    def _on_flushed(self, event):
+        self.__running.pop(event.thread, None)
+
+    def _frame_label(self, code):
+        label = self.__labels.get(code, None)
+        if label is None:
+            label = '{0} ({1}:{2})'.format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+            self.__labels[code] = label
+        return label
+
+    def sample(self):
+        """Takes a sample for every thread, but the sampling thread.
+
+        Returns:
+            None
+        """
+        own = threading.get_ident()
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            codes = []
+            while frame is not None and len(codes) < self.max_depth:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            stacks.append((self.__running.get(ident, IDLE), codes))
+        with self.__lock:
+            for label, codes in stacks:
+                frames = [label]
+                frames.extend(self._frame_label(code) for code in reversed(codes))
+                self.stacks[';'.join(frames)] += 1
+            self.samples += 1
+
+    def _run(self):
+        while not self.__stop.wait(self.interval):
+            self.sample()
+
+    def start(self, tracer=None):
+        """Starts sampling.
+
+        Args:
+            tracer (Tracer) : CLI tracer used to attribute samples to the\
+                    command running in every thread.
+
+        Returns:
+            bool : True if the profiler was started, False if it was\
+                    already running.
+        """
+        if self.running:
+            return False
+        if tracer is not None:
+            tracer.add_hook(self._on_line, [LINE_RECEIVED])
+            tracer.add_hook(self._on_flushed, [OUTPUT_FLUSHED])
+            self.__tracer = tracer
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self._run, name='profiler')
+        self.__thread.daemon = True
+        self.__thread.start()
+        return True
+
+    def stop(self):
+        """Stops sampling. Samples taken are kept.
+
+        Returns:
+            bool : True if the profiler was stopped, False if it was not\
+                    running.
+        """
+        if not self.running:
+            return False
+        self.__stop.set()
+        self.__thread.join()
+        self.__thread = None
+        if self.__tracer is not None:
+            self.__tracer.remove_hook(self._on_line, [LINE_RECEIVED])
+            self.__tracer.remove_hook(self._on_flushed, [OUTPUT_FLUSHED])
+            self.__tracer = None
+        self.__running.clear()
+        return True
+
+    def reset(self):
+        """Removes all samples.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.stacks.clear()
+            self.samples = 0
+
+    def commands(self):
+        """Returns the number of stacks sampled for every command label.
+
+        Returns:
+            Counter : Counter with samples for every command label.
+        """
+        result = Counter()
+        with self.__lock:
+            for stack, count in self.stacks.items():
+                result[stack.split(';', 1)[0]] += count
+        return result
+
+    def collapsed(self):
+        """Returns samples in collapsed-stack format.
+
+        Returns:
+            list : List with a line for every stack, with frames separated\
+                    by semicolons, followed by the number of samples.
+        """
+        with self.__lock:
+            return ['{0} {1}'.format(stack, count) for stack, count in sorted(self.stacks.items())]
+
+    def dump(self, filename):
+        """Writes samples in collapsed-stack format, which can be used with
+        flamegraph.pl or speedscope.
+
+        Args:
+            filename (str) : Filename for the samples.
+
+        Returns:
+            int : Number of stacks written.
+        """
+        lines = self.collapsed()
+        with open(filename, 'w') as f:
+            for line in lines:
+                f.write(line)
+                f.write('\n')
+        return len(lines)
+
+    def display(self, limit=10):
+        """Displays the number of samples for every command label.
+
+        Args:
+            limit (int) : Maximum number of command labels displayed.
+
+        Returns:
+            None
+        """
+        total = sum(self.stacks.values()) or 1
+        LOGGER.display('{0} samples every {1:.1f}ms'.format(self.samples, self.interval * 1000))
+        for label, count in self.commands().most_common(limit):
+            LOGGER.display('{0:<24} {1:>8} {2:>6.1f}%'.format(label, count, count * 100.0 / total))
@@ -0,0 +1,388 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import os
+import json
+import weakref
+import tempfile
+import itertools
+from array import array
+from collections import OrderedDict
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.recording'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+# Every session without a log filename records in its own file in this
+# directory, removed when the session finishes.
+RECORDING_DIR = tempfile.gettempdir()
+WINDOW_SIZE = 256
+SYNC_EVERY = 16
+
+_SESSIONS = itertools.count()
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def session_filename():
+    """Returns a new log filename for a recording session.
+
+    Returns:
+        str : String with a filename unique for the process and session.
+    """
+    return os.path.join(RECORDING_DIR, 'jc2li-recording-{0}-{1}.jsonl'.format(os.getpid(), next(_SESSIONS)))
+
+
+def _remove_log(filename, pid):
+    """Removes a session log, only from the process that created it.
+
+    Args:
+        filename (str) : String with the log filename.
+
+        pid (int) : Process id for the process that created the log.
+
+    Returns:
+        None
+    """
+    if os.getpid() == pid and os.path.exists(filename):
+        os.remove(filename)
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class Recording(object):
+    """Recording class stores recorded commands in an append-only log.
+
+    Every record is a dictionary written as a JSON line in the log file, and
+    the file is fsync'ed periodically, so records are not lost on a crash.
+    Only the byte offset for every record is kept in memory, with a bounded
+    window of the last records, and any range is read seeking in the file.
+
+    Without a filename, every Recording instance uses its own session log,
+    which is removed when the instance is released or when the process
+    finishes. After
+    a crash, the session log is left in RECORDING_DIR, and it can be loaded
+    with the resume argument.
+
+    The log file is opened in append mode, and every record is written with
+    a single write call, so processes forked from the session keep
+    appending to the same log without overwriting its records. Every
+    process opens its own file, and the offset for a record is taken from
+    the file position after it is written.
+
+    Records being cleared are removed from the log: the file is truncated
+    when they are the last ones, or it is written again with the remaining
+    records, so the log is never bigger than the records it keeps.
+    """
+
+    def __init__(self, filename=None, **kwargs):
+        """Recording class initialization method.
+
+        The log file is not opened until the first record is appended.
+
+        Args:
+            filename (str) : String with the log filename, None for a new\
+                    session log.
+
+        Keyword Args:
+            window (int) : Number of last records kept in memory.
+
+            sync_every (int) : Number of records between every fsync.
+
+            resume (bool) : True if records already in the file should be\
+                    loaded, False if the file should be truncated.
+        """
+        if filename is None:
+            filename = session_filename()
+            weakref.finalize(self, _remove_log, filename, os.getpid())
+        self.filename = filename
+        self.window = kwargs.get('window', WINDOW_SIZE)
+        self.sync_every = kwargs.get('sync_every', SYNC_EVERY)
+        self.__resume = kwargs.get('resume', False)
+        self.__offsets = array('q')
+        self.__cached = OrderedDict()
+        self.__file = None
+        self.__reader = None
+        self.__reader_pid = None
+        self.__pid = None
+        self.__truncate = not self.__resume
+        self.__pending = 0
+
+    def __len__(self):
+        return len(self._index())
+
+    def _open(self):
+        """Internal method that opens the log file for the current process if
+        it is not opened.
+
+        A forked process opens the log file again, so it does not share the
+        file position with its parent. The file is truncated the first time
+        it is opened, if the log is not resumed.
+
+        Returns:
+            file : Log file object, not buffered and in append mode.
+        """
+        if self.__file is None or self.__pid != os.getpid():
+            if self.__file is not None:
+                self.__file.close()
+            self.__file = open(self.filename, 'ab', buffering=0)
+            self.__pid = os.getpid()
+            if self.__truncate:
+                self.__truncate = False
+                self.__file.truncate(0)
+        return self.__file
+
+    def _reader(self):
+        """Internal method that opens the log file for reading in the current
+        process if it is not opened.
+
+        Returns:
+            file : Log file object, buffered and read only.
+        """
+        if self.__reader is None or self.__reader_pid != os.getpid():
+            if self.__reader is not None:
+                self.__reader.close()
+            self.__reader = open(self.filename, 'rb')
+            self.__reader_pid = os.getpid()
+        return self.__reader
+
+    def _index(self):
+        """Internal method that returns the offset index, loading records
+        already in the log file the first time when the log is resumed.
+
+        Returns:
+            array : Array with the offset for every record.
+        """
+        if self.__resume:
+            self.__resume = False
+            if os.path.exists(self.filename):
+                self._load_offsets()
+        return self.__offsets
+
+    def _load_offsets(self):
+        """Internal method that builds the offset index for all records in
+        the log file.
+
+        Returns:
+            None
+        """
+        offset = 0
+        with open(self.filename, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    self.__offsets.append(offset)
+                offset += len(line)
+
+    def _cache(self, offset, record):
+        """Internal method that adds a record to the in-memory window.
+
+        Args:
+            offset (int) : Record offset in the log file.
+
+            record (dict) : Record data.
+        """
+        self.__cached[offset] = record
+        while len(self.__cached) > self.window:
+            self.__cached.popitem(last=False)
+
+    def _read(self, offset):
+        """Internal method that reads the record at the given offset.
+
+        Args:
+            offset (int) : Record offset in the log file.
+
+        Returns:
+            dict : Record data.
+        """
+        record = self.__cached.get(offset, None)
+        if record is None:
+            reader = self._reader()
+            reader.seek(offset)
+            record = json.loads(reader.readline().decode())
+        return record
+
+    def _range(self, from_record, to_record):
+        """Internal method that returns the slice for the given range.
+
+        Args:
+            from_record (int) : First record. Set to 0 if None.
+
+            to_record (int): Last record. Set to last if None
+
+        Returns:
+            slice : slice for the range, None if the range is not valid.
+        """
+        length = len(self._index())
+        first = 0 if from_record is None else from_record
+        last = length - 1 if to_record is None else to_record
+        if 0 <= first <= length and last < length and first <= last + 1:
+            return slice(first, last + 1)
+        return None
+
+    def append(self, record):
+        """Appends a new record at the end of the log.
+
+        Args:
+            record (dict) : Record data.
+
+        Returns:
+            None
+        """
+        offsets = self._index()
+        data = '{}\n'.format(json.dumps(record)).encode()
+        f = self._open()
+        f.write(data)
+        offset = f.tell() - len(data)
+        offsets.append(offset)
+        self._cache(offset, record)
+        self.__pending += 1
+        if self.__pending >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """Flushes and fsyncs all pending records to the log file.
+
+        Returns:
+            None
+        """
+        if self.__file is not None:
+            os.fsync(self.__file.fileno())
+        self.__pending = 0
+
+    def traverse(self, from_record=None, to_record=None):
+        """Traverses all records in the given range.
+
+        Args:
+            from_record (int) : First record. Set to 0 if None.
+
+            to_record (int): Last record. Set to last if None
+
+        Returns:
+            generator : it returns a generator with every record.
+        """
+        _slice = self._range(from_record, to_record)
+        if _slice is not None:
+            for offset in self.__offsets[_slice]:
+                yield self._read(offset)
+
+    def select(self, from_record=None, to_record=None):
+        """Selects all records in the given range.
+
+        Args:
+            from_record (int) : First record. Set to 0 if None.
+
+            to_record (int): Last record. Set to last if None
+
+        Returns:
+            list : List of selected records.
+        """
+        return list(self.traverse(from_record, to_record))
+
+    def clear(self, from_record=None, to_record=None):
+        """Clears all records in the given range.
+
+        Args:
+            from_record (int) : First record. Set to 0 if None.
+
+            to_record (int): Last record. Set to last if None
+
+        Returns:
+            None
+        """
+        _slice = self._range(from_record, to_record)
+        if _slice is None:
+            return
+        offsets = self.__offsets[_slice]
+        if not offsets:
+            return
+        for offset in offsets:
+            self.__cached.pop(offset, None)
+        del self.__offsets[_slice]
+        if _slice.stop >= len(offsets) + len(self.__offsets):
+            self._open().truncate(offsets[0])
+            self.sync()
+        else:
+            self._compact()
+
+    def _compact(self):
+        """Internal method that writes the log file again with the records
+        in the offset index.
+
+        The new log is written in a temporary file, which replaces the log
+        once it is synced, so records are not lost on a crash.
+
+        Returns:
+            None
+        """
+        reader = self._reader()
+        offsets = array('q')
+        cached = OrderedDict()
+        filename = '{}.tmp'.format(self.filename)
+        with open(filename, 'wb') as f:
+            for offset in self.__offsets:
+                reader.seek(offset)
+                offsets.append(f.tell())
+                f.write(reader.readline())
+                if offset in self.__cached:
+                    cached[offsets[-1]] = self.__cached[offset]
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(filename, self.filename)
+        self.close()
+        self.__offsets = offsets
+        self.__cached = cached
+
+    def remove_last(self):
+        """Removes the last record.
+
+        Returns:
+            None
+        """
+        if self._index():
+            self.clear(len(self.__offsets) - 1)
+
+    def close(self):
+        """Syncs and closes the log file.
+
+        Returns:
+            None
+        """
+        if self.__file is not None:
+            self.sync()
+            self.__file.close()
+            self.__file = None
+        if self.__reader is not None:
+            self.__reader.close()
+            self.__reader = None
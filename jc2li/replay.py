@@ -0,0 +1,315 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import json
+import math
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.replay'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+TIMING_MODE = 'timing'
+RATE_MODE = 'rate'
+MAX_MODE = 'max'
+MODES = (TIMING_MODE, RATE_MODE, MAX_MODE)
+
+PERCENTILES = (50, 90, 99)
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def percentile(sorted_values, pct):
+    """Returns the percentile for a sorted list of values, using the nearest
+    rank method.
+
+    Args:
+        sorted_values (list) : List with values sorted.
+
+        pct (float) : Percentile to return, from 0 to 100.
+
+    Returns:
+        float : Value for the given percentile, None if there are not values.
+    """
+    if not sorted_values:
+        return None
+    rank = int(math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def load_records(filename):
+    """Loads records from a file saved with save-recording or from a
+    recording log with JSON lines.
+
+    Args:
+        filename (str) : String with the filename.
+
+    Returns:
+        list : List with all records.
+    """
+    with open(filename, 'r') as f:
+        data = f.read()
+    if data.lstrip().startswith('['):
+        return json.loads(data)
+    return [json.loads(line) for line in data.splitlines() if line.strip()]
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class ReplayReport(object):
+    """ReplayReport class collects latencies for every command label while
+    records are being replayed.
+    """
+
+    def __init__(self):
+        """ReplayReport class initialization method.
+        """
+        self.latencies = OrderedDict()
+        self.errors = OrderedDict()
+        self.elapsed = 0.0
+        self.__lock = threading.Lock()
+
+    def add(self, label, latency, kind=None):
+        """Adds the latency for a command execution.
+
+        Args:
+            label (str) : Command label.
+
+            latency (float) : Seconds the command took.
+
+            kind (str) : Error kind if the command failed, None else.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.latencies.setdefault(label, []).append(latency)
+            errors = self.errors.setdefault(label, OrderedDict())
+            if kind is not None:
+                errors[kind] = errors.get(kind, 0) + 1
+
+    def to_dict(self):
+        """Returns the report as a dictionary.
+
+        Returns:
+            :any:`dict` : Dictionary with summary for every command label.
+        """
+        summary = OrderedDict()
+        for label, values in self.latencies.items():
+            values = sorted(values)
+            entry = OrderedDict([('count', len(values)),
+                                 ('errors', OrderedDict(self.errors[label])),
+                                 ('min', values[0]),
+                                 ('mean', sum(values) / len(values)),
+                                 ('max', values[-1])])
+            for pct in PERCENTILES:
+                entry['p{}'.format(pct)] = percentile(values, pct)
+            summary[label] = entry
+        total = sum(len(x) for x in self.latencies.values())
+        return OrderedDict([('elapsed', self.elapsed),
+                            ('count', total),
+                            ('throughput', total / self.elapsed if self.elapsed else None),
+                            ('commands', summary)])
+
+    def display(self):
+        """Displays the report, with latencies in milliseconds.
+
+        Returns:
+            None
+        """
+        report = self.to_dict()
+        LOGGER.display('{0:<24} {1:>7} {2:>6} {3:>9} {4:>9} {5:>9} {6:>9}'.format(
+            'command', 'count', 'errors', 'p50(ms)', 'p90(ms)', 'p99(ms)', 'max(ms)'))
+        for label, entry in report['commands'].items():
+            LOGGER.display('{0:<24} {1:>7} {2:>6} {3:>9.3f} {4:>9.3f} {5:>9.3f} {6:>9.3f}'.format(
+                label, entry['count'], sum(entry['errors'].values()), entry['p50'] * 1000,
+                entry['p90'] * 1000, entry['p99'] * 1000, entry['max'] * 1000))
+            for kind, count in entry['errors'].items():
+                LOGGER.display('{0:<24} {1:>7} {2}'.format('', count, kind))
+        LOGGER.display('{0} commands in {1:.3f}s'.format(report['count'], report['elapsed']))
+
+
+# -----------------------------------------------------------------------------
+#
+class Replay(object):
+    """Replay class executes recorded commands as a load scenario.
+
+    Three modes are available:
+
+    - timing : commands are issued keeping the original time between them,\
+            that can be scaled with the speed argument.
+
+    - rate : commands are issued at a fixed rate (commands per second).
+
+    - max : commands are executed as fast as possible.
+
+    Commands are executed by a pool of workers. For timing and rate modes,
+    latency is measured from the time the command should have been issued,
+    so any queueing delay is included.
+
+    A CLI instance is not thread safe, so with more than one worker, every
+    worker executes commands in its own CLI instance, created with the
+    factory callable.
+
+    A command fails only when it raises an exception, and failures are
+    counted by error kind: the kind for a CliException, or the exception
+    class name for any other exception.
+    """
+
+    def __init__(self, cli, records, **kwargs):
+        """Replay class initialization method.
+
+        Args:
+            cli (CliBase) : Cli instance used to execute commands.
+
+            records (list) : List of records, every record is a dictionary\
+                    with at least a 'command' entry.
+
+        Keyword Args:
+            mode (str) : Replay mode: timing, rate or max.
+
+            rate (float) : Commands per second for rate mode.
+
+            workers (int) : Number of workers executing commands.
+
+            speed (float) : Speed factor for timing mode.
+
+            factory (function) : Callable that returns a new CLI instance\
+                    for every worker, the CLI class by default.
+        """
+        self.cli = cli
+        self.factory = kwargs.get('factory', None) or type(cli)
+        self.__local = threading.local()
+        self.records = records
+        self.mode = kwargs.get('mode', MAX_MODE)
+        self.rate = kwargs.get('rate', None)
+        self.workers = max(kwargs.get('workers', 1), 1)
+        self.speed = kwargs.get('speed', 1.0)
+        if self.mode not in MODES:
+            raise ValueError('Unknown replay mode <{}>'.format(self.mode))
+        if self.mode == RATE_MODE and not self.rate:
+            raise ValueError('Replay rate mode requires a rate')
+
+    def _schedule(self):
+        """Internal method that returns the offset, in seconds from the replay
+        start, when every record has to be issued.
+
+        Returns:
+            list : List with offsets, None for max mode.
+        """
+        if self.mode == RATE_MODE:
+            return [i / float(self.rate) for i in range(len(self.records))]
+        elif self.mode == TIMING_MODE:
+            first = self.records[0].get('timestamp', 0.0) if self.records else 0.0
+            return [(x.get('timestamp', first) - first) / self.speed for x in self.records]
+        return None
+
+    def _execute(self, report, command, issued):
+        """Internal method that executes a command and adds its latency to
+        the report.
+
+        Args:
+            report (ReplayReport) : Report instance.
+
+            command (str) : Command to execute.
+
+            issued (float) : perf_counter value when the command was issued.
+
+        Returns:
+            None
+        """
+        kind = None
+        cli = getattr(self.__local, 'cli', self.cli)
+        try:
+            cli.exec_user_input(command)
+        except Exception as ex:
+            LOGGER.error('Replay command <{0}> failed: {1}'.format(command, ex))
+            kind = getattr(ex, 'kind', None) or type(ex).__name__
+        label = command.split()[0] if command.split() else command
+        report.add(label, time.perf_counter() - issued, kind)
+
+    def _start_worker(self):
+        """Internal method that creates the CLI instance for a worker, when
+        there is more than one worker.
+
+        Returns:
+            None
+        """
+        if self.workers > 1:
+            self.__local.cli = self.factory()
+
+    def run(self):
+        """Replays all records.
+
+        Returns:
+            ReplayReport : Report with latencies for every command label.
+        """
+        report = ReplayReport()
+        schedule = self._schedule()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, initializer=self._start_worker) as executor:
+            for i, record in enumerate(self.records):
+                if schedule is not None:
+                    issued = start + schedule[i]
+                    delay = issued - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                else:
+                    issued = None
+                if self.workers == 1 and issued is None:
+                    self._execute(report, record['command'], time.perf_counter())
+                elif issued is None:
+                    executor.submit(self._execute_now, report, record['command'])
+                else:
+                    executor.submit(self._execute, report, record['command'], issued)
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _execute_now(self, report, command):
+        """Internal method that executes a command measuring latency from the
+        time the worker starts it.
+
+        Args:
+            report (ReplayReport) : Report instance.
+
+            command (str) : Command to execute.
+
+        Returns:
+            None
+        """
+        self._execute(report, command, time.perf_counter())
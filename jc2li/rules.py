@@ -217,6 +217,92 @@ class RuleHandler(object):
         counter = sum([1 if RuleHandler.is_required_rule(rule) else 0 for rule in rules])
         return counter
 
+    @staticmethod
+    def rule_arity(rule):
+        """Static method that returns the minimum and the maximum number of
+        tokens to be entered by the user for a given rule.
+
+        Rules inside 'args' with counter 0 start a new alternative, any other
+        rule follows the previous one in the same alternative. Every option
+        takes one or two tokens, the option name can be entered alone, and
+        "name=value" is a single token.
+
+        Args:
+            rule (dict): dictionary with the given rule to check.
+
+        Returns:
+            tuple : minimum and maximum number of tokens, maximum is None if\
+                    the rule can be entered any number of times.
+        """
+        rule_type = rule['type']
+        if rule_type == '0':
+            return 0, 0
+        if rule_type in ('1', '2', '3'):
+            return 1, 1
+        if rule_type == '4':
+            return 1, 2
+        branches = []
+        for inner in rule['args']:
+            low, high = RuleHandler.rule_arity(inner)
+            if RuleHandler.get_counter_from_rule(inner) == 0 or not branches:
+                branches.append([low, high])
+            else:
+                branch = branches[-1]
+                branch[0] += low
+                branch[1] = None if branch[1] is None or high is None else branch[1] + high
+        low = min(branch[0] for branch in branches)
+        high = None if any(branch[1] is None for branch in branches) else max(branch[1] for branch in branches)
+        if rule_type == '?':
+            return 0, high
+        if rule_type == '*':
+            return 0, None
+        if rule_type in ('+', '@'):
+            return low, None
+        return low, high
+
+    @staticmethod
+    def syntax_arity(rules):
+        """Static method that returns arity facts for a given command.
+
+        Args:
+            rules (list): list with all rules for the command.
+
+        Returns:
+            Arity : arity for the command.
+        """
+        min_args = 0
+        max_args = 0
+        required = []
+        options = set()
+        for rule in rules:
+            low, high = RuleHandler.rule_arity(rule)
+            # A missing constant is reported as a mandatory argument not
+            # present, so it is not counted as a minimum.
+            if not RuleHandler.is_constant_rule(rule):
+                min_args += low
+            max_args = None if max_args is None or high is None else max_args + high
+            if RuleHandler.is_only_one_rule(rule) or RuleHandler.is_constant_rule(rule):
+                required.append(rule['args'])
+            options.update(RuleHandler.syntax_options(rule))
+        return Arity(min_args, max_args, required, options)
+
+    @staticmethod
+    def syntax_options(rule):
+        """Static method that returns all option names, as they are entered
+        in the command line, for a given rule.
+
+        Args:
+            rule (dict): dictionary with the given rule to check.
+
+        Returns:
+            list : list with option names.
+        """
+        if RuleHandler.is_cte_param_rule(rule):
+            return ['-{}'.format(rule['args'])]
+        if type(rule['args']) == list:
+            return [name for inner in rule['args'] for name in RuleHandler.syntax_options(inner)]
+        return []
+
     @staticmethod
     def get_args_from_rule_as_list(rule):
         """Static method that return a list with all rules contained in the
@@ -272,3 +358,52 @@ class RuleHandler(object):
         """
         for rule in rule['args']:
             yield rule
+
+
+class Arity(object):
+    """Arity class keeps arity facts for a command, computed once from the
+    command rules when the command parsing tree is built, so malformed input
+    can be rejected before the parsing tree is traversed.
+
+    Attributes:
+        min_args (int) : Minimum number of tokens to be entered.
+
+        max_args (int) : Maximum number of tokens to be entered, None if it\
+                is unbounded.
+
+        required (list) : Names for required arguments, in syntax order.
+
+        options (frozenset) : Option names, as they are entered in the\
+                command line.
+    """
+
+    def __init__(self, min_args, max_args, required, options):
+        """Arity class initialization method.
+
+        Args:
+            min_args (int) : Minimum number of tokens to be entered.
+
+            max_args (int) : Maximum number of tokens to be entered, None if\
+                    it is unbounded.
+
+            required (list) : Names for required arguments.
+
+            options (set) : Option names.
+        """
+        self.min_args = min_args
+        self.max_args = max_args
+        self.required = tuple(required)
+        self.options = frozenset(options)
+
+    @property
+    def unbounded(self):
+        """Get property that returns if any number of tokens can be entered.
+
+        Returns:
+            bool : True if there is no maximum number of tokens.
+        """
+        return self.max_args is None
+
+    def __repr__(self):
+        return 'Arity(min_args={0}, max_args={1}, required={2}, options={3})'.format(
+            self.min_args, self.max_args, list(self.required), sorted(self.options))
@@ -9,11 +9,20 @@ __docformat__ = 'restructuredtext en'
 #             |_|
 # -----------------------------------------------------------------------------
 #
+import os
 import sys
+import gc
+import socket
 import argparse
 import importlib
 import json
+from jc2li.clierror import CliException
+from jc2li.tokenizer import split_command
+from jc2li.startup import StartupProfile, IMPORT_MODULE, CREATE_CLI, format_report, write_report
 import jc2li.loggerator as loggerator
+# Modules importing pyparsing or prompt_toolkit, like catalog, decorators
+# or cli, are imported only where they are used, so they are measured by
+# the startup profile.
 
 
 # -----------------------------------------------------------------------------
@@ -27,6 +36,10 @@ import jc2li.loggerator as loggerator
 #
 MODULE = 'CLI.run'
 LOGGER = loggerator.getLoggerator(MODULE)
+FORK_SERVER_BACKLOG = 64
+# Seconds the fork server waits for a job before it reaps finished children.
+REAP_INTERVAL = 1.0
+MANIFEST_VERSION = 1
 
 
 # -----------------------------------------------------------------------------
@@ -78,6 +91,210 @@ def create_cli(module):
     return cli
 
 
+def command_owner(cli, label):
+    """Returns the class and module where the given command is defined.
+
+    Commands are looked up in _WALL, which keeps commands for every class
+    that defines them.
+
+    Args:
+        cli (:class:`Cli`) : Cli instance.
+
+        label (str) : Command label.
+
+    Returns:
+        tuple : Pair with module name and class name, None if the command\
+                is not found.
+    """
+    command_cb = cli.get_command_cb(label)
+    func = getattr(command_cb, 'func', command_cb)
+    for classname, calls in cli._WALL.items():
+        for _, func_cb, _ in calls:
+            if func_cb is func:
+                return func_cb.__module__, classname
+    return None
+
+
+def build_manifest(cli, module):
+    """Builds the command manifest for the given CLI.
+
+    The manifest maps every command label to the module and class where the
+    command is defined, so a single command can be executed importing only
+    the module that owns it.
+
+    Args:
+        cli (:class:`Cli`) : Cli instance.
+
+        module (module) : Python module with CLI commands.
+
+    Returns:
+        :any:`dict` : Dictionary with the manifest.
+    """
+    commands = {}
+    for label in cli.commands:
+        owner = command_owner(cli, label)
+        if owner is not None:
+            commands[label] = {'module': owner[0], 'class': owner[1]}
+    return {'version': MANIFEST_VERSION,
+            'module': module.__name__,
+            'export': getattr(module, 'EXPORT', None),
+            'commands': commands}
+
+
+def write_manifest(cli, module, filename):
+    """Writes the command manifest for the given CLI.
+
+    Args:
+        cli (:class:`Cli`) : Cli instance.
+
+        module (module) : Python module with CLI commands.
+
+        filename (str) : Filename for the manifest.
+
+    Returns:
+        None
+    """
+    with open(filename, 'w') as f:
+        json.dump(build_manifest(cli, module), f, indent=4, sort_keys=True)
+
+
+def read_manifest(filename):
+    """Reads the command manifest in the given file.
+
+    Args:
+        filename (str) : Filename with the manifest.
+
+    Returns:
+        :any:`dict` : Dictionary with the manifest, None if the file is not\
+                found or it is not a valid manifest.
+    """
+    try:
+        with open(filename, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        LOGGER.warning('Manifest {} not available'.format(filename))
+        return None
+    if not isinstance(manifest, dict) or manifest.get('version', None) != MANIFEST_VERSION:
+        LOGGER.warning('Manifest {} not valid'.format(filename))
+        return None
+    return manifest
+
+
+def create_cli_for_command(manifest, command, skip_exception=False):
+    """Creates a cli with the class that owns the given command.
+
+    Only the module where the command is defined is imported, and the cli
+    is created with the class that owns the command, not with the exported
+    class, so the command can not rely on anything set up by the exported
+    class. A class that is not a CliBase class, like a mixin, is combined
+    with the Cli class, keeping its name, so its commands are registered.
+
+    The manifest keeps the class for the command registered in the exported
+    CLI, so a command defined again by the exported class is owned by it,
+    and its module is the exported one.
+
+    Args:
+        manifest (:any:`dict`) : Dictionary with the manifest.
+
+        command (str) : String with the CLI command.
+
+        skip_exception (bool) : True is exception should be skipped.
+
+    Returns:
+        :class:`Cli` : Cli object, None if the command is not in the\
+                manifest or its module or class can not be loaded.
+    """
+    label, _, _ = split_command(command)
+    entry = manifest['commands'].get(label, None) if label else None
+    if entry is None:
+        return None
+    if skip_exception:
+        return _create_owner_cli(entry)
+    try:
+        return _create_owner_cli(entry)
+    except (ImportError, AttributeError, TypeError) as ex:
+        LOGGER.warning('Command {0} can not be loaded from manifest: {1}'.format(label, ex))
+        return None
+
+
+def _create_owner_cli(entry):
+    """Creates a cli with the class in a manifest entry.
+
+    Args:
+        entry (:any:`dict`) : Dictionary with module and class for a command.
+
+    Returns:
+        :class:`Cli` : Cli object.
+    """
+    from jc2li.cli import Cli
+    from jc2li.base import CliBase
+    owner = getattr(importlib.import_module(entry['module']), entry['class'])
+    if not issubclass(owner, CliBase):
+        owner = type(owner.__name__, (owner, Cli), {'__module__': owner.__module__})
+    return owner()
+
+
+def attach_catalog(cli, filename):
+    """Attaches a compiled command catalog to the given CLI, so command
+    lines are matched against the memory-mapped catalog and parsing trees
+    are built only for commands being completed.
+
+    A catalog that does not match commands in the CLI is not used.
+
+    Args:
+        cli (:class:`Cli`) : Cli instance.
+
+        filename (str) : String with the catalog filename.
+
+    Returns:
+        Catalog : Catalog attached, None if it can not be used.
+    """
+    from jc2li.catalog import Catalog
+    try:
+        catalog = Catalog(filename)
+    except (OSError, ValueError, CliException) as ex:
+        LOGGER.warning('Catalog {0} not available: {1}'.format(filename, ex))
+        return None
+    stale = catalog.stale_commands(cli)
+    if stale:
+        LOGGER.warning('Catalog {0} is stale for commands: {1}'.format(filename, ', '.join(stale)))
+        catalog.close()
+        return None
+    cli.catalog = catalog
+    return catalog
+
+
+def profile_startup(module, filename=None, budget=None):
+    """Loads the given module and creates its CLI, measuring every startup
+    phase.
+
+    Args:
+        module (string) : Module to load.
+
+        filename (str) : Filename for the JSON report, None if it is not\
+                required.
+
+        budget (float) : Startup budget in seconds, None if there is not any\
+                budget.
+
+    Returns:
+        int : Exit status, 1 if startup exceeds the budget, 0 else.
+    """
+    profile = StartupProfile()
+    profile.start()
+    profile.instrument()
+    with profile.measure(IMPORT_MODULE):
+        mod = load_module(module)
+    with profile.measure(CREATE_CLI):
+        create_cli(mod)
+    profile.stop()
+    report = profile.report(budget)
+    LOGGER.display(format_report(report))
+    if filename:
+        write_report(report, filename)
+    return 1 if report['exceeded'] else 0
+
+
 def setup_kwargs(cli):
     """Setups kwargs to be passed to the CLI running method.
 
@@ -131,6 +348,203 @@ def execute_file(cli, filename, raw=False):
         cli.load_commands_from_file(filename)
 
 
+def warm_cli(cli, module):
+    """Warms up the CLI before it is used by any forked worker.
+
+    The module can provide an EXPORT_WARMUP attribute with the name of a
+    function that receives the cli instance and fills any cache required,
+    like completion data stored in the journal.
+
+    Args:
+        cli (:class:`Cli`) : Cli instance.
+
+        module (module) : Python module with CLI commands.
+
+    Returns:
+        bool : True if the module provided a warm up function, False else.
+    """
+    try:
+        warmup = getattr(module, module.EXPORT_WARMUP)
+    except AttributeError:
+        return False
+    warmup(cli)
+    return True
+
+
+def serve_job(cli, conn):
+    """Executes all commands received in a job connection.
+
+    Every line received is executed as a CLI command, until the client
+    closes its side of the connection.
+
+    Args:
+        cli (:class:`Cli`) : Cli instance.
+
+        conn (socket) : Connection with the client that sends the job.
+
+    Returns:
+        int : Number of commands executed.
+    """
+    counter = 0
+    with conn.makefile('r') as f:
+        for line in f:
+            try:
+                cli.exec_user_input(line.rstrip('\n'))
+            except Exception as ex:
+                LOGGER.error('Job command <{0}> failed: {1}'.format(line.rstrip(), ex), out=True)
+            counter += 1
+    return counter
+
+
+def _run_forked_job(cli, conn):
+    """Runs a job in a forked child process and exits the process.
+
+    Standard output is redirected to the job connection, so any command
+    output is sent back to the client.
+
+    Args:
+        cli (:class:`Cli`) : Cli instance inherited from the fork server.
+
+        conn (socket) : Connection with the client that sends the job.
+    """
+    status = 0
+    try:
+        os.dup2(conn.fileno(), sys.stdout.fileno())
+        serve_job(cli, conn)
+        sys.stdout.flush()
+    except Exception:
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def _reap_children(children):
+    """Collects exit status for all children that already finished.
+
+    Args:
+        children (set) : Set with process id for all running children.
+    """
+    for pid in list(children):
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            done = pid
+        if done:
+            children.discard(pid)
+
+
+def _accept_job(server, children):
+    """Waits for a job connection, reaping finished children every time the
+    wait times out, so they do not stay as zombies while no job arrives.
+
+    Args:
+        server (socket) : Listening socket, with a timeout.
+
+        children (set) : Set with process id for all running children.
+
+    Returns:
+        socket : Connection with the client that sends the job, None if\
+                the wait timed out.
+    """
+    try:
+        conn, _ = server.accept()
+    except socket.timeout:
+        _reap_children(children)
+        return None
+    return conn
+
+
+def fork_server(cli, address):
+    """Runs a fork server for the given CLI.
+
+    The CLI, with all command parsing trees and caches, is created only once
+    in the server. For every incoming connection a child process is forked,
+    and it inherits the initialized CLI copy-on-write, so jobs don't pay for
+    module imports or command setup.
+
+    Args:
+        cli (:class:`Cli`) : Cli instance already created and warmed up.
+
+        address (str) : Unix socket path where the server listens for jobs.
+
+    Returns:
+        None
+    """
+    # Move all objects created at this point to the permanent generation, so
+    # the garbage collector does not touch them in children, which would
+    # copy every page.
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    if os.path.exists(address):
+        os.unlink(address)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(address)
+    server.listen(FORK_SERVER_BACKLOG)
+    server.settimeout(REAP_INTERVAL)
+    LOGGER.display('fork server listening at {}'.format(address))
+    children = set()
+    try:
+        while True:
+            conn = _accept_job(server, children)
+            if conn is None:
+                continue
+            sys.stdout.flush()
+            pid = os.fork()
+            if pid == 0:
+                server.close()
+                _run_forked_job(cli, conn)
+            conn.close()
+            children.add(pid)
+            _reap_children(children)
+    finally:
+        server.close()
+        os.unlink(address)
+
+
+def send_job(address, commands, out=sys.stdout):
+    """Sends a job to a fork server and writes back the job output.
+
+    Args:
+        address (str) : Unix socket path where the fork server listens.
+
+        commands (list) : List with all CLI commands in the job.
+
+        out (file) : Stream where job output is written.
+
+    Returns:
+        None
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(address)
+    try:
+        conn.sendall(''.join('{}\n'.format(x) for x in commands).encode())
+        conn.shutdown(socket.SHUT_WR)
+        with conn.makefile('r') as f:
+            for line in f:
+                out.write(line)
+    finally:
+        conn.close()
+
+
+def read_commands(filename, raw=False):
+    """Reads all commands in the given file.
+
+    Args:
+        filename (str) : Filename with all CLI commands.
+
+        raw (bool) : True if file contains commands in text format, False if\
+                commands are in JSON format.
+
+    Returns:
+        list : List with all commands in the file.
+    """
+    with open(filename, 'r') as f:
+        if raw:
+            return [line.rstrip() for line in f]
+        return [entry['command'] for entry in json.load(f)]
+
+
 def test(cli, module, filename):
     try:
         with open(filename, 'r') as f:
@@ -171,13 +585,66 @@ if __name__ == '__main__':
     parser.add_argument('--file', '-f', action='store', help='Execute command inside file', metavar='FILE')
     parser.add_argument('--raw', '-r', action='store_true', help='File in raw format')
     parser.add_argument('--test', '-t', action='store', help='Test file with commands and results', metavar='FILE')
+    parser.add_argument('--fork-server', action='store', help='Run a fork server at the given socket', metavar='SOCKET')
+    parser.add_argument('--job', '-J', action='store', help='Send commands as a job to a fork server', metavar='SOCKET')
+    parser.add_argument('--gen-manifest', action='store', help='Write the command manifest', metavar='FILE')
+    parser.add_argument('--manifest', action='store', help='Command manifest used to load commands', metavar='FILE')
+    parser.add_argument('--profile-startup', action='store_true', help='Profile module startup')
+    parser.add_argument('--profile-report', action='store', help='JSON file for the startup report', metavar='FILE')
+    parser.add_argument('--startup-budget', action='store', type=float, help='Startup budget in seconds',
+                        metavar='SECONDS')
+    parser.add_argument('--gen-catalog', action='store', help='Write the compiled command catalog', metavar='FILE')
+    parser.add_argument('--catalog', action='store', help='Compiled command catalog used to match commands',
+                        metavar='FILE')
     args = parser.parse_args()
 
+    if args.job:
+        if args.exec:
+            send_job(args.job, [args.exec, ])
+        elif args.file:
+            send_job(args.job, read_commands(args.file, args.raw))
+        else:
+            parser.error('--job requires --exec or --file')
+        sys.exit(0)
+
+    if args.exec and args.manifest:
+        manifest = read_manifest(args.manifest)
+        cli = create_cli_for_command(manifest, args.exec, args.exception) if manifest else None
+        if cli is not None:
+            execute_command(cli, args.exec)
+            sys.exit(0)
+        if args.mod is None and manifest:
+            args.mod = manifest['module']
+
     if args.mod is None:
         sys.exit(0)
 
+    if args.profile_startup:
+        sys.exit(profile_startup(args.mod, args.profile_report, args.startup_budget))
+
+    # Parsing trees are not required to execute commands matched against the
+    # catalog, so they are built only when commands are completed.
+    if args.catalog and not args.gen_catalog:
+        from jc2li.decorators import defer_trees
+        defer_trees()
     mod = load_module(args.mod, args.exception)
     cli = create_cli(mod)
+    if args.catalog and not args.gen_catalog:
+        attach_catalog(cli, args.catalog)
+
+    if args.gen_manifest:
+        write_manifest(cli, mod, args.gen_manifest)
+        sys.exit(0)
+
+    if args.gen_catalog:
+        from jc2li.catalog import write_catalog
+        write_catalog(cli, args.gen_catalog)
+        sys.exit(0)
+
+    if args.fork_server:
+        warm_cli(cli, mod)
+        fork_server(cli, args.fork_server)
+        sys.exit(0)
 
     if args.exec:
         execute_command(cli, args.exec)
@@ -0,0 +1,190 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import threading
+from prompt_toolkit.interface import CommandLineInterface
+from prompt_toolkit.shortcuts import create_prompt_application, create_eventloop, create_output, run_application
+from prompt_toolkit.document import Document
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.session'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class CliSession(object):
+    """CliSession class keeps all objects required to prompt for user input,
+    so they are built once and reused for every prompt.
+
+    The prompt application, with its history, auto-suggest and completer, is
+    built when the session is created. The command line interface and its
+    event loop are built for the first blocking prompt and reused after
+    that. Prompt, toolbar and right prompt values are retrieved with
+    callbacks, so they can change between prompts.
+
+    The screen is only redrawn on input or when :meth:`invalidate` is
+    called, unless a refresh interval is given.
+    """
+
+    def __init__(self, **kwargs):
+        """CliSession class initialization method.
+
+        Keyword Args:
+            refresh_interval (float) : Seconds between every screen refresh,\
+                    0 to refresh only on input.
+
+            Any other argument is passed to prompt_toolkit\
+                    create_prompt_application.
+        """
+        self.refresh_interval = kwargs.pop('refresh_interval', 0)
+        self.history = kwargs.get('history', None)
+        self.auto_suggest = kwargs.get('auto_suggest', None)
+        self.completer = kwargs.get('completer', None)
+        self.application = create_prompt_application(**kwargs)
+        self.application.on_start = self._on_start
+        self.application.on_stop = self._on_stop
+        self.__cli = None
+        self.__running = None
+        self.__done = None
+
+    def _on_start(self, cli):
+        """Internal method called when a prompt starts.
+
+        Args:
+            cli (CommandLineInterface) : Command line interface running.
+
+        Returns:
+            None
+        """
+        self.__running = cli
+        if self.refresh_interval:
+            self._start_refresh(cli)
+
+    def _on_stop(self, cli):
+        """Internal method called when a prompt ends.
+
+        Args:
+            cli (CommandLineInterface) : Command line interface running.
+
+        Returns:
+            None
+        """
+        self.__running = None
+        self._stop_refresh(cli)
+
+    def invalidate(self):
+        """Requests a redraw of the prompt being displayed, if any.
+
+        It can be called from any thread.
+
+        Returns:
+            None
+        """
+        cli = self.__running
+        if cli is not None:
+            cli.invalidate()
+
+    def _start_refresh(self, cli):
+        """Internal method that starts a thread refreshing the screen while
+        the command line interface is running.
+
+        Args:
+            cli (CommandLineInterface) : Command line interface to refresh.
+
+        Returns:
+            None
+        """
+        done = self.__done = threading.Event()
+
+        def _refresh():
+            while not done.wait(self.refresh_interval):
+                cli.request_redraw()
+
+        thread = threading.Thread(target=_refresh, name='prompt-refresh')
+        thread.daemon = True
+        thread.start()
+
+    def _stop_refresh(self, cli):
+        """Internal method that stops the thread refreshing the screen.
+
+        Args:
+            cli (CommandLineInterface) : Command line interface being refreshed.
+
+        Returns:
+            None
+        """
+        if self.__done is not None:
+            self.__done.set()
+            self.__done = None
+
+    @property
+    def cli(self):
+        """Get property that returns the command line interface used for
+        blocking prompts.
+
+        Returns:
+            CommandLineInterface : Command line interface instance.
+        """
+        if self.__cli is None:
+            self.__cli = CommandLineInterface(application=self.application,
+                                              eventloop=create_eventloop(),
+                                              output=create_output())
+        return self.__cli
+
+    def prompt(self):
+        """Prompts for user input.
+
+        Returns:
+            str : String with the input entered by the user.
+        """
+        result = self.cli.run()
+        return result.text if isinstance(result, Document) else result
+
+    def prompt_async(self):
+        """Prompts for user input without blocking the asyncio event loop.
+
+        Output generated while the user is entering the input is displayed
+        above the prompt.
+
+        Returns:
+            coroutine : Coroutine returning the input entered by the user.
+        """
+        return run_application(self.application,
+                               patch_stdout=True,
+                               return_asyncio_coroutine=True)
+
+    def close(self):
+        """Closes the command line interface event loop.
+
+        Returns:
+            None
+        """
+        if self.__cli is not None:
+            self.__cli.eventloop.close()
+            self.__cli = None
@@ -0,0 +1,396 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import sys
+import time
+import json
+import importlib
+from functools import wraps
+from contextlib import contextmanager
+from collections import OrderedDict
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.startup'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+IMPORT_PYPARSING = 'import pyparsing'
+IMPORT_PROMPT_TOOLKIT = 'import prompt_toolkit'
+IMPORT_JC2LI = 'import jc2li'
+IMPORT_MODULE = 'import module'
+CREATE_CLI = 'create cli'
+GET_SYNTAX = 'get_syntax'
+PROCESS_SYNTAX = 'process_syntax'
+BUILD_TREE = 'build_command_parsing_tree'
+LOGGERATOR = 'loggerator'
+
+PROMPT_TOOLKIT_MODULES = ('prompt_toolkit',
+                          'prompt_toolkit.shortcuts',
+                          'prompt_toolkit.interface',
+                          'prompt_toolkit.completion',
+                          'prompt_toolkit.styles', )
+JC2LI_MODULES = ('jc2li.cliparser', 'jc2li.journal', 'jc2li.decorators', )
+DECORATORS = ('argo', 'argos', 'syntax', )
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class StartupProfile(object):
+    """StartupProfile class measures where startup time goes when a CLI
+    module is loaded.
+
+    Startup phases are measured patching the functions that run them, so
+    nothing is measured, and nothing is paid, unless a profile is running.
+    Every phase keeps its own time, not including time for phases running
+    inside it, so all phases add up to the instrumented time.
+
+    Decoration time is kept for every command too, including any phase
+    running inside decorators, like syntax processing or parsing tree
+    building.
+
+    Modules already imported when the profile is instrumented take no time,
+    so they are listed as preloaded in the report: the profile has to run
+    in a process that did not import them yet.
+    """
+
+    def __init__(self):
+        """StartupProfile class initialization method.
+        """
+        self.phases = OrderedDict()
+        self.commands = OrderedDict()
+        self.started = None
+        self.stopped = None
+        self.preloaded = []
+        self.__stack = []
+        self.__patches = []
+        self.__active = False
+
+    def start(self):
+        """Starts the profile.
+
+        Returns:
+            None
+        """
+        self.started = time.perf_counter()
+        self.__active = True
+
+    def stop(self):
+        """Stops the profile and restores all patched functions.
+
+        Returns:
+            None
+        """
+        self.stopped = time.perf_counter()
+        self.__active = False
+        self.restore()
+
+    @property
+    def total(self):
+        """Get property that returns the startup time.
+
+        Returns:
+            float : Seconds since the profile was started until it was\
+                    stopped, or until now if it is still running.
+        """
+        if self.started is None:
+            return 0.0
+        end = self.stopped if self.stopped is not None else time.perf_counter()
+        return end - self.started
+
+    def add(self, phase, elapsed, inner=0.0):
+        """Adds time to a phase.
+
+        Args:
+            phase (str) : Phase name.
+
+            elapsed (float) : Seconds spent in the phase.
+
+            inner (float) : Seconds spent in phases running inside.
+
+        Returns:
+            None
+        """
+        entry = self.phases.setdefault(phase, [0.0, 0.0, 0])
+        entry[0] += elapsed - inner
+        entry[1] += elapsed
+        entry[2] += 1
+
+    @contextmanager
+    def measure(self, phase):
+        """Context manager that measures the time spent in a phase.
+
+        Args:
+            phase (str) : Phase name.
+
+        Returns:
+            None
+        """
+        if not self.__active:
+            yield
+            return
+        self.__stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            inner = self.__stack.pop()
+            if self.__stack:
+                self.__stack[-1] += elapsed
+            self.add(phase, elapsed, inner)
+
+    def _patch(self, owner, name, wrapper):
+        """Internal method that replaces an attribute with a wrapper around
+        it.
+
+        Args:
+            owner (object) : Module or class with the attribute.
+
+            name (str) : Attribute name.
+
+            wrapper (:any:`function`) : Function that receives the original\
+                    attribute and returns the new one.
+
+        Returns:
+            None
+        """
+        original = owner.__dict__[name]
+        self.__patches.append((owner, name, original))
+        setattr(owner, name, wrapper(original))
+
+    def _timed(self, phase):
+        """Internal method that returns a wrapper measuring a phase.
+
+        Args:
+            phase (str) : Phase name.
+
+        Returns:
+            :any:`function` : Function that wraps a callable.
+        """
+
+        def _wrapper(func):
+
+            @wraps(func)
+            def _timed_func(*args, **kwargs):
+                with self.measure(phase):
+                    return func(*args, **kwargs)
+
+            return _timed_func
+
+        return _wrapper
+
+    def _decorated(self, decorator):
+        """Internal method that measures a decorator applied to a command.
+
+        Args:
+            decorator (:any:`function`) : Decorator applied to the command.
+
+        Returns:
+            :any:`function` : Decorator measuring decoration time.
+        """
+
+        @wraps(decorator)
+        def _decorator(f):
+            if not self.__active:
+                return decorator(f)
+            start = time.perf_counter()
+            result = decorator(f)
+            name = getattr(f, '__qualname__', str(f))
+            self.commands[name] = self.commands.get(name, 0.0) + time.perf_counter() - start
+            return result
+
+        return _decorator
+
+    def _decorator_factory(self, factory):
+        """Internal method that wraps a function returning a decorator.
+
+        Args:
+            factory (:any:`function`) : Function returning a decorator.
+
+        Returns:
+            :any:`function` : Function returning a measured decorator.
+        """
+
+        @wraps(factory)
+        def _factory(*args, **kwargs):
+            return self._decorated(factory(*args, **kwargs))
+
+        return _factory
+
+    def _import(self, phase, modules):
+        """Internal method that measures importing the given modules.
+
+        Modules already imported take no time.
+
+        Args:
+            phase (str) : Phase name.
+
+            modules (tuple) : Modules to import.
+
+        Returns:
+            None
+        """
+        with self.measure(phase):
+            for module in modules:
+                importlib.import_module(module)
+
+    def instrument(self):
+        """Imports third party and jc2li modules used to define commands and
+        patches all functions running startup phases.
+
+        It has to be called before the CLI module is imported.
+
+        Returns:
+            None
+        """
+        modules = ('pyparsing', ) + PROMPT_TOOLKIT_MODULES + JC2LI_MODULES
+        self.preloaded = [x for x in modules if x in sys.modules]
+        self._import(IMPORT_PYPARSING, ('pyparsing', ))
+        self._import(IMPORT_PROMPT_TOOLKIT, PROMPT_TOOLKIT_MODULES)
+        self._import(IMPORT_JC2LI, JC2LI_MODULES)
+        cliparser = importlib.import_module('jc2li.cliparser')
+        journal = importlib.import_module('jc2li.journal')
+        decorators = importlib.import_module('jc2li.decorators')
+        self._patch(cliparser, 'get_syntax', self._timed(GET_SYNTAX))
+        self._patch(cliparser, 'process_syntax', self._timed(PROCESS_SYNTAX))
+        self._patch(journal.Journal, 'build_command_parsing_tree', self._timed(BUILD_TREE))
+        self._patch(loggerator.Loggerator, '__init__', self._timed(LOGGERATOR))
+        for name in DECORATORS:
+            self._patch(decorators, name, self._decorator_factory)
+        self._patch(decorators, 'setsyntax', self._decorated)
+
+    def restore(self):
+        """Restores all patched functions.
+
+        Commands decorated with measured decorators keep working after the
+        profile is stopped.
+
+        Returns:
+            None
+        """
+        while self.__patches:
+            owner, name, original = self.__patches.pop()
+            setattr(owner, name, original)
+
+    def report(self, budget=None):
+        """Returns the startup report.
+
+        Args:
+            budget (float) : Startup budget in seconds, None if there is\
+                    not any budget.
+
+        Returns:
+            :any:`dict` : Dictionary with the total time, the budget, if it\
+                    was exceeded, phases and commands sorted by time, and\
+                    modules imported before the profile.
+        """
+        phases = [{'phase': name, 'self': own, 'total': total, 'calls': calls}
+                  for name, (own, total, calls) in self.phases.items()]
+        phases.sort(key=lambda x: x['self'], reverse=True)
+        commands = [{'command': name, 'total': total} for name, total in self.commands.items()]
+        commands.sort(key=lambda x: x['total'], reverse=True)
+        total = self.total
+        return {'total': total,
+                'budget': budget,
+                'exceeded': check_budget(total, budget) is False,
+                'phases': phases,
+                'commands': commands,
+                'preloaded': list(self.preloaded)}
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def check_budget(total, budget):
+    """Checks startup time against the startup budget.
+
+    Args:
+        total (float) : Startup time in seconds.
+
+        budget (float) : Startup budget in seconds, None if there is not any\
+                budget.
+
+    Returns:
+        bool : True if startup is within the budget, False if it exceeds\
+                the budget, None if there is not any budget.
+    """
+    if budget is None:
+        return None
+    return total <= budget
+
+
+def format_report(report, top=None):
+    """Returns the startup report as text.
+
+    Args:
+        report (:any:`dict`) : Dictionary with the startup report.
+
+        top (int) : Maximum number of commands to display, None for all.
+
+    Returns:
+        str : String with the startup breakdown.
+    """
+    total = report['total'] or 1.0
+    lines = ['{0:<40} {1:>10} {2:>10} {3:>7} {4:>6}'.format('phase', 'self ms', 'total ms', 'calls', '%')]
+    for entry in report['phases']:
+        lines.append('{0:<40} {1:>10.3f} {2:>10.3f} {3:>7} {4:>6.1f}'.format(
+            entry['phase'], entry['self'] * 1000, entry['total'] * 1000, entry['calls'],
+            100 * entry['self'] / total))
+    lines.append('')
+    lines.append('{0:<40} {1:>10}'.format('command decoration', 'total ms'))
+    for entry in report['commands'][:top]:
+        lines.append('{0:<40} {1:>10.3f}'.format(entry['command'], entry['total'] * 1000))
+    lines.append('')
+    if report.get('preloaded'):
+        lines.append('not measured, imported before the profile: {}'.format(', '.join(report['preloaded'])))
+        lines.append('')
+    lines.append('startup {0:.3f} ms'.format(report['total'] * 1000))
+    if report['budget'] is not None:
+        lines.append('budget {0:.3f} ms {1}'.format(report['budget'] * 1000,
+                                                    'EXCEEDED' if report['exceeded'] else 'ok'))
+    return '\n'.join(lines)
+
+
+def write_report(report, filename):
+    """Writes the startup report in JSON format.
+
+    Args:
+        report (:any:`dict`) : Dictionary with the startup report.
+
+        filename (str) : Filename for the report.
+
+    Returns:
+        None
+    """
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=4)
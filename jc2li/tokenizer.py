@@ -0,0 +1,309 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import re
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.tokenizer'
+
+# Lines without quotes, escapes or any whitespace shlex does not split on
+# are split with str.split.
+_SLOW_CHARS = re.compile('[\'"\\\\\x0b\x0c\x1c-\x1f\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]')
+
+# Parts of a line, following shlex rules in POSIX mode: only blanks split
+# words, a backslash escapes any character outside quotes, single quotes
+# keep every character, and a backslash inside double quotes escapes only
+# a double quote or a backslash. Unterminated quotes and trailing escapes
+# are matched by the error group.
+_PARTS = re.compile(r'''
+    (?P<space>[ \t\r\n]+)
+  | (?P<word>[^ \t\r\n'"\\]+)
+  | \\(?P<escaped>.)
+  | '(?P<single>[^']*)'
+  | "(?P<double>(?:[^"\\]|\\.)*)"
+  | (?P<error>.)
+''', re.VERBOSE | re.DOTALL)
+
+_DOUBLE_ESCAPES = re.compile(r'\\([\\"])')
+
+# Command label and the blanks after it, as str.split finds them.
+_COMMAND = re.compile(r'\s*(\S+)\s*')
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class TokenizerError(ValueError):
+    """TokenizerError class is the exception raised for an unterminated
+    quote or a trailing escape, with the same message shlex uses.
+
+    Attributes:
+        position (int) : Position in the line for the quote or the escape.
+    """
+
+    def __init__(self, message, position):
+        """TokenizerError class initialization method.
+
+        Args:
+            message (str) : Message with the error.
+
+            position (int) : Position in the line for the error.
+        """
+        super(TokenizerError, self).__init__(message)
+        self.position = position
+
+
+# -----------------------------------------------------------------------------
+#
+class TokenLine(str):
+    """TokenLine class is the string with the arguments entered after a
+    command label, which keeps its tokens, so the line is split only once
+    while the command is parsed, dispatched and completed.
+
+    Tokens are split the first time they are required, and token spans,
+    used only to report errors, are computed the first time they are
+    required too. Spans and columns are positions in the whole line entered
+    by the user.
+
+    Attributes:
+        source (str) : Whole line entered by the user.
+
+        offset (int) : Position of this string in the source line.
+
+        command (str) : Command label entered before this string, None if it\
+                is not known.
+    """
+
+    def __new__(cls, text, source=None, offset=0, command=None):
+        """TokenLine class creation method.
+
+        Args:
+            text (str) : String with the arguments.
+
+            source (str) : Whole line entered by the user, text if None.
+
+            offset (int) : Position of text in the source line.
+
+            command (str) : Command label entered before text.
+        """
+        line = super(TokenLine, cls).__new__(cls, text)
+        line.source = text if source is None else source
+        line.offset = offset
+        line.command = command
+        line._tokens = None
+        line._partial = None
+        line._spans = None
+        return line
+
+    def split_tokens(self, partial=False):
+        """Returns tokens in the line, splitting it only the first time.
+
+        The list returned is shared, so it should not be modified.
+
+        Args:
+            partial (bool) : True if the line is being entered.
+
+        Returns:
+            list : List with tokens.
+
+        Raises:
+            TokenizerError : Unterminated quote or trailing escape in the\
+                    line, and partial is False.
+        """
+        if self._tokens is None:
+            if partial:
+                if self._partial is None:
+                    self._partial = split(self, partial=True)
+                return self._partial
+            self._tokens = split(self)
+        return self._tokens
+
+    @property
+    def tokens(self):
+        """Get property that returns tokens in the line.
+
+        Returns:
+            list : List with tokens.
+        """
+        return self.split_tokens()
+
+    @property
+    def spans(self):
+        """Get property that returns the span for every token.
+
+        Returns:
+            list : List with start and end positions in the source line for\
+                    every token.
+        """
+        if self._spans is None:
+            self._spans = [(start + self.offset, end + self.offset) for start, end in token_spans(self)]
+        return self._spans
+
+    def column(self, index):
+        """Returns the column in the source line for the given token.
+
+        Args:
+            index (int) : Token index.
+
+        Returns:
+            int : Position in the source line where the token starts, the\
+                    length of the source line if there is not such token.
+        """
+        spans = self.spans
+        return spans[index][0] if 0 <= index < len(spans) else len(self.source)
+
+
+# -----------------------------------------------------------------------------
+#            _                     _   _
+#  ___ _   _| |__  _ __ ___  _   _| |_(_)_ __   ___  ___
+# / __| | | | '_ \| '__/ _ \| | | | __| | '_ \ / _ \/ __|
+# \__ \ |_| | |_) | | | (_) | |_| | |_| | | | |  __/\__ \
+# |___/\__,_|_.__/|_|  \___/ \__,_|\__|_|_| |_|\___||___/
+#
+# -----------------------------------------------------------------------------
+#
+def _unterminated(line, pos, partial):
+    """Returns the content for an unterminated quote or a trailing escape
+    at the given position, when partial lines are accepted.
+    """
+    char = line[pos]
+    text = line[pos + 1:]
+    # An odd number of trailing backslashes ends the line in an escape.
+    escaped = char == '\\' or (char == '"' and (len(text) - len(text.rstrip('\\'))) % 2 == 1)
+    if not partial:
+        raise TokenizerError('No escaped character' if escaped else 'No closing quotation', pos)
+    if char == '"':
+        if escaped:
+            text = text[:-1]
+        return _DOUBLE_ESCAPES.sub(r'\1', text)
+    return text
+
+
+def split(line, partial=False):
+    """Splits a command line in tokens, as shlex.split does.
+
+    Lines without quotes or escapes are split with str.split, any other
+    line is split with a compiled regular expression.
+
+    Args:
+        line (str) : String with the command line.
+
+        partial (bool) : True if the line is being entered, so an\
+                unterminated quote closes at the end of the line and a\
+                trailing escape is ignored, instead of raising ValueError.
+
+    Returns:
+        list : List with tokens.
+
+    Raises:
+        TokenizerError : Unterminated quote or trailing escape in the line,\
+                and partial is False. It is a ValueError, as shlex raises.
+    """
+    if _SLOW_CHARS.search(line) is None:
+        return line.split()
+    tokens = []
+    parts = []
+    in_token = False
+    for match in _PARTS.finditer(line):
+        kind = match.lastgroup
+        if kind == 'space':
+            if in_token:
+                tokens.append(''.join(parts))
+                parts = []
+                in_token = False
+            continue
+        in_token = True
+        if kind == 'word' or kind == 'escaped' or kind == 'single':
+            parts.append(match.group(kind))
+        elif kind == 'double':
+            text = match.group(kind)
+            parts.append(_DOUBLE_ESCAPES.sub(r'\1', text) if '\\' in text else text)
+        else:
+            parts.append(_unterminated(line, match.start(), partial))
+            break
+    if in_token:
+        tokens.append(''.join(parts))
+    return tokens
+
+
+def token_spans(line):
+    """Returns the span for every token in the line, as split with partial
+    set to True returns them.
+
+    Args:
+        line (str) : String with the command line.
+
+    Returns:
+        list : List with start and end positions for every token.
+    """
+    spans = []
+    start = None
+    for match in _PARTS.finditer(line):
+        if match.lastgroup == 'space':
+            if start is not None:
+                spans.append((start, match.start()))
+                start = None
+            continue
+        if start is None:
+            start = match.start()
+        if match.lastgroup == 'error':
+            spans.append((start, len(line)))
+            return spans
+    if start is not None:
+        spans.append((start, len(line)))
+    return spans
+
+
+def split_command(user_input):
+    """Splits the line entered by the user in the command label and the
+    arguments, as a TokenLine.
+
+    A line with "&" as its last token runs the command in a background job,
+    the "&" is not part of the arguments. An "&" quoted, escaped or attached
+    to another argument is a regular argument.
+
+    Args:
+        user_input (str) : String with the input entered by the user.
+
+    Returns:
+        tuple : Command label, TokenLine with the arguments and True if the\
+                command runs in background. Command label and arguments are\
+                None if the line is empty.
+    """
+    text = user_input.rstrip()
+    background = False
+    if text.endswith('&'):
+        # Only a last token "&" on its own, without quotes or escapes.
+        spans = token_spans(text)
+        background = spans[-1] == (len(text) - 1, len(text))
+        if background:
+            text = text[:-1]
+    match = _COMMAND.match(text)
+    if match is None:
+        return None, None, background
+    offset = match.end()
+    command = match.group(1)
+    return command, TokenLine(text[offset:].rstrip(), user_input, offset, command), background
@@ -0,0 +1,403 @@
+__docformat__ = 'restructuredtext en'
+
+# -----------------------------------------------------------------------------
+#  _                            _
+# (_)_ __ ___  _ __   ___  _ __| |_ ___
+# | | '_ ` _ \| '_ \ / _ \| '__| __/ __|
+# | | | | | | | |_) | (_) | |  | |_\__ \
+# |_|_| |_| |_| .__/ \___/|_|   \__|___/
+#             |_|
+# -----------------------------------------------------------------------------
+#
+import os
+import json
+import time
+import itertools
+import threading
+import contextvars
+from collections import OrderedDict
+import jc2li.loggerator as loggerator
+
+
+# -----------------------------------------------------------------------------
+#
+#   ___ ___  _ __  ___| |_ __ _ _ __ | |_ ___
+#  / __/ _ \| '_ \/ __| __/ _` | '_ \| __/ __|
+# | (_| (_) | | | \__ \ || (_| | | | | |_\__ \
+#  \___\___/|_| |_|___/\__\__,_|_| |_|\__|___/
+#
+# -----------------------------------------------------------------------------
+#
+MODULE = 'CLI.tracing'
+LOGGER = loggerator.getLoggerator(MODULE)
+
+# Phases in the command lifecycle, in the order they are reported.
+LINE_RECEIVED = 'line_received'
+TOKENIZED = 'tokenized'
+TREE_MATCHED = 'tree_matched'
+ARGS_CONVERTED = 'args_converted'
+CALLBACK_STARTED = 'callback_started'
+CALLBACK_FINISHED = 'callback_finished'
+OUTPUT_FLUSHED = 'output_flushed'
+PHASES = (LINE_RECEIVED, TOKENIZED, TREE_MATCHED, ARGS_CONVERTED,
+          CALLBACK_STARTED, CALLBACK_FINISHED, OUTPUT_FLUSHED)
+
+CHROME_CATEGORY = 'jc2li'
+
+
+# -----------------------------------------------------------------------------
+#       _                     _       __ _       _ _   _
+#   ___| | __ _ ___ ___    __| | ___ / _(_)_ __ (_) |_(_) ___  _ __  ___
+#  / __| |/ _` / __/ __|  / _` |/ _ \ |_| | '_ \| | __| |/ _ \| '_ \/ __|
+# | (__| | (_| \__ \__ \ | (_| |  __/  _| | | | | | |_| | (_) | | | \__ \
+#  \___|_|\__,_|___/___/  \__,_|\___|_| |_|_| |_|_|\__|_|\___/|_| |_|___/
+#
+# -----------------------------------------------------------------------------
+#
+class _TraceState(object):
+    """_TraceState class keeps the trace for the command being executed in
+    the current context.
+    """
+
+    def __init__(self, trace, command, start):
+        self.trace = trace
+        self.command = command
+        self.start = start
+        self.last = start
+
+
+# -----------------------------------------------------------------------------
+#
+class TraceEvent(object):
+    """TraceEvent class is the event passed to every hook when a command
+    reaches a phase.
+
+    Every event is a span that starts when the previous phase was reported
+    and ends when this phase is reported, so the span duration is the time
+    taken to reach the phase.
+
+    Attributes:
+        trace (int) : Identifier shared by all events for the same command\
+                execution.
+
+        phase (str) : Phase reported.
+
+        command (str) : Command label.
+
+        start (float) : Time when the span started, from time.perf_counter.
+
+        end (float) : Time when the span ended, from time.perf_counter.
+
+        origin (float) : Time when the line was received.
+
+        thread (int) : Identifier for the thread running the command.
+
+        context (dict) : Phase information, like tokens or converted\
+                arguments.
+    """
+
+    def __init__(self, trace, phase, command, start, end, origin, context):
+        """TraceEvent class initialization method.
+        """
+        self.trace = trace
+        self.phase = phase
+        self.command = command
+        self.start = start
+        self.end = end
+        self.origin = origin
+        self.thread = threading.get_ident()
+        self.context = context
+
+    @property
+    def duration(self):
+        """Get property that returns the span duration.
+
+        Returns:
+            float : Seconds since the previous phase.
+        """
+        return self.end - self.start
+
+    def to_dict(self):
+        """Returns the event as a dictionary.
+
+        Returns:
+            :any:`dict` : Dictionary with all event attributes.
+        """
+        return OrderedDict([('trace', self.trace),
+                            ('phase', self.phase),
+                            ('command', self.command),
+                            ('start', self.start),
+                            ('end', self.end),
+                            ('duration', self.duration),
+                            ('elapsed', self.end - self.origin),
+                            ('thread', self.thread),
+                            ('context', self.context)])
+
+
+# -----------------------------------------------------------------------------
+#
+class Tracer(object):
+    """Tracer class calls hooks registered for every phase in the command
+    lifecycle.
+
+    Callers check the active attribute before reporting any phase, so
+    commands pay a single attribute lookup when no hook is registered.
+
+    The trace for the command being executed is kept in a context variable,
+    so every thread and every asyncio task, like coroutine commands running
+    concurrently in the same event loop, has its own trace.
+    """
+
+    def __init__(self):
+        """Tracer class initialization method.
+        """
+        self.active = False
+        self.__hooks = OrderedDict((phase, []) for phase in PHASES)
+        self.__lock = threading.Lock()
+        self.__state = contextvars.ContextVar('trace', default=None)
+        self.__ids = itertools.count(1)
+
+    def add_hook(self, hook, phases=None):
+        """Registers a hook.
+
+        Args:
+            hook (callable) : Function called with a TraceEvent.
+
+            phases (list) : Phases the hook is called for, all phases if\
+                    None.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            for phase in phases or PHASES:
+                if phase not in self.__hooks:
+                    raise ValueError('unknown phase {}'.format(phase))
+                self.__hooks[phase] = self.__hooks[phase] + [hook]
+            self.active = True
+
+    def remove_hook(self, hook, phases=None):
+        """Unregisters a hook.
+
+        Args:
+            hook (callable) : Function registered.
+
+            phases (list) : Phases the hook is removed from, all phases if\
+                    None.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            for phase in phases or PHASES:
+                self.__hooks[phase] = [x for x in self.__hooks.get(phase, []) if x != hook]
+            self.active = any(self.__hooks.values())
+
+    def clear(self):
+        """Unregisters all hooks.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            for phase in self.__hooks:
+                self.__hooks[phase] = []
+            self.active = False
+
+    def hooks(self, phase):
+        """Returns hooks registered for a phase.
+
+        Args:
+            phase (str) : Phase.
+
+        Returns:
+            list : List with hooks.
+        """
+        return list(self.__hooks[phase])
+
+    def begin(self, command, line):
+        """Starts the trace for a command in the current context and reports
+        the line received.
+
+        Args:
+            command (str) : Command label.
+
+            line (str) : String with the input entered by the user.
+
+        Returns:
+            int : Trace identifier.
+        """
+        state = _TraceState(next(self.__ids), command, time.perf_counter())
+        self.__state.set(state)
+        self.emit(LINE_RECEIVED, line=line)
+        return state.trace
+
+    def emit(self, phase, **kwargs):
+        """Reports a phase for the command traced in the current context.
+
+        A phase reported without any trace started, like commands running
+        in background jobs, starts a new trace.
+
+        Args:
+            phase (str) : Phase reported.
+
+        Keyword Args:
+            Context passed to hooks in the event.
+
+        Returns:
+            None
+        """
+        end = time.perf_counter()
+        state = self.__state.get()
+        if state is None:
+            state = _TraceState(next(self.__ids), None, end)
+            self.__state.set(state)
+        hooks = self.__hooks[phase]
+        if not hooks:
+            state.last = end
+            return
+        event = TraceEvent(state.trace, phase, state.command, state.last, end, state.start, kwargs)
+        state.last = end
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception as ex:
+                LOGGER.error('trace hook {0} failed: {1}'.format(hook, ex))
+        # Time spent in hooks is not accounted to the next phase.
+        state.last = time.perf_counter()
+
+    def end(self):
+        """Ends the trace for the command in the current context.
+
+        Returns:
+            None
+        """
+        self.__state.set(None)
+
+
+# -----------------------------------------------------------------------------
+#
+class SpanExporter(object):
+    """SpanExporter class is a hook writing every event to a file, with the
+    records returned by a serializer.
+
+    Records are written as they are reported, with the separator between
+    them, after the header, and the footer is written when the exporter is
+    closed.
+    """
+
+    def __init__(self, filename, serializer, header='', separator='', footer=''):
+        """SpanExporter class initialization method.
+
+        Args:
+            filename (str) : Filename where events are written.
+
+            serializer (callable) : Function called with a TraceEvent that\
+                    returns a list with the records to write.
+
+            header (str) : String written before any record.
+
+            separator (str) : String written between records.
+
+            footer (str) : String written when the exporter is closed.
+        """
+        self.filename = filename
+        self.serializer = serializer
+        self._lock = threading.Lock()
+        self._file = open(filename, 'w')
+        self._pid = os.getpid()
+        self.__separator = separator
+        self.__footer = footer
+        self.__next = ''
+        self._file.write(header)
+
+    def __call__(self, event):
+        records = self.serializer(event)
+        with self._lock:
+            if self._file is not None:
+                for record in records:
+                    self._file.write(self.__next)
+                    self._file.write(record)
+                    self.__next = self.__separator
+
+    def flush(self):
+        """Flushes all events written to the file.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        """Writes the footer and closes the file.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.write(self.__footer)
+                self._file.close()
+                self._file = None
+
+
+# -----------------------------------------------------------------------------
+#
+class JsonLinesExporter(SpanExporter):
+    """JsonLinesExporter class writes every event as a JSON object in its
+    own line.
+    """
+
+    def __init__(self, filename):
+        """JsonLinesExporter class initialization method.
+
+        Args:
+            filename (str) : Filename where events are written.
+        """
+        super(JsonLinesExporter, self).__init__(filename, self.serialize)
+
+    def serialize(self, event):
+        return ['{}\n'.format(json.dumps(event.to_dict(), default=str))]
+
+
+# -----------------------------------------------------------------------------
+#
+class ChromeTraceExporter(SpanExporter):
+    """ChromeTraceExporter class writes events in Chrome trace-event format,
+    which can be loaded in chrome://tracing or Perfetto.
+
+    Every phase is a complete event, and a complete event for the whole
+    command is added when its output is flushed, so phases are displayed
+    nested inside the command. Events are written as they are reported, and
+    the JSON array is closed when the exporter is closed.
+    """
+
+    def __init__(self, filename):
+        """ChromeTraceExporter class initialization method.
+
+        Args:
+            filename (str) : Filename where events are written.
+        """
+        super(ChromeTraceExporter, self).__init__(filename, self.serialize, header='[\n',
+                                                  separator=',\n', footer='\n]\n')
+
+    def _record(self, name, start, end, event, args):
+        return json.dumps(OrderedDict([('name', name),
+                                       ('cat', CHROME_CATEGORY),
+                                       ('ph', 'X'),
+                                       ('ts', start * 1e6),
+                                       ('dur', (end - start) * 1e6),
+                                       ('pid', self._pid),
+                                       ('tid', event.thread),
+                                       ('args', args)]), default=str)
+
+    def serialize(self, event):
+        args = dict(event.context)
+        args['trace'] = event.trace
+        records = [self._record(event.phase, event.start, event.end, event, args)]
+        if event.phase == OUTPUT_FLUSHED:
+            records.append(self._record(event.command or 'command', event.origin, event.end, event,
+                                        {'trace': event.trace}))
+        return records
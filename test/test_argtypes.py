@@ -0,0 +1,178 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import time
+import asyncio
+import threading
+from array import array
+import pytest
+from jc2li.argtypes import AsyncCliType, Str, Int, Dicta
+from jc2li.arguments import Argument
+
+
+class T_Slow(AsyncCliType):
+
+    def __init__(self, **kwargs):
+        super(T_Slow, self).__init__(**kwargs)
+        self.release = threading.Event()
+        self.delay = False
+
+    def fetch_complete_list(self, document, text):
+        if self.delay:
+            self.release.wait(5)
+        return ['{0}-one'.format(text), '{0}-two'.format(text)]
+
+
+class T_Coroutine(AsyncCliType):
+
+    async def fetch_complete_list(self, document, text):
+        await asyncio.sleep(0)
+        return ['alpha', 'beta']
+
+
+def test_async_cli_type_fast_source():
+    argo = Argument('name', T_Slow, completer_kwargs={'deadline': 1.0})
+    assert argo.completer.complete(None, 'a') == ['a-one', 'a-two']
+
+
+def test_async_cli_type_deadline():
+    argo = Argument('name', T_Slow, completer_kwargs={'deadline': 0.01})
+    completer = argo.completer
+    assert completer.complete(None, 'a') == ['a-one', 'a-two']
+    completer.delay = True
+    # slow fetch returns last options fetched while it is running.
+    start = time.time()
+    assert completer.complete(None, 'a') == ['a-one', 'a-two']
+    assert time.time() - start < 1.0
+    completer.release.set()
+    for _ in range(100):
+        if completer.complete(None, 'b') == ['b-one', 'b-two']:
+            break
+        time.sleep(0.01)
+    assert completer.complete(None, 'b') == ['b-one', 'b-two']
+
+
+def test_async_cli_type_stale_fetch():
+    argo = Argument('name', T_Slow, completer_kwargs={'deadline': 0.01})
+    completer = argo.completer
+    completer.delay = True
+    completer.get_complete_list(None, 'old')
+    generation = completer._generation
+    completer.delay = False
+    completer.release.set()
+    assert completer.get_complete_list(None, 'new') == ['new-one', 'new-two']
+    assert completer.is_stale(generation)
+    time.sleep(0.05)
+    assert completer.get_complete_list(None, 'new') == ['new-one', 'new-two']
+
+
+def test_async_cli_type_stale_text():
+    argo = Argument('name', T_Slow, completer_kwargs={'deadline': 0.01})
+    completer = argo.completer
+    assert completer.get_complete_list(None, 'a') == ['a-one', 'a-two']
+    completer.delay = True
+    # options fetched for another text are not used after the deadline.
+    assert completer.get_complete_list(None, 'ab') is None
+    completer.release.set()
+    for _ in range(100):
+        if completer.get_complete_list(None, 'ab') == ['ab-one', 'ab-two']:
+            break
+        time.sleep(0.01)
+    assert completer.get_complete_list(None, 'ab') == ['ab-one', 'ab-two']
+
+
+def test_async_cli_type_coroutine():
+    argo = Argument('name', T_Coroutine, completer_kwargs={'deadline': 1.0})
+    assert argo.completer.complete(None, 'a') == ['alpha']
+
+
+def test_str_complete():
+    argo = Argument('name', Str)
+    assert argo.completer.complete(None, 'a') is None
+
+
+class T_Hex(Int):
+
+    @staticmethod
+    def _(val):
+        return int(val, 16)
+
+
+def test_many():
+    assert Int._many(['1', '-2', '30']) == [1, -2, 30]
+    assert T_Hex._many(['a', '10']) == [10, 16]
+    assert Str._many(['a', 'b']) == ['a', 'b']
+
+
+def test_store_many():
+    argo = Argument('name', Int)
+    argo.completer.store_many([1])
+    assert argo.value == 1
+    argo.completer.store_many([2, 3], True)
+    assert argo.value == [1, 2, 3]
+    argo.completer.store_many([4, 5], True)
+    assert argo.value == [1, 2, 3, 4, 5]
+    argo.completer.store_many([6, 7])
+    assert argo.value == [6, 7]
+    dicta = Argument('dicta', Dicta)
+    dicta.completer.store_many(['one=1', 'two=2'])
+    assert dicta.value == {'one': '1', 'two': '2'}
+
+
+def test_store_array_container():
+    argo = Argument('ids', Int, container='array')
+    argo.completer.store(1)
+    assert argo.value == array('q', [1])
+    argo.completer.store_many([2, 3], True)
+    argo.completer.store(4, True)
+    assert argo.value == array('q', [1, 2, 3, 4])
+    argo.completer.store_many([5, 6])
+    assert argo.value == array('q', [5, 6])
+    with pytest.raises(OverflowError):
+        argo.completer.store_many([1 << 64])
+
+
+def test_many_typed_buffer():
+    values = Int._many(['1', '-2', '30'], 'array')
+    assert values == array('q', [1, -2, 30])
+    assert T_Hex._many(['a', '10'], 'array') == array('q', [10, 16])
+    with pytest.raises(OverflowError):
+        Int._many([str(1 << 64)], 'array')
+    argo = Argument('ids', Int, container='array')
+    argo.completer.store_many(values)
+    assert argo.value is values
+    argo.completer.store_many(Int._many(['4'], 'array'), True)
+    assert argo.value == array('q', [1, -2, 30, 4])
+    plain = Argument('name', Int)
+    values = Int._many(['1', '2'])
+    plain.completer.store_many(values)
+    assert plain.value is values
+
+
+def test_many_numpy_buffer():
+    numpy = pytest.importorskip('numpy')
+    values = Int._many(['1', '-2', '30'], 'numpy')
+    assert values.dtype == numpy.int64
+    argo = Argument('ids', Int, container='numpy')
+    argo.completer.store_many(values)
+    assert argo.value is values
+    argo.completer.store_many(Int._many(['4'], 'numpy'), True)
+    assert argo.value.tolist() == [1, -2, 30, 4]
+
+
+def test_store_numpy_container():
+    numpy = pytest.importorskip('numpy')
+    argo = Argument('ids', Int, container='numpy')
+    argo.completer.store_many([1, 2])
+    argo.completer.store(3, True)
+    assert argo.value.dtype == numpy.int64
+    assert argo.value.tolist() == [1, 2, 3]
+
+
+def test_container_errors():
+    with pytest.raises(ValueError):
+        Argument('ids', Int, container='set')
+    with pytest.raises(ValueError):
+        Argument('names', Str, container='array')
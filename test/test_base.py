@@ -0,0 +1,151 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import asyncio
+from jc2li.cli import Cli
+from jc2li.decorators import argo, setsyntax, syntax
+from jc2li.argtypes import Int, Str
+from jc2li.base import CliBase
+from prompt_toolkit.document import Document
+
+
+class CliTestAsyncClass(Cli):
+
+    def __init__(self):
+        super(CliTestAsyncClass, self).__init__()
+        self.values = []
+
+    @Cli.command('wait')
+    @setsyntax
+    @syntax('wait value')
+    @argo('value', Int, None)
+    async def do_wait(self, value):
+        await asyncio.sleep(0)
+        self.values.append(value)
+        return value
+
+    @Cli.command('sleep')
+    @setsyntax
+    @syntax('sleep value')
+    @argo('value', Int, None)
+    async def do_sleep(self, value):
+        await asyncio.sleep(value)
+        self.values.append(value)
+
+    @Cli.command('plain')
+    async def do_plain(self, line):
+        await asyncio.sleep(0)
+        self.values.append(line)
+        return False
+
+
+def test_async_command_exec_user_input():
+    cli = CliTestAsyncClass()
+    assert cli.exec_user_input('wait 10')
+    assert cli.exec_user_input('plain some text') is False
+    assert cli.values == [10, 'some text']
+
+
+def test_async_command_exec_user_input_async():
+    cli = CliTestAsyncClass()
+
+    async def _run():
+        assert await cli.exec_user_input_async('wait 1')
+        assert await cli.exec_user_input_async('wait 2')
+        assert await cli.exec_user_input_async('') is True
+
+    cli.run_coroutine(_run())
+    assert cli.values == [1, 2]
+
+
+def test_background_job():
+    cli = CliTestAsyncClass()
+    assert cli.exec_user_input('wait 5 &')
+    job = cli.jobs.last()
+    assert job.join(5)
+    assert job.status == 'Done'
+    assert job.result == 5
+    assert cli.values == [5]
+
+
+def test_background_job_cancel():
+    cli = CliTestAsyncClass()
+    cli.exec_user_input('bg sleep 10')
+    job = cli.jobs.last()
+    job.cancel()
+    assert job.join(5)
+    assert job.status == 'Cancelled'
+    assert cli.values == []
+
+
+def test_ranked_command_completion(tmpdir):
+    cli = CliTestAsyncClass()
+    cli.HISTORY_FILE = str(tmpdir.join('history.txt'))
+    cli.RANKED_COMPLETION = True
+    completer = CliBase.CliCompleter(cli)
+    matches = [x.text for x in completer.get_completions(Document('slp'), None)]
+    assert matches[0] == 'sleep'
+    cli.exec_user_input('plain')
+    matches = [x.text for x in completer.get_completions(Document('p'), None)]
+    assert matches[0] == 'plain'
+
+
+def test_prompt_session_reused(tmpdir):
+    cli = CliTestAsyncClass()
+    cli.HISTORY_FILE = str(tmpdir.join('history.txt'))
+    assert not cli.history.is_loaded()
+    session = cli.session
+    assert cli.session is session
+    assert session.history is cli.history
+
+
+class T_Counted(Str):
+
+    CALLS = []
+
+    def help(self, text):
+        T_Counted.CALLS.append(text)
+        return 'Enter a name'
+
+
+class T_Dynamic(Str):
+
+    CACHE_HELP = False
+
+    def help(self, text):
+        return 'Enter a name like {}'.format(text.strip() or 'x')
+
+
+class CliTestToolbarClass(Cli):
+
+    @Cli.command('cached')
+    @setsyntax
+    @syntax('cached name')
+    @argo('name', T_Counted, None)
+    def do_cached(self, name):
+        pass
+
+    @Cli.command('dynamic')
+    @setsyntax
+    @syntax('dynamic name')
+    @argo('name', T_Dynamic, None)
+    def do_dynamic(self, name):
+        pass
+
+
+def test_completer_toolbar_cached():
+    cli = CliTestToolbarClass()
+    completer = CliBase.CliCompleter(cli)
+    del T_Counted.CALLS[:]
+    for text in ('cached ', 'cached a', 'cached ab', 'cached abc'):
+        list(completer.get_completions(Document(text), None))
+        assert cli.toolbar_str == 'Enter a name'
+    assert T_Counted.CALLS == [' ', 'a']
+
+    completer.reset()
+    list(completer.get_completions(Document('dynamic a'), None))
+    assert cli.toolbar_str == 'Enter a name like a'
+    list(completer.get_completions(Document('dynamic b'), None))
+    assert cli.toolbar_str == 'Enter a name like b'
@@ -0,0 +1,64 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import time
+import threading
+from jc2li.cache import Cache
+
+
+def test_cache_lru():
+    cache = Cache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats() == {'size': 2, 'hits': 3, 'misses': 1, 'evictions': 1, 'refreshes': 0}
+
+
+def test_cache_ttl():
+    cache = Cache()
+    cache.set('a', 1, ttl=0.01)
+    cache.set('b', 2)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    assert len(cache) == 1
+
+
+def test_cache_loader():
+    calls = []
+    cache = Cache()
+    cache.set_loader('a', lambda: calls.append(1) or len(calls), ttl=10)
+    assert cache.get('a') == 1
+    assert cache.get('a') == 1
+    assert calls == [1]
+
+
+def test_cache_stale_while_revalidate():
+    release = threading.Event()
+    values = iter([1, 2])
+
+    def _loader():
+        value = next(values)
+        if value == 2:
+            release.wait(5)
+        return value
+
+    cache = Cache()
+    cache.set_loader('a', _loader, ttl=0.01)
+    assert cache.get('a') == 1
+    time.sleep(0.02)
+    # stale value is returned while it is refreshed in background.
+    assert cache.get('a') == 1
+    release.set()
+    for _ in range(100):
+        if cache.stats()['refreshes']:
+            break
+        time.sleep(0.01)
+    assert cache.get('a') == 2
@@ -0,0 +1,239 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import itertools
+import pytest
+from jc2li.cli import Cli
+from jc2li.decorators import argo, syntax, setsyntax, defer_trees
+from jc2li.journal import Journal, get_command_tree
+from jc2li.tokenizer import split_command
+from jc2li.argtypes import Int, Str
+from jc2li.clierror import CliException
+from jc2li.common import TREE_ATTR
+from jc2li.catalog import Catalog, write_catalog, command_function, FREEFORM_KIND, CTE_KIND, HEADER
+from jc2li.run import attach_catalog
+
+
+PATTERNS = ['F1', '10', 'f2', 'f3', 'f4', 'f5', 'F2', '-F2', '-F3', 'f2=x', 'f3=1', 'f4=y', 'nid', 'nsig']
+
+
+class CliTestCatalogClass(Cli):
+
+    @Cli.command('choice')
+    @setsyntax
+    @syntax('choice f1 [f2 | f3]!')
+    @argo('f1', Str, None)
+    @argo('f2', Int, 0)
+    @argo('f3', Int, 1)
+    def do_choice(self, f1, f2, f3):
+        return f1, f2, f3
+
+    @Cli.command('multi')
+    @setsyntax
+    @syntax('multi f1 [f2 f3 f4]+')
+    @argo('f1', Str, None)
+    @argo('f2', Str, 'F2')
+    @argo('f3', Str, 'F3')
+    @argo('f4', Str, 'F4')
+    def do_multi(self, f1, f2, f3, f4):
+        return f1, f2, f3, f4
+
+    @Cli.command('mixed')
+    @setsyntax
+    @syntax('mixed f1 [f2]? [f3]+ [f4]* [f5]?')
+    @argo('f1', Int, None)
+    @argo('f2', Str, 'F2')
+    @argo('f3', Str, 'F3')
+    @argo('f4', Str, 'F4')
+    @argo('f5', Str, 'F5')
+    def do_mixed(self, f1, f2, f3, f4, f5):
+        return f1, f2, f3, f4, f5
+
+    @Cli.command('node')
+    @setsyntax
+    @syntax('node name [nid | nsig]?')
+    @argo('name', Str, None)
+    @argo('nid', Int, 0)
+    @argo('nsig', Str, 'none')
+    def do_node(self, name, nid, nsig):
+        return name, nid, nsig
+
+    @Cli.command('prefix')
+    @setsyntax
+    @syntax('prefix f1 [<F2> | <F3>]!')
+    @argo('f1', Str, None)
+    @argo('F2', Str, 'F2')
+    @argo('F3', Str, 'F3')
+    def do_prefix(self, f1, F2, F3):
+        return f1, F2, F3
+
+    @Cli.command('free')
+    @setsyntax
+    @syntax('free f1 [f2]@')
+    @argo('f1', Int, None)
+    @argo('f2', Str, 'None')
+    def do_free(self, f1, f2):
+        return f1, f2
+
+
+@pytest.fixture
+def catalog(tmpdir):
+    cli = CliTestCatalogClass()
+    filename = str(tmpdir.join('commands.cat'))
+    writer = write_catalog(cli, filename)
+    catalog = Catalog(filename)
+    yield cli, writer, catalog
+    catalog.close()
+
+
+def _tree_path(root, writer, patterns):
+    try:
+        return [writer.node_ids[id(x)] for x in root.find_path(patterns)]
+    except CliException as ex:
+        return ex.message
+
+
+def _catalog_path(catalog, command, patterns):
+    try:
+        return catalog.find_path(command, patterns)
+    except CliException as ex:
+        return ex.message
+
+
+def test_catalog_commands(catalog):
+    cli, _, catalog = catalog
+    assert len(catalog) == len(cli.commands)
+    assert catalog.commands() == sorted(cli.commands)
+    assert catalog.find_command('unknown') is None
+    assert catalog.syntax('multi') == 'multi f1 [f2 f3 f4]+'
+    assert catalog.syntax('exit') is None
+    assert catalog.arguments('node') == [('name', 'Str', None), ('nid', 'Int', 0), ('nsig', 'Str', 'none')]
+    assert catalog.arguments('unknown') == []
+
+
+def test_catalog_nodes(catalog):
+    cli, writer, catalog = catalog
+    root = getattr(command_function(cli.get_command_cb('free')), TREE_ATTR)
+    path = catalog.find_path('free', ['10', 'any'])
+    assert catalog.node_name(path[0]) == 'f1'
+    assert catalog.node_kind(path[1]) == FREEFORM_KIND
+    assert path == _tree_path(root, writer, ['10', 'any'])
+    path = catalog.find_path('prefix', ['a', 'F3'])
+    assert catalog.node_kind(path[1]) == CTE_KIND
+    assert catalog.node_name(path[1]) == 'F3'
+
+
+@pytest.mark.parametrize('command', ['choice', 'multi', 'mixed', 'node', 'prefix', 'free'])
+def test_catalog_find_path(catalog, command):
+    cli, writer, catalog = catalog
+    root = getattr(command_function(cli.get_command_cb(command)), TREE_ATTR)
+    for length in range(4):
+        for patterns in itertools.product(PATTERNS, repeat=length):
+            patterns = list(patterns)
+            assert _catalog_path(catalog, command, patterns) == _tree_path(root, writer, patterns)
+
+
+def test_catalog_errors(catalog, tmpdir):
+    _, _, catalog = catalog
+    with pytest.raises(CliException) as ex:
+        catalog.find_path('unknown', [])
+    assert ex.value.message == 'Command <unknown> not found'
+    with pytest.raises(CliException) as ex:
+        catalog.find_path('choice', ['F1', 'f4=1'])
+    assert ex.value.message == '<f4=1> not found'
+    filename = str(tmpdir.join('invalid.cat'))
+    with open(filename, 'wb') as f:
+        f.write(b'\x00' * 64)
+    with pytest.raises(CliException):
+        Catalog(filename)
+
+
+def test_catalog_truncated(catalog, tmpdir):
+    _, writer, _ = catalog
+    with open(str(tmpdir.join('commands.cat')), 'rb') as f:
+        data = f.read()
+    # every size cuts the header or the tables before the string table.
+    assert HEADER.unpack_from(data)[-1] > 300
+    filename = str(tmpdir.join('truncated.cat'))
+    for size in (0, 6, 44, 100, 300):
+        with open(filename, 'wb') as f:
+            f.write(data[:size])
+        with pytest.raises(CliException):
+            Catalog(filename)
+    assert attach_catalog(Cli(), filename) is None
+
+
+def _exec(cli, user_input):
+    command, line, _ = split_command(user_input)
+    try:
+        return cli.exec_command(command, line)
+    except CliException as ex:
+        return ex.message
+
+
+@pytest.mark.parametrize('theInput', ['choice a -f2 3', 'choice a -f3=4', 'choice a -f9 1',
+                                      'multi a -f2 x -f3 y -f4 z -f2 w', 'mixed 1 -f3 a -f3 b -f5 c',
+                                      'mixed 1 -f3 a=b=c', 'node n -nid 4', 'node n nsig=x',
+                                      'prefix a F3', 'free 10 a b=c', 'free'])
+def test_catalog_dispatch(catalog, monkeypatch, theInput):
+    cli, _, catalog = catalog
+    expected = _exec(cli, theInput)
+    with_catalog = CliTestCatalogClass()
+    with_catalog.catalog = catalog
+    monkeypatch.setattr(Journal, 'map_passed_args_to_command_argos', None)
+    assert _exec(with_catalog, theInput) == expected
+
+
+def test_catalog_deferred_trees(catalog):
+    _, _, catalog = catalog
+    defer_trees()
+    try:
+
+        class CliTestDeferredClass(Cli):
+
+            @Cli.command('choice')
+            @setsyntax
+            @syntax('choice f1 [f2 | f3]!')
+            @argo('f1', Str, None)
+            @argo('f2', Int, 0)
+            @argo('f3', Int, 1)
+            def do_choice(self, f1, f2, f3):
+                return f1, f2, f3
+
+    finally:
+        defer_trees(False)
+    cli = CliTestDeferredClass()
+    func = command_function(cli.get_command_cb('choice'))
+    assert getattr(func, TREE_ATTR, None) is None
+    cli.catalog = catalog
+    assert _exec(cli, 'choice a -f2 3') == ('a', 3, 1)
+    assert getattr(func, TREE_ATTR, None) is None
+    root = get_command_tree(func)
+    assert root is not None and getattr(func, TREE_ATTR) is root
+    cli.catalog = None
+    assert _exec(cli, 'choice a -f3 4') == ('a', 0, 4)
+
+
+def test_catalog_stale_commands(catalog):
+    cli, _, catalog = catalog
+    assert catalog.stale_commands(cli) == []
+
+    class CliTestStaleClass(Cli):
+
+        @Cli.command('choice')
+        @setsyntax
+        @syntax('choice f1 [f2]?')
+        @argo('f1', Str, None)
+        @argo('f2', Int, 0)
+        def do_choice(self, f1, f2):
+            return f1, f2
+
+    assert 'choice' in catalog.stale_commands(CliTestStaleClass())
+
+
+def test_catalog_find_path_equal_in_value(catalog):
+    _, _, catalog = catalog
+    path = catalog.find_path('choice', ['F1', '-f2=a=b'])
+    assert len(path) == 2
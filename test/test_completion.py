@@ -0,0 +1,128 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import threading
+import pytest
+import jc2li.completion as completion
+from jc2li.completion import CompletionIndex, RankedMatcher, prefix_upper_bound, usage_from_history
+from jc2li.argtypes import CliType
+from jc2li.arguments import Argument
+
+NAMES = ['leaf-{0:04d}'.format(i) for i in range(1000)] + ['spine-{0:02d}'.format(i) for i in range(20)]
+
+
+class T_Names(CliType):
+
+    INDEX = CompletionIndex(NAMES, limit=5)
+
+    def get_complete_list(self, document, text):
+        return T_Names.INDEX
+
+
+def test_prefix_upper_bound():
+    assert prefix_upper_bound('abc') == 'abd'
+    assert prefix_upper_bound('') is None
+
+
+def test_completion_index_prefix():
+    index = CompletionIndex(NAMES)
+    assert index.complete('spine-1') == ['spine-{0:02d}'.format(i) for i in range(10, 20)]
+    assert index.complete('leaf-000') == ['leaf-{0:04d}'.format(i) for i in range(10)]
+    assert len(index.complete(' ')) == len(NAMES)
+    assert index.complete('none') == []
+
+
+@pytest.mark.parametrize("theTexts", (('l', 'le', 'lea', 'leaf-09'),
+                                      ('leaf-09', 'leaf-0', 'leaf-099'),
+                                      ('s', 'leaf-0999', 'spine-0')))
+def test_completion_index_refine(theTexts):
+    index = CompletionIndex(NAMES)
+    for text in theTexts:
+        assert index.complete(text) == [x for x in NAMES if x.startswith(text)]
+
+
+def test_completion_index_refine_per_thread():
+    index = CompletionIndex(NAMES)
+    assert index.complete('spine') == [x for x in NAMES if x.startswith('spine')]
+    results = []
+    # another thread completing a different text does not change the
+    # result refined in this thread, and it does not use it either.
+    thread = threading.Thread(target=lambda: results.append(index.complete('leaf-09')))
+    thread.start()
+    thread.join()
+    assert results[0] == [x for x in NAMES if x.startswith('leaf-09')]
+    assert index.complete('spine-1') == [x for x in NAMES if x.startswith('spine-1')]
+
+
+def test_completion_index_limit():
+    index = CompletionIndex(NAMES, limit=3)
+    assert index.complete('leaf') == ['leaf-0000', 'leaf-0001', 'leaf-0002']
+    assert len(index.complete('leaf', limit=10)) == 10
+
+
+@pytest.mark.parametrize("theTexts", (('9', '99', '999'),
+                                      ('e-01', 'e-015'),
+                                      ('ine-1', 'ine')))
+def test_completion_index_substring(theTexts):
+    index = CompletionIndex(NAMES, mode='substring')
+    for text in theTexts:
+        assert index.complete(text) == sorted(x for x in NAMES if text in x)
+
+
+def test_completion_index_fuzzy():
+    index = CompletionIndex(NAMES, mode='fuzzy', limit=3)
+    assert index.complete('spnie-07')[0] == 'spine-07'
+    assert index.complete('laef-0123')[0] == 'leaf-0123'
+
+
+def test_cli_type_complete_with_index():
+    argo = Argument('name', T_Names)
+    assert argo.completer.complete(None, 'spine-1') == ['spine-10', 'spine-11', 'spine-12', 'spine-13', 'spine-14']
+
+
+def test_usage_from_history():
+    usage = usage_from_history(['show a', 'set b', 'show c', 'exit'], first_only=True)
+    assert usage == {'set': 0.5, 'show': 0.75, 'exit': 1.0}
+    assert usage_from_history(['show a'])['a'] == 1.0
+
+
+def test_ranked_matcher_tiers():
+    matcher = RankedMatcher(NAMES + ['xspine-07', 'sp-xine-07'], limit=4)
+    assert matcher.complete('spine-07')[:3] == ['spine-07', 'xspine-07', 'sp-xine-07']
+    assert matcher.complete('lf0123')[0] == 'leaf-0123'
+    assert matcher.complete('spnie-07')[0] == 'spine-07'
+
+
+def test_ranked_matcher_usage():
+    matcher = RankedMatcher(NAMES, limit=3, usage=usage_from_history(['leaf-0999', 'leaf-0500']))
+    assert matcher.complete('leaf') == ['leaf-0500', 'leaf-0999', 'leaf-0000']
+    assert matcher.complete('')[:2] == ['leaf-0500', 'leaf-0999']
+    matcher.touch('spine-00')
+    assert matcher.complete('')[0] == 'spine-00'
+
+
+def test_ranked_matcher_subsequence_scan(monkeypatch):
+    monkeypatch.setattr(completion, 'SUBSEQUENCE_SCAN', 2)
+    names = ['xl{0}f'.format('-' * i) for i in range(1, 200)]
+    matcher = RankedMatcher(reversed(names), limit=2)
+    assert matcher.complete('lf') == names[:2]
+    matcher.touch(names[100])
+    assert matcher.complete('lf') == [names[100], names[0]]
+
+
+def test_ranked_matcher_touch_while_completing():
+    matcher = RankedMatcher(NAMES, limit=3)
+    done = threading.Event()
+
+    def _touch():
+        for i, name in enumerate(NAMES * 5):
+            matcher.touch('{0}-{1}'.format(name, i))
+        done.set()
+
+    thread = threading.Thread(target=_touch)
+    thread.start()
+    while not done.is_set():
+        assert len(matcher.complete('leaf')) == 3
+    thread.join()
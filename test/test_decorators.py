@@ -4,6 +4,7 @@
 # sys.path.append(cliPath)
 
 import pytest
+from array import array
 from jc2li.cli import Cli
 from jc2li.decorators import argo, syntax, setsyntax, argos
 from jc2li.argtypes import Int, Str, Dicta
@@ -88,6 +89,13 @@ class CliTestClass(Cli):
     def do_test_syntax_one_or_more(self, f1, f2):
         return f1, f2
 
+    @setsyntax
+    @syntax('setsyntax f1 [f2]+')
+    @argo('f1', Str, None)
+    @argo('f2', Int, 0, container='array')
+    def do_test_syntax_one_or_more_array(self, f1, f2):
+        return f1, f2
+
     @setsyntax
     @syntax('setsyntax f1 [f2 | f3]+')
     @argo('f1', Str, None)
@@ -235,6 +243,23 @@ def test_decorator_setsyntax_one_or_more():
     assert cli.do_test_syntax_one_or_more('myshelf -f2 100 -f2 101') == ('myshelf', [100, 101])
 
 
+def test_decorator_setsyntax_one_or_more_many_values():
+    cli = CliTestClass()
+    values = list(range(1000))
+    line = 'myshelf ' + ' '.join('-f2 {}'.format(x) for x in values)
+    assert cli.do_test_syntax_one_or_more(line) == ('myshelf', values)
+    assert cli.do_test_syntax_one_or_more(line) == ('myshelf', values)
+
+
+def test_decorator_setsyntax_one_or_more_array():
+    cli = CliTestClass()
+    assert cli.do_test_syntax_one_or_more_array('myshelf -f2 100') == ('myshelf', array('q', [100]))
+    line = 'myshelf ' + ' '.join('-f2 {}'.format(x) for x in range(1000))
+    assert cli.do_test_syntax_one_or_more_array(line) == ('myshelf', array('q', range(1000)))
+    with pytest.raises(ValueError):
+        cli.do_test_syntax_one_or_more_array('myshelf -f2 1 -f2 x')
+
+
 def test_decorator_setsyntax_one_or_more_logic_or():
     pass
     cli = CliTestClass()
@@ -310,6 +335,8 @@ def test_decorator_setsyntax_multiple_arguments():
             -f3 "+f3" -f4 "*f4"') == (100, 'F2', '+f3', '*f4', 'F5')
     assert cli.do_test_syntax_multiple_arguments('100 \
             -f2 "?f2" -f3 "+f3" -f4 "*f4" -f5 "?f5"') == (100, '?f2', '+f3', '*f4', '?f5')
+    assert cli.do_test_syntax_multiple_arguments('100 -f3 a=b=c') == (100, 'F2', 'a=b=c', 'F4', 'F5')
+    assert cli.do_test_syntax_multiple_arguments('100 -f2=a=b x -f3 y') == (100, 'x', 'y', 'F4', 'F5')
     assert cli.do_test_syntax_multiple_arguments('100 \
             -f2 "?f2" -f3 "+f3" -f3 "++f3" -f4 "*f4" -f4 "**f4" -f5 "?f5"') == (100, '?f2', ['+f3', '++f3'], ['*f4', '**f4'], '?f5')
     with pytest.raises(CliException) as ex:
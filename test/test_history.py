@@ -0,0 +1,132 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+from prompt_toolkit.history import FileHistory
+from prompt_toolkit.buffer import Buffer
+import random
+import pytest
+from prompt_toolkit.document import Document
+from jc2li.history import LazyFileHistory, HistoryLines, HistoryIndex, AutoSuggestFromIndex
+from jc2li.history import build_max_tree, range_argmax
+
+
+def test_lazy_file_history_format(tmpdir):
+    filename = str(tmpdir.join('history.txt'))
+    history = LazyFileHistory(filename)
+    assert len(history) == 0
+    history.append('show tenants')
+    history.append('first\nsecond')
+    assert list(FileHistory(filename)) == ['show tenants', 'first\nsecond']
+
+    history = LazyFileHistory(filename)
+    assert not history.is_loaded()
+    history.append('exit')
+    history.append('help')
+    assert not history.is_loaded()
+    assert list(history) == ['show tenants', 'first\nsecond', 'exit', 'help']
+    assert history[-1] == 'help'
+    history.append('quit')
+    assert list(FileHistory(filename)) == list(history)
+
+
+def test_history_lines_copy_on_write():
+    strings = ['a', 'b', 'c']
+    lines = HistoryLines(strings)[:]
+    lines[1] = 'B'
+    lines.append('d')
+    lines[-1] = 'D'
+    assert list(lines) == ['a', 'B', 'c', 'D']
+    assert strings == ['a', 'b', 'c']
+    strings.append('x')
+    assert len(lines) == 4
+    assert lines[1:3] == ['B', 'c']
+
+
+def test_lazy_file_history_buffer(tmpdir):
+    history = LazyFileHistory(str(tmpdir.join('history.txt')))
+    history.append('show tenants')
+    buff = Buffer(history=history)
+    buff.text = 'exit'
+    buff.history_backward()
+    assert buff.text == 'show tenants'
+    buff.history_forward()
+    assert buff.text == 'exit'
+    buff.reset(append_to_history=True)
+    assert list(history) == ['show tenants', 'exit']
+
+
+def _expected(entries, prefix):
+    result = []
+    for entry in reversed(entries):
+        if entry.startswith(prefix) and entry not in result:
+            result.append(entry)
+    return result
+
+
+def test_range_argmax():
+    rnd = random.Random(0)
+    values = list(range(100))
+    rnd.shuffle(values)
+    tree = build_max_tree(values)
+    for _ in range(200):
+        lo = rnd.randrange(100)
+        hi = rnd.randrange(lo, 101)
+        expected = max(range(lo, hi), key=lambda i: values[i]) if lo < hi else None
+        assert range_argmax(tree, values, lo, hi) == expected
+
+
+@pytest.mark.parametrize("theDelta", (4, 1024))
+def test_history_index_search(tmpdir, theDelta):
+    rnd = random.Random(1)
+    filename = str(tmpdir.join('history.txt'))
+    history = LazyFileHistory(filename)
+    entries = ['show vrf {}'.format(rnd.randrange(50)) for _ in range(200)]
+    for entry in entries[:150]:
+        history.append(entry)
+    index = HistoryIndex(filename, delta_size=theDelta)
+    for entry in entries[150:]:
+        history.append(entry)
+        index.add(entry)
+    for prefix in ('', 'show', 'show vrf 1', 'show vrf 49', 'set'):
+        assert index.search(prefix) == _expected(entries, prefix)
+        assert index.search(prefix, 3) == _expected(entries, prefix)[:3]
+    assert index.suggest('show vrf 4') == next(x for x in _expected(entries, 'show vrf 4') if x != 'show vrf 4')
+    assert index.suggest('set') is None
+
+
+def test_history_index_persisted(tmpdir):
+    filename = str(tmpdir.join('history.txt'))
+    history = LazyFileHistory(filename)
+    for entry in ('show a', 'show b', 'set c'):
+        history.append(entry)
+    assert history.index.search('show') == ['show b', 'show a']
+    assert tmpdir.join('history.txt.idx').check()
+    history.append('show a')
+    history.append('set d')
+
+    index = HistoryIndex(filename)
+    assert index.load()
+    assert index.search('s') == ['set d', 'show a', 'set c', 'show b']
+    tmpdir.join('history.txt').write('')
+    assert not HistoryIndex(filename).load()
+
+
+def test_history_index_maxsize(tmpdir):
+    filename = str(tmpdir.join('history.txt'))
+    history = LazyFileHistory(filename)
+    for i in range(20):
+        history.append('cmd {:02d}'.format(i))
+    index = HistoryIndex(filename, maxsize=5)
+    assert index.search('cmd') == ['cmd {:02d}'.format(i) for i in range(19, 14, -1)]
+
+
+def test_auto_suggest_from_index(tmpdir):
+    history = LazyFileHistory(str(tmpdir.join('history.txt')))
+    history.append('show tenants')
+    history.append('show vrf')
+    suggest = AutoSuggestFromIndex(history.index)
+    assert suggest.get_suggestion(None, None, Document('show ')).text == 'vrf'
+    assert suggest.get_suggestion(None, None, Document('show t')).text == 'enants'
+    assert suggest.get_suggestion(None, None, Document('exit')) is None
@@ -3,7 +3,14 @@
 # cliPath = '.'
 # sys.path.append(cliPath)
 
+import pytest
 from jc2li.journal import Journal
+from jc2li.rules import RuleHandler as RH
+from jc2li.cliparser import process_syntax
+from jc2li.common import ARITY_ATTR
+from jc2li.decorators import argo, syntax, setsyntax
+from jc2li.argtypes import Int, Str
+from jc2li.clierror import CliException, ARITY_KIND, PATH_KIND
 
 
 def test_journal():
@@ -11,3 +18,92 @@ def test_journal():
     assert len(journal.path) == 0
     assert len(journal.argos.keys()) == 0
     assert journal.traverse_node is None
+
+
+def test_journal_cache():
+    journal = Journal(cache_size=1)
+    journal.set_to_cache('one', 1)
+    journal.set_to_cache('two', 2)
+    assert journal.get_from_cache('one') is None
+    assert journal.get_from_cache('two') == 2
+    journal.set_cache_loader('three', lambda: 3)
+    assert journal.get_from_cache('three') == 3
+    assert journal.cache_stats()['evictions'] == 2
+
+
+@pytest.mark.parametrize("theSyntax,theExpected", (
+    ('cmd f1 f2', (2, 2, ('f1', 'f2'), set())),
+    ('cmd f1 [f2]?', (1, 3, ('f1', ), {'-f2'})),
+    ('cmd f1 [f2 | f3]!', (2, 3, ('f1', ), {'-f2', '-f3'})),
+    ('cmd f1 [f2 f3]?', (1, 5, ('f1', ), {'-f2', '-f3'})),
+    ('cmd f1 [f2 | f3 [f4 | f5]?]?', (1, 5, ('f1', ), {'-f2', '-f3', '-f4', '-f5'})),
+    ('cmd f1 [f2]? [f3]+', (2, None, ('f1', ), {'-f2', '-f3'})),
+    ('cmd f1 [f2]*', (1, None, ('f1', ), {'-f2'})),
+    ('cmd f1 [f2]@', (2, None, ('f1', ), set())),
+    ('cmd f1 <F2>', (1, 2, ('f1', 'F2'), set())),
+    ('cmd f1 [<F2> | <F3>]!', (2, 2, ('f1', ), set())),
+))
+def test_syntax_arity(theSyntax, theExpected):
+    _, rules = process_syntax(theSyntax)
+    arity = RH.syntax_arity(rules)
+    assert (arity.min_args, arity.max_args, arity.required, set(arity.options)) == theExpected
+    assert arity.unbounded == (theExpected[1] is None)
+
+
+def test_arity_rejects_before_tree_walk(monkeypatch):
+
+    @setsyntax
+    @syntax('cmd f1 [f2]?')
+    @argo('f1', Str, None)
+    @argo('f2', Int, 0)
+    def do_cmd(self, f1, f2):
+        return f1, f2
+
+    assert getattr(do_cmd, ARITY_ATTR).max_args == 3
+    assert do_cmd(None, 'a -f2 2') == ('a', 2)
+    monkeypatch.setattr(Journal, 'map_passed_args_to_command_argos', None)
+    with pytest.raises(CliException) as ex:
+        do_cmd(None, '')
+    assert ex.value.kind == ARITY_KIND
+    assert ex.value.message == 'Number of Args: Too few arguments'
+    with pytest.raises(CliException) as ex:
+        do_cmd(None, 'a -f2 2 extra')
+    assert ex.value.kind == PATH_KIND
+    assert ex.value.message == '<extra> not found'
+    assert ex.value.column == 8
+
+
+@pytest.mark.parametrize("theSyntax,theLine,theExpected", (
+    ('x [f1 | f2]+', '-f1', ()),
+    ('x [f1 | f2]+', '-f1=5', ()),
+    ('w f1 [f2]!', 'a -f2', ('a', )),
+    ('w f1 [f2]!', 'a -f2=3', ('a', )),
+    ('w f1 [f2]!', 'a -f2 3', ('a', 3)),
+))
+def test_arity_accepts_option_forms(theSyntax, theLine, theExpected):
+
+    @setsyntax
+    @syntax(theSyntax)
+    @argo('f1', Str, 'F1')
+    @argo('f2', Int, 0)
+    def do_cmd(self, *args):
+        return args
+
+    result = do_cmd(None, theLine)
+    assert result[:len(theExpected)] == theExpected
+
+
+def test_arity_too_many_reports_first_bad_token():
+
+    @setsyntax
+    @syntax('t f1 [f2]?')
+    @argo('f1', Str, None)
+    @argo('f2', Int, 0)
+    def do_cmd(self, f1, f2):
+        return f1, f2
+
+    with pytest.raises(CliException) as ex:
+        do_cmd(None, 'x y z w')
+    assert ex.value.kind == PATH_KIND
+    assert ex.value.message == '<y> not found'
+    assert ex.value.token == 1
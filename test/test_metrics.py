@@ -0,0 +1,195 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import json
+import random
+import asyncio
+import threading
+import pytest
+from jc2li.cli import Cli
+from jc2li.decorators import argo, setsyntax, syntax
+from jc2li.argtypes import Int
+from jc2li.clierror import CliException, ARITY_KIND, PATH_KIND
+from jc2li.metrics import Histogram, Metrics, bucket_index, bucket_range, BUCKETS, SUB_BUCKETS
+
+
+class CliTestMetricsClass(Cli):
+
+    @Cli.command('add')
+    @setsyntax
+    @syntax('add f1 f2')
+    @argo('f1', Int, None)
+    @argo('f2', Int, None)
+    def do_add(self, f1, f2):
+        return f1 + f2
+
+    @Cli.command('fail')
+    @setsyntax
+    @syntax('fail f1')
+    @argo('f1', Int, None)
+    def do_fail(self, f1):
+        raise ValueError(f1)
+
+    @Cli.command('wait')
+    @setsyntax
+    @syntax('wait f1')
+    @argo('f1', Int, None)
+    async def do_wait(self, f1):
+        await asyncio.sleep(0)
+        return f1
+
+
+def _exec(cli, line):
+    try:
+        cli.exec_user_input(line)
+    except Exception:
+        pass
+
+
+def test_bucket_index_and_range():
+    for value in list(range(4096)) + [random.randrange(1 << 36) for _ in range(1000)]:
+        low, high = bucket_range(bucket_index(value))
+        assert low <= value <= high
+        assert high - low <= max(1, value // SUB_BUCKETS)
+    assert bucket_index(1 << 40) == BUCKETS - 1
+    assert bucket_range(BUCKETS - 1)[1] >= (1 << 36) - 1
+
+
+def test_histogram_percentiles():
+    hist = Histogram()
+    assert hist.percentile(50) is None
+    assert hist.min is None
+    values = list(range(1, 10001))
+    random.shuffle(values)
+    for value in values:
+        hist.record_ns(value * 1000)
+    assert hist.count == 10000
+    assert hist.min == 1000
+    assert hist.max == 10000000
+    assert hist.mean == pytest.approx(5000.5e-6)
+    for pct in (50, 90, 99, 99.9):
+        assert hist.percentile(pct) == pytest.approx(pct / 100 * 10e-3, rel=1.0 / SUB_BUCKETS)
+    assert hist.percentile(100) == 10e-3
+    hist.record_ns(-5)
+    assert hist.min == 0
+
+
+def test_histogram_merge():
+    first, second, both = Histogram(), Histogram(), Histogram()
+    for value in range(0, 100000, 7):
+        (first if value % 2 else second).record_ns(value)
+        both.record_ns(value)
+    first.merge(second)
+    assert first.to_dict() == both.to_dict()
+    assert list(first.counts) == list(both.counts)
+
+
+def test_metrics_record():
+    metrics = Metrics()
+    metrics.begin()
+    metrics.parsed(0.25)
+    metrics.record('cmd', 1.0)
+    metrics.record('cmd', 0.5, CliException('test', 'too few', kind=ARITY_KIND))
+    metrics.record('cmd', 0.5, KeyError('x'))
+    entry = metrics.get('cmd')
+    assert entry.count == 3
+    assert entry.parse.max == 250000000
+    assert entry.parse.min == 0
+    assert entry.execute.max == 750000000
+    assert entry.errors == {ARITY_KIND: 1, 'KeyError': 1}
+    assert entry.error_count == 2
+    assert 'cmd' in metrics and metrics.labels() == ['cmd']
+    metrics.reset()
+    assert 'cmd' not in metrics
+
+
+def test_metrics_record_threads():
+    metrics = Metrics()
+
+    def _record():
+        for _ in range(1000):
+            metrics.record('cmd', 0.001)
+
+    threads = [threading.Thread(target=_record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert metrics.get('cmd').count == 4000
+    assert metrics.get('cmd').execute.count == 4000
+
+
+def test_metrics_parse_per_coroutine():
+    metrics = Metrics()
+
+    async def _command(parse, wait):
+        metrics.begin()
+        metrics.parsed(parse)
+        await asyncio.sleep(wait)
+        metrics.record('cmd', 1.0)
+
+    async def _run():
+        await asyncio.gather(_command(0.25, 0.02), _command(0.5, 0.01))
+
+    asyncio.run(_run())
+    entry = metrics.get('cmd')
+    assert entry.parse.min == 250000000
+    assert entry.parse.max == 500000000
+
+
+def test_cli_metrics():
+    cli = CliTestMetricsClass()
+    for _ in range(3):
+        cli.exec_user_input('add 1 2')
+    _exec(cli, 'add 1')
+    _exec(cli, 'add 1 two')
+    _exec(cli, 'add 1 2 -f3 3')
+    _exec(cli, 'fail 1')
+    add = cli.metrics.get('add')
+    assert add.count == 6
+    assert add.errors == {ARITY_KIND: 1, PATH_KIND: 1, 'ValueError': 1}
+    assert add.parse.count == 6
+    assert add.parse.total > 0
+    assert cli.metrics.get('fail').errors == {'ValueError': 1}
+
+
+def test_cli_metrics_async_command():
+    cli = CliTestMetricsClass()
+    for _ in range(3):
+        cli.exec_user_input('wait 1')
+    entry = cli.metrics.get('wait')
+    assert entry.count == 3
+    assert entry.parse.min > 0
+
+    async def _run():
+        await asyncio.gather(cli.exec_user_input_async('wait 2'), cli.exec_user_input_async('wait 3'))
+
+    cli.run_coroutine(_run())
+    entry = cli.metrics.get('wait')
+    assert entry.count == 5
+    assert entry.parse.min > 0
+
+
+def test_cli_metrics_disabled(monkeypatch):
+    monkeypatch.setattr(CliTestMetricsClass, 'METRICS', False)
+    cli = CliTestMetricsClass()
+    cli.exec_user_input('add 1 2')
+    assert cli.metrics.labels() == []
+
+
+def test_stats_command(tmpdir):
+    cli = CliTestMetricsClass()
+    cli.exec_user_input('add 1 2')
+    cli.exec_user_input('stats')
+    cli.exec_user_input('stats -name add')
+    filename = str(tmpdir.join('stats.json'))
+    cli.exec_user_input('stats -dump {}'.format(filename))
+    with open(filename, 'r') as f:
+        stats = json.load(f)
+    assert stats['add']['count'] == 1
+    assert stats['add']['errors'] == {}
+    assert stats['add']['exec']['count'] == 1
+    assert set(stats['add']['parse']) >= {'min', 'mean', 'max', 'p50', 'p99', 'p99.9'}
+    assert stats['stats']['count'] >= 2
@@ -0,0 +1,67 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import time
+import threading
+from jc2li.cli import Cli
+from jc2li.decorators import argo, setsyntax, syntax
+from jc2li.argtypes import Int
+from jc2li.profiler import SamplingProfiler, IDLE
+
+
+class CliTestProfilerClass(Cli):
+
+    @Cli.command('spin')
+    @setsyntax
+    @syntax('spin value')
+    @argo('value', Int, None)
+    def do_spin(self, value):
+        end = time.perf_counter() + value / 1000.0
+        while time.perf_counter() < end:
+            pass
+
+
+def _wait_for(event):
+    event.wait()
+
+
+def test_profiler_sample():
+    profiler = SamplingProfiler()
+    event = threading.Event()
+    thread = threading.Thread(target=_wait_for, args=(event, ))
+    thread.start()
+    try:
+        profiler.sample()
+        profiler.sample()
+    finally:
+        event.set()
+        thread.join()
+    assert profiler.samples == 2
+    stacks = profiler.collapsed()
+    assert stacks
+    assert all(x.startswith(IDLE + ';') for x in stacks)
+    assert any('_wait_for (test_profiler.py:' in x for x in stacks)
+    assert sum(profiler.commands().values()) == sum(int(x.rsplit(' ', 1)[1]) for x in stacks)
+    profiler.reset()
+    assert profiler.collapsed() == []
+
+
+def test_profiler_commands(tmpdir):
+    cli = CliTestProfilerClass()
+    cli.profiler.interval = 0.001
+    cli.exec_user_input('profile on')
+    assert cli.profiler.running
+    assert cli.tracer.active
+    cli.exec_user_input('spin 200')
+    cli.exec_user_input('profile off')
+    assert not cli.profiler.running
+    assert not cli.tracer.active
+    assert cli.profiler.commands()['spin'] > 0
+    assert any(x.startswith('spin;') and 'do_spin' in x for x in cli.profiler.collapsed())
+    filename = str(tmpdir.join('profile.folded'))
+    cli.exec_user_input('profile dump -filename {}'.format(filename))
+    with open(filename, 'r') as f:
+        lines = f.read().splitlines()
+    assert lines == cli.profiler.collapsed()
@@ -0,0 +1,134 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import os
+import json
+import pytest
+from jc2li.recording import Recording
+from jc2li.cli import Cli
+
+
+def _commands(records):
+    return [x['command'] for x in records]
+
+
+def test_recording_append_and_select(tmpdir):
+    rec = Recording(str(tmpdir.join('rec.jsonl')), window=2, sync_every=3)
+    for i in range(10):
+        rec.append({'command': 'cmd {}'.format(i)})
+    assert len(rec) == 10
+    assert _commands(rec.select()) == ['cmd {}'.format(i) for i in range(10)]
+    assert _commands(rec.select(2, 4)) == ['cmd 2', 'cmd 3', 'cmd 4']
+    assert _commands(rec.select(None, 1)) == ['cmd 0', 'cmd 1']
+    assert _commands(rec.select(8)) == ['cmd 8', 'cmd 9']
+    assert rec.select(5, 20) == []
+    rec.close()
+
+
+def test_recording_clear(tmpdir):
+    rec = Recording(str(tmpdir.join('rec.jsonl')), window=4)
+    for i in range(6):
+        rec.append({'command': 'cmd {}'.format(i)})
+    rec.clear(1, 2)
+    assert _commands(rec.select()) == ['cmd 0', 'cmd 3', 'cmd 4', 'cmd 5']
+    rec.remove_last()
+    assert _commands(rec.select()) == ['cmd 0', 'cmd 3', 'cmd 4']
+    rec.clear()
+    assert len(rec) == 0
+    rec.append({'command': 'new'})
+    assert _commands(rec.select()) == ['new']
+    rec.close()
+
+
+def test_recording_resume(tmpdir):
+    filename = str(tmpdir.join('rec.jsonl'))
+    rec = Recording(filename)
+    rec.append({'command': 'first'})
+    rec.append({'command': 'second'})
+    rec.close()
+    rec = Recording(filename, resume=True)
+    rec.append({'command': 'third'})
+    assert _commands(rec.select()) == ['first', 'second', 'third']
+    rec.close()
+
+
+def test_recording_clear_compacts(tmpdir):
+    filename = str(tmpdir.join('rec.jsonl'))
+    rec = Recording(filename, window=1)
+    for i in range(4):
+        rec.append({'command': 'cmd {}'.format(i)})
+    rec.clear(1, 2)
+    assert _commands(rec.select()) == ['cmd 0', 'cmd 3']
+    rec.close()
+    with open(filename, 'r') as f:
+        assert _commands(json.loads(x) for x in f) == ['cmd 0', 'cmd 3']
+    rec = Recording(filename, resume=True)
+    assert _commands(rec.select()) == ['cmd 0', 'cmd 3']
+    rec.remove_last()
+    rec.append({'command': 'cmd 4'})
+    assert _commands(rec.select()) == ['cmd 0', 'cmd 4']
+    rec.clear()
+    rec.close()
+    assert os.path.getsize(filename) == 0
+    rec = Recording(filename)
+    rec.append({'command': 'new'})
+    rec.close()
+    assert len(Recording(filename, resume=True)) == 1
+
+
+def test_recording_session_log():
+    rec = Recording()
+    rec.append({'command': 'cmd'})
+    filename = rec.filename
+    assert os.path.exists(filename)
+    assert Recording().filename != filename
+    rec.close()
+    del rec
+    assert not os.path.exists(filename)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_recording_forked_child(tmpdir):
+    filename = str(tmpdir.join('rec.jsonl'))
+    rec = Recording(filename, window=0)
+    rec.append({'command': 'parent 0'})
+    pid = os.fork()
+    if pid == 0:
+        rec.append({'command': 'child'})
+        os._exit(0 if _commands(rec.select()) == ['parent 0', 'child'] else 1)
+    _, status = os.waitpid(pid, 0)
+    assert status == 0
+    rec.append({'command': 'parent 1'})
+    assert _commands(rec.select()) == ['parent 0', 'parent 1']
+    rec.close()
+
+
+def test_cli_recording_sessions():
+    first, second = Cli(), Cli()
+    first.exec_user_input('start-recording')
+    first.exec_user_input('help')
+    first.exec_user_input('stop-recording')
+    assert first.select_recording() == ['help']
+    assert second.select_recording() == []
+    assert Cli().select_recording() == []
+    second.clear_recording()
+    assert first.select_recording() == ['help']
+
+
+def test_cli_recording(tmpdir, monkeypatch):
+    monkeypatch.setattr(Cli, 'RECORDING_FILE', str(tmpdir.join('rec.jsonl')))
+    cli = Cli()
+    cli.exec_user_input('start-recording')
+    cli.exec_user_input('help')
+    cli.exec_user_input('syntax')
+    cli.exec_user_input('stop-recording')
+    assert cli.select_recording() == ['help', 'syntax']
+    filename = str(tmpdir.join('saved.json'))
+    cli.save_recording(filename)
+    with open(filename, 'r') as f:
+        saved = json.load(f)
+    assert _commands(saved) == ['help', 'syntax']
+    assert all(x['status'] == 'ok' and x['duration'] >= 0 for x in saved)
+    assert saved[0]['timestamp'] <= saved[1]['timestamp']
@@ -0,0 +1,77 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import json
+import pytest
+from jc2li.cli import Cli
+from jc2li.decorators import argo, setsyntax, syntax
+from jc2li.argtypes import Int
+from jc2li.replay import Replay, load_records, percentile
+
+
+class CliTestReplayClass(Cli):
+
+    def __init__(self):
+        super(CliTestReplayClass, self).__init__()
+        self.values = []
+
+    @Cli.command('value')
+    @setsyntax
+    @syntax('value number')
+    @argo('number', Int, None)
+    def do_value(self, number):
+        self.values.append(number)
+
+    @Cli.command('stop')
+    def do_stop(self, line):
+        return False
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) is None
+
+
+def test_load_records(tmpdir):
+    saved = tmpdir.join('saved.json')
+    saved.write(json.dumps([{'command': 'value 1'}, {'command': 'value 2'}]))
+    log = tmpdir.join('log.jsonl')
+    log.write('{"command": "value 1"}\n{"command": "value 2"}\n')
+    assert load_records(str(saved)) == load_records(str(log))
+
+
+@pytest.mark.parametrize("theKwargs", ({'mode': 'max'},
+                                       {'mode': 'max', 'workers': 4},
+                                       {'mode': 'rate', 'rate': 1000},
+                                       {'mode': 'timing', 'speed': 100.0}))
+def test_replay(theKwargs):
+    clis = [CliTestReplayClass()]
+
+    def _factory():
+        clis.append(CliTestReplayClass())
+        return clis[-1]
+
+    records = [{'command': 'value {}'.format(i), 'timestamp': i * 0.01} for i in range(20)]
+    records.append({'command': 'value bad', 'timestamp': 0.2})
+    records.append({'command': 'stop', 'timestamp': 0.2})
+    report = Replay(clis[0], records, factory=_factory, **theKwargs).run().to_dict()
+    assert sorted(sum((x.values for x in clis), [])) == list(range(20))
+    workers = theKwargs.get('workers', 1)
+    assert len(clis) <= 1 + workers if workers > 1 else len(clis) == 1
+    assert report['count'] == 22
+    assert report['commands']['value']['count'] == 21
+    assert report['commands']['value']['errors'] == {'ValueError': 1}
+    assert report['commands']['stop']['errors'] == {}
+    assert report['commands']['value']['p50'] <= report['commands']['value']['p99']
+
+
+def test_replay_wrong_mode():
+    with pytest.raises(ValueError):
+        Replay(CliTestReplayClass(), [], mode='unknown')
+    with pytest.raises(ValueError):
+        Replay(CliTestReplayClass(), [], mode='rate')
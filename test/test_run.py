@@ -0,0 +1,141 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import os
+import sys
+import time
+import socket
+import importlib
+import pytest
+from types import SimpleNamespace
+from jc2li.cli import Cli
+from jc2li.decorators import argo, setsyntax, syntax
+from jc2li.argtypes import Int
+from jc2li.run import serve_job, warm_cli, build_manifest, write_manifest, read_manifest, create_cli_for_command
+from jc2li.run import _accept_job
+
+
+class CliTestJobClass(Cli):
+
+    def __init__(self):
+        super(CliTestJobClass, self).__init__()
+        self.executed = []
+
+    @Cli.command('job')
+    @setsyntax
+    @syntax('job jid')
+    @argo('jid', Int, None)
+    def do_job(self, jid):
+        self.executed.append(jid)
+
+
+def test_warm_cli():
+    cli = CliTestJobClass()
+    module = SimpleNamespace(EXPORT_WARMUP='warmup',
+                             warmup=lambda x: x.journal.set_to_cache('warm', True))
+    assert warm_cli(cli, module)
+    assert cli.journal.get_from_cache('warm') is True
+    assert not warm_cli(cli, SimpleNamespace())
+
+
+def test_serve_job():
+    cli = CliTestJobClass()
+    server, client = socket.socketpair()
+    client.sendall(b'job 1\njob 2\njob three\njob 3\n')
+    client.shutdown(socket.SHUT_WR)
+    assert serve_job(cli, server) == 4
+    assert cli.executed == [1, 2, 3]
+    server.close()
+    client.close()
+
+
+def test_manifest(tmpdir):
+    cli = CliTestJobClass()
+    module = SimpleNamespace(__name__='test_run', EXPORT='CliTestJobClass')
+    manifest = build_manifest(cli, module)
+    assert manifest['module'] == 'test_run'
+    assert manifest['export'] == 'CliTestJobClass'
+    assert manifest['commands']['job'] == {'module': CliTestJobClass.__module__, 'class': 'CliTestJobClass'}
+    assert manifest['commands']['exit'] == {'module': 'jc2li.cli', 'class': 'Cli'}
+    filename = str(tmpdir.join('manifest.json'))
+    write_manifest(cli, module, filename)
+    assert read_manifest(filename) == manifest
+    assert read_manifest(str(tmpdir.join('missing.json'))) is None
+    job_cli = create_cli_for_command(manifest, 'job 1')
+    assert isinstance(job_cli, CliTestJobClass)
+    assert isinstance(create_cli_for_command(manifest, '  job 1 &'), CliTestJobClass)
+    assert type(create_cli_for_command(manifest, 'exit')).__name__ == 'Cli'
+    assert create_cli_for_command(manifest, 'unknown 1') is None
+    assert create_cli_for_command(manifest, '') is None
+
+
+MIXIN_MODULE = """
+from jc2li.cli import Cli
+
+
+class RunTestMixin(object):
+
+    @Cli.command('mixed')
+    def do_mixed(self, line):
+        self.mixed = line
+"""
+
+EXPORT_MODULE = """
+from jc2li.cli import Cli
+from run_test_mixin import RunTestMixin
+
+EXPORT = 'RunTestApp'
+
+
+class RunTestApp(Cli, RunTestMixin):
+
+    def __init__(self):
+        super(RunTestApp, self).__init__()
+        self.extend_commands_from_class('RunTestMixin')
+"""
+
+
+def test_manifest_mixin_module(tmpdir, monkeypatch):
+    tmpdir.join('run_test_mixin.py').write(MIXIN_MODULE)
+    tmpdir.join('run_test_app.py').write(EXPORT_MODULE)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    module = importlib.import_module('run_test_app')
+    manifest = build_manifest(module.RunTestApp(), module)
+    assert manifest['commands']['mixed'] == {'module': 'run_test_mixin', 'class': 'RunTestMixin'}
+    for name in ('run_test_app', 'run_test_mixin'):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    cli = create_cli_for_command(manifest, 'mixed a b')
+    assert 'run_test_app' not in sys.modules
+    assert 'run_test_mixin' in sys.modules
+    assert type(cli).__name__ == 'RunTestMixin'
+    cli.exec_user_input('mixed a b')
+    assert cli.mixed == 'a b'
+
+
+def test_manifest_exception_mode():
+    manifest = {'export': 'Missing',
+                'commands': {'job': {'module': 'jc2li.missing', 'class': 'Missing'}}}
+    assert create_cli_for_command(manifest, 'job 1') is None
+    with pytest.raises(ImportError):
+        create_cli_for_command(manifest, 'job 1', skip_exception=True)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_accept_job_reaps_children(tmpdir):
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(tmpdir.join('jobs.sock')))
+    server.listen(1)
+    server.settimeout(0.01)
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0)
+    children = {pid}
+    for _ in range(100):
+        assert _accept_job(server, children) is None
+        if not children:
+            break
+        time.sleep(0.01)
+    assert children == set()
+    server.close()
@@ -0,0 +1,93 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import os
+import sys
+import json
+import subprocess
+import importlib
+import jc2li.cliparser as cliparser
+from jc2li.journal import Journal
+from jc2li.startup import StartupProfile, check_budget, format_report, write_report
+from jc2li.startup import IMPORT_MODULE, PROCESS_SYNTAX, GET_SYNTAX, BUILD_TREE
+
+
+STARTUP_MODULE = '''
+from jc2li.cli import Cli
+from jc2li.decorators import argo, syntax, setsyntax
+from jc2li.argtypes import Int, Str
+
+
+class CliStartupClass(Cli):
+
+    @Cli.command('start')
+    @setsyntax
+    @syntax('start f1 [f2]?')
+    @argo('f1', Int, None)
+    @argo('f2', Str, 'F2')
+    def do_start(self, f1, f2):
+        return f1, f2
+'''
+
+
+def test_startup_profile(tmpdir):
+    tmpdir.join('startup_commands.py').write(STARTUP_MODULE)
+    sys.path.insert(0, str(tmpdir))
+    get_syntax = cliparser.get_syntax
+    build_tree = Journal.build_command_parsing_tree
+    try:
+        profile = StartupProfile()
+        profile.start()
+        profile.instrument()
+        with profile.measure(IMPORT_MODULE):
+            mod = importlib.import_module('startup_commands')
+        profile.stop()
+    finally:
+        sys.path.remove(str(tmpdir))
+        sys.modules.pop('startup_commands', None)
+    assert cliparser.get_syntax is get_syntax
+    assert Journal.build_command_parsing_tree is build_tree
+    for phase in (IMPORT_MODULE, PROCESS_SYNTAX, GET_SYNTAX, BUILD_TREE):
+        assert profile.phases[phase][2] >= 1
+    own, total, _ = profile.phases[PROCESS_SYNTAX]
+    assert own <= total
+    assert 'CliStartupClass.do_start' in profile.commands
+    assert sum(x[0] for x in profile.phases.values()) <= profile.total
+    assert mod.CliStartupClass().do_start('1') == (1, 'F2')
+
+    report = profile.report(budget=0)
+    assert report['exceeded']
+    assert report['phases'][0]['self'] >= report['phases'][-1]['self']
+    assert 'EXCEEDED' in format_report(report)
+    # this process already imported jc2li modules, so they are reported.
+    assert 'jc2li.cliparser' in report['preloaded']
+    assert 'not measured, imported before the profile' in format_report(report)
+    assert not profile.report()['exceeded']
+    filename = str(tmpdir.join('startup.json'))
+    write_report(report, filename)
+    with open(filename, 'r') as f:
+        assert json.load(f)['commands'][0]['command'] == 'CliStartupClass.do_start'
+
+
+def test_run_module_preloads_nothing():
+    code = ('import sys, jc2li.run; '
+            'print([x for x in ("pyparsing", "prompt_toolkit", "jc2li.journal") if x in sys.modules])')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=root)
+    assert output.decode().strip() == '[]'
+
+
+def test_startup_measure_inactive():
+    profile = StartupProfile()
+    with profile.measure('phase'):
+        pass
+    assert profile.phases == {}
+    assert profile.total == 0.0
+
+
+def test_check_budget():
+    assert check_budget(1.0, None) is None
+    assert check_budget(1.0, 2.0) is True
+    assert check_budget(2.0, 1.0) is False
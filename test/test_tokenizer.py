@@ -0,0 +1,147 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import sys
+import shlex
+import random
+import pytest
+from jc2li.cli import Cli
+from jc2li.base import CliBase
+from jc2li.decorators import argo, setsyntax, syntax
+from jc2li.argtypes import Int, Str
+from jc2li.clierror import CliException, ARGUMENT_KIND, ARITY_KIND, PATH_KIND
+from jc2li.tokenizer import split, split_command, TokenLine, TokenizerError, _SLOW_CHARS
+from prompt_toolkit.document import Document
+
+ALPHABET = ('a', 'b', '=', '-', ' ', ' ', '\t', '\n', '"', "'", '\\', '\x0b', '\xa0', '#', 'é')
+
+
+class CliTestTokenizerClass(Cli):
+
+    @Cli.command('name')
+    @setsyntax
+    @syntax('name f1 [f2]?')
+    @argo('f1', Str, None)
+    @argo('f2', Int, 0)
+    def do_name(self, f1, f2):
+        return f1, f2
+
+
+def _shlex_split(line):
+    try:
+        return shlex.split(line)
+    except ValueError as ex:
+        return str(ex)
+
+
+def _split(line):
+    try:
+        return split(line)
+    except ValueError as ex:
+        return str(ex)
+
+
+@pytest.mark.parametrize("theInput", ('', '   ', 'a b  c', ' \ta\nb\r ', 'a "b c" d', "a 'b \"c' d", 'a""b', "''",
+                                      'a\\ b', '"a\\"b\\\\c\\d"', "'a\\'", 'x\x0by', 'x\xa0y', 'a#b "#"'))
+def test_split_like_shlex(theInput):
+    assert _split(theInput) == _shlex_split(theInput)
+
+
+def test_split_fuzz():
+    rnd = random.Random(0)
+    for _ in range(20000):
+        line = ''.join(rnd.choice(ALPHABET) for _ in range(rnd.randrange(16)))
+        assert _split(line) == _shlex_split(line), repr(line)
+
+
+def test_split_fast_path_chars():
+    expected = set(chr(x) for x in range(sys.maxunicode + 1) if chr(x).isspace()) - set(' \t\r\n')
+    expected.update('"\'\\')
+    assert set(x for x in map(chr, range(sys.maxunicode + 1)) if _SLOW_CHARS.match(x)) == expected
+
+
+def test_split_partial():
+    with pytest.raises(ValueError):
+        split('a "b c')
+    assert split('a "b c', partial=True) == ['a', 'b c']
+    assert split("a 'b c", partial=True) == ['a', 'b c']
+    assert split('a b\\', partial=True) == ['a', 'b']
+    assert split('a "b\\"c\\', partial=True) == ['a', 'b"c']
+    assert split('a "b c" d', partial=True) == ['a', 'b c', 'd']
+
+
+def test_unterminated_quote():
+    cli = CliTestTokenizerClass()
+    assert cli.do_name('"one two" -f2 3') == ('one two', 3)
+    with pytest.raises(CliException) as ex:
+        cli.do_name('"one two')
+    assert ex.value.kind == ARGUMENT_KIND
+    assert ex.value.message == 'Incorrect arguments: No closing quotation'
+    completer = CliBase.CliCompleter(cli)
+    list(completer.get_completions(Document('name "one two'), None))
+    assert [x.text for x in completer.get_completions(Document('name "one two" '), None)] == ['-f2']
+
+
+def test_token_line():
+    line = TokenLine('a "b  c" d')
+    assert line == 'a "b  c" d'
+    assert line.tokens == ['a', 'b  c', 'd']
+    assert line.split_tokens() is line.tokens
+    assert line.spans == [(0, 1), (2, 8), (9, 10)]
+    assert line.column(1) == 2
+    assert line.column(3) == len(line)
+    partial = TokenLine('a "b c')
+    assert partial.split_tokens(partial=True) == ['a', 'b c']
+    assert partial.spans == [(0, 1), (2, 6)]
+    with pytest.raises(TokenizerError) as ex:
+        partial.tokens
+    assert ex.value.position == 2
+
+
+@pytest.mark.parametrize("theInput,theExpected", (
+    ('', (None, None, False)),
+    ('   ', (None, None, False)),
+    ('name', ('name', '', False)),
+    ('  name  a   "b  c"  ', ('name', 'a   "b  c"', False)),
+    ('name a &', ('name', 'a', True)),
+    ('name a &\t', ('name', 'a', True)),
+    ('name a&', ('name', 'a&', False)),
+    ('name a\\&', ('name', 'a\\&', False)),
+    ('name a \\&', ('name', 'a \\&', False)),
+    ('name a "&"', ('name', 'a "&"', False)),
+    ('name "a &', ('name', '"a &', False)),
+    ('name url?x=1&', ('name', 'url?x=1&', False)),
+    ('&', (None, None, True)),
+))
+def test_split_command(theInput, theExpected):
+    assert split_command(theInput) == theExpected
+
+
+def test_split_command_columns():
+    command, line, _ = split_command('  name  a   "b  c"')
+    assert line.source == '  name  a   "b  c"'
+    assert line.offset == 8
+    assert line.tokens == ['a', 'b  c']
+    assert [line.column(x) for x in range(2)] == [8, 12]
+
+
+def test_error_columns():
+    cli = CliTestTokenizerClass()
+    _, line, _ = split_command('name a   -f3 1')
+    with pytest.raises(CliException) as ex:
+        cli.do_name(line)
+    assert ex.value.kind == PATH_KIND
+    assert ex.value.message == '<-f3> not found'
+    assert ex.value.token == 1
+    assert ex.value.column == 9
+    _, line, _ = split_command('name  a "b c')
+    with pytest.raises(CliException) as ex:
+        cli.do_name(line)
+    assert ex.value.message == 'Incorrect arguments: No closing quotation'
+    assert ex.value.column == 8
+    with pytest.raises(CliException) as ex:
+        cli.do_name('')
+    assert ex.value.kind == ARITY_KIND
+    assert ex.value.column == 0
@@ -0,0 +1,155 @@
+# import sys
+#
+# cliPath = '.'
+# sys.path.append(cliPath)
+
+import json
+import asyncio
+from jc2li.cli import Cli
+from jc2li.decorators import argo, setsyntax, syntax
+from jc2li.argtypes import Int
+from jc2li.tracing import Tracer, SpanExporter, JsonLinesExporter, ChromeTraceExporter, PHASES
+from jc2li.tracing import LINE_RECEIVED, TOKENIZED, ARGS_CONVERTED, CALLBACK_FINISHED, OUTPUT_FLUSHED
+
+
+class CliTestTracingClass(Cli):
+
+    @Cli.command('add')
+    @setsyntax
+    @syntax('add f1 f2')
+    @argo('f1', Int, None)
+    @argo('f2', Int, None)
+    def do_add(self, f1, f2):
+        return f1 + f2
+
+    @Cli.command('fail')
+    @setsyntax
+    @syntax('fail f1')
+    @argo('f1', Int, None)
+    def do_fail(self, f1):
+        raise ValueError(f1)
+
+    @Cli.command('nap')
+    @setsyntax
+    @syntax('nap f1')
+    @argo('f1', Int, None)
+    async def do_nap(self, f1):
+        await asyncio.sleep(f1 / 1000.0)
+        return f1
+
+
+def test_tracer_hooks():
+    tracer = Tracer()
+    assert not tracer.active
+    events = []
+    tracer.add_hook(events.append, [TOKENIZED])
+    assert tracer.active
+    tracer.begin('cmd', 'cmd 1')
+    tracer.emit(TOKENIZED, tokens=['1'])
+    tracer.end()
+    assert [(x.phase, x.command, x.context) for x in events] == [(TOKENIZED, 'cmd', {'tokens': ['1']})]
+    assert events[0].duration >= 0
+    tracer.remove_hook(events.append)
+    assert not tracer.active
+
+
+def test_tracer_hook_error():
+    tracer = Tracer()
+    events = []
+
+    def _broken(event):
+        raise RuntimeError('broken')
+
+    tracer.add_hook(_broken)
+    tracer.add_hook(events.append)
+    tracer.begin('cmd', 'cmd')
+    assert [x.phase for x in events] == [LINE_RECEIVED]
+    tracer.clear()
+    assert not tracer.active
+
+
+def test_cli_tracing():
+    cli = CliTestTracingClass()
+    events = []
+    cli.tracer.add_hook(events.append)
+    assert cli.exec_user_input('add 1 2')
+    assert [x.phase for x in events] == list(PHASES)
+    assert len(set(x.trace for x in events)) == 1
+    assert all(x.command == 'add' for x in events)
+    context = dict((x.phase, x.context) for x in events)
+    assert context[TOKENIZED] == {'tokens': ['1', '2']}
+    assert context['args_converted'] == {'args': [1, 2]}
+    assert context[CALLBACK_FINISHED] == {'status': 'ok'}
+    for previous, event in zip(events, events[1:]):
+        assert previous.end <= event.start
+
+    del events[:]
+    try:
+        cli.exec_user_input('fail 3')
+    except ValueError:
+        pass
+    assert events[-2].context == {'status': 'error', 'error': '3'}
+    assert events[-1].phase == OUTPUT_FLUSHED
+
+
+def test_exporters(tmpdir):
+    cli = CliTestTracingClass()
+    jsonl = JsonLinesExporter(str(tmpdir.join('trace.jsonl')))
+    chrome = ChromeTraceExporter(str(tmpdir.join('trace.json')))
+    cli.tracer.add_hook(jsonl)
+    cli.tracer.add_hook(chrome)
+    cli.exec_user_input('add 1 2')
+    cli.exec_user_input('add 3 4')
+    jsonl.close()
+    chrome.close()
+    with open(jsonl.filename, 'r') as f:
+        lines = [json.loads(x) for x in f]
+    assert len(lines) == 2 * len(PHASES)
+    assert lines[0]['phase'] == LINE_RECEIVED and lines[0]['context'] == {'line': 'add 1 2'}
+    with open(chrome.filename, 'r') as f:
+        trace = json.load(f)
+    assert len(trace) == 2 * (len(PHASES) + 1)
+    assert all(x['ph'] == 'X' and x['dur'] >= 0 for x in trace)
+    command = [x for x in trace if x['name'] == 'add']
+    assert len(command) == 2
+    phases = [x for x in trace if x['args']['trace'] == command[0]['args']['trace'] and x['name'] != 'add']
+    assert all(command[0]['ts'] <= x['ts'] and x['ts'] + x['dur'] <= command[0]['ts'] + command[0]['dur'] + 1e-3
+               for x in phases)
+
+
+def test_tracer_concurrent_coroutines():
+    cli = CliTestTracingClass()
+    events = []
+    cli.tracer.add_hook(events.append)
+
+    async def _run():
+        await asyncio.gather(cli.exec_user_input_async('nap 30'), cli.exec_user_input_async('nap 1'))
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(_run())
+    finally:
+        loop.close()
+    traces = {}
+    for event in events:
+        traces.setdefault(event.trace, []).append(event)
+    assert len(traces) == 2
+    for trace in traces.values():
+        assert [x.phase for x in trace] == list(PHASES)
+        line = trace[0].context['line']
+        converted = [x for x in trace if x.phase == ARGS_CONVERTED][0]
+        assert converted.context['args'] == [int(line.split()[1])]
+
+
+def test_span_exporter_serializer(tmpdir):
+    tracer = Tracer()
+    filename = str(tmpdir.join('trace.txt'))
+    exporter = SpanExporter(filename, lambda event: [event.phase], header='<', separator='|', footer='>')
+    tracer.add_hook(exporter, [LINE_RECEIVED, OUTPUT_FLUSHED])
+    tracer.begin('cmd', 'cmd 1')
+    tracer.emit(TOKENIZED)
+    tracer.emit(OUTPUT_FLUSHED)
+    tracer.end()
+    exporter.close()
+    with open(filename, 'r') as f:
+        assert f.read() == '<line_received|output_flushed>'